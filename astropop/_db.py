@@ -1,23 +1,41 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 """Manage SQL databases in a simplier way."""
 
+import logging
 import sqlite3 as sql
+from contextlib import contextmanager, nullcontext
+from itertools import chain
 import numpy as np
 from astropy.table import Table
 
 from .logger import logger
-from .py_utils import broadcast
 
 
 __all__ = ['SQLDatabase', 'SQLTable', 'SQLRow', 'SQLColumn', 'SQLColumnMap']
 
 
 _ID_KEY = '__id__'
+# connection pragmas. journal_mode and mmap_size only apply to file databases
+_DEFAULT_PRAGMAS = {'journal_mode': 'WAL',
+                    'synchronous': 'NORMAL',
+                    'temp_store': 'MEMORY',
+                    'cache_size': -65536,
+                    'mmap_size': 268435456}
+_FILE_ONLY_PRAGMAS = ('journal_mode', 'mmap_size')
+# bound parameters limit per statement of SQLite versions before 3.32
+_MAX_SQL_VARIABLES = 999
+# statements that change the schema and invalidate its cache
+_DDL_KEYWORDS = ('CREATE', 'ALTER', 'DROP')
+# statements that do not change the number of rows of the tables
+_READ_KEYWORDS = ('SELECT', 'PRAGMA')
 
 
 class _SQLViewerBase:
     """Memview for SQL data. Not allowed to copy."""
 
+    # views are created in large numbers, keep them without __dict__
+    __slots__ = ()
+
     def __copy__(self):
         raise NotImplementedError('Cannot copy SQL viewing classes.')
 
@@ -36,6 +54,8 @@ class _SQLRowIndexer(_SQLViewerBase):
         The list of `_SQLRowIndexer` to get the index of.
     """
 
+    __slots__ = ('_row_list',)
+
     def __init__(self, row_list):
         self._row_list = row_list
 
@@ -137,6 +157,8 @@ class SQLColumnMap():
 class SQLTable(_SQLViewerBase):
     """Handle an SQL table operations interfacing with the DB."""
 
+    __slots__ = ('_db', '_name', '_colmap')
+
     def __init__(self, db, name, colmap=None):
         """Initialize the table.
 
@@ -297,7 +319,7 @@ class SQLTable(_SQLViewerBase):
 
     def __len__(self):
         """Get the number of rows in the table."""
-        return self._db.count(self._name)
+        return self._db._nrows(self._name)
 
     def __contains__(self, item):
         """Check if a given column is in the table."""
@@ -305,8 +327,11 @@ class SQLTable(_SQLViewerBase):
 
     def __iter__(self):
         """Iterate over the rows of the table."""
-        for i in self.select():
-            yield i
+        # snapshot the rows with a dedicated cursor, so the database can be
+        # used, and even changed, inside the loop without affecting it
+        columns = ', '.join(self._db._column_list(self._name))
+        cur = self._db._con.execute(f"SELECT {columns} FROM {self._name};")
+        yield from cur.fetchall()
 
     def __repr__(self):
         """Get a string representation of the table."""
@@ -320,6 +345,8 @@ class SQLTable(_SQLViewerBase):
 class SQLColumn(_SQLViewerBase):
     """Handle an SQL column operations interfacing with the DB."""
 
+    __slots__ = ('_db', '_table', '_name')
+
     def __init__(self, db, table, name):
         """Initialize the column.
 
@@ -345,7 +372,7 @@ class SQLColumn(_SQLViewerBase):
     def values(self):
         """Get the values of the current column."""
         vals = self._db.select(self._table, columns=[self._name])
-        return [i[0] for i in vals]
+        return [v for v, in vals]
 
     @property
     def table(self):
@@ -354,7 +381,9 @@ class SQLColumn(_SQLViewerBase):
 
     def __getitem__(self, key):
         """Get a row from the column."""
-        if isinstance(key, (int, np.int_, slice)):
+        if isinstance(key, (int, np.int_)):
+            return self._db.get_item(self._table, self._name, key)
+        if isinstance(key, slice):
             return self.values[key]
         if isinstance(key, (list, np.ndarray)):
             v = self.values
@@ -366,20 +395,22 @@ class SQLColumn(_SQLViewerBase):
         if isinstance(key, (int, np.int_)):
             self._db.set_item(self._table, self._name, key, value)
         elif isinstance(key, (slice, list, np.ndarray)):
-            v = np.array(self.values)
-            v[key] = value
-            self._db.set_column(self._table, self._name, v)
+            # numpy resolves negative, boolean and out of range indexes
+            rows = np.arange(len(self))[key]
+            self._db._set_items(self._table, self._name, rows, value)
         else:
             raise IndexError(f'{key}')
 
     def __len__(self):
         """Get the number of rows in the column."""
-        return len(self.values)
+        return self._db._nrows(self._table)
 
     def __iter__(self):
         """Iterate over the column."""
-        for i in self.values:
-            yield i
+        # same snapshot of SQLTable.__iter__, unpacking the single values
+        cur = self._db._con.execute(f"SELECT {self._name} FROM {self._table};")
+        for v, in cur.fetchall():
+            yield v
 
     def __contains__(self, item):
         """Check if the column contains a given value."""
@@ -395,6 +426,8 @@ class SQLColumn(_SQLViewerBase):
 class SQLRow(_SQLViewerBase):
     """Handle and SQL table row interfacing with the DB."""
 
+    __slots__ = ('_db', '_table', '_row_indexer', '_colmap')
+
     def __init__(self, db, table, row_indexer, colmap=None):
         """Initialize the row.
 
@@ -428,7 +461,10 @@ class SQLRow(_SQLViewerBase):
     @property
     def values(self):
         """Get the values of the current row."""
-        return self._db.select(self._table, where={_ID_KEY: self.index+1})[0]
+        # the internal id is always the first column of the table
+        row = self._db.execute(f"SELECT * FROM {self._table} "
+                               f"WHERE {_ID_KEY}=?;", (self.index+1,))
+        return row[0][1:]
 
     @property
     def index(self):
@@ -494,7 +530,9 @@ class SQLRow(_SQLViewerBase):
 def _sanitize_colnames(data):
     """Sanitize the colnames to avoid invalid characteres like '-'."""
     def _sanitize(key):
-        if len([ch for ch in key if not ch.isalnum() and ch != '_']) != 0:
+        # only alphanumeric and '_' are allowed. str methods run in C.
+        stripped = key.replace('_', '')
+        if stripped and not stripped.isalnum():
             raise ValueError(f'Invalid column name: {key}.')
         return key.lower()
 
@@ -512,7 +550,10 @@ def _sanitize_colnames(data):
 
 def _sanitize_value(data):
     """Sanitize the value to avoid sql errors."""
-    if data is None or isinstance(data, bytes):
+    # builtin values that sqlite already handles are the most common
+    if data is None or type(data) in (int, float, str, bytes):
+        return data
+    if isinstance(data, bytes):
         return data
     if isinstance(data, (str, np.str_)):
         return f"{data}"
@@ -526,6 +567,15 @@ def _sanitize_value(data):
     raise TypeError(f'{type(data)} is not supported.')
 
 
+def _sanitize_array(data):
+    """Sanitize a sequence of values. Numpy arrays are converted at once."""
+    if isinstance(data, np.ndarray) and data.ndim == 1 and \
+       data.dtype.kind in 'biufUS':
+        # tolist already gives python builtin types
+        return data.tolist()
+    return [_sanitize_value(d) for d in data]
+
+
 def _fix_row_index(row, length):
     """Fix the row number to be a valid index."""
     if row < 0:
@@ -550,15 +600,11 @@ def _parse_where(where):
     if where is None:
         _where = None
     elif isinstance(where, dict):
-        where = _sanitize_colnames(where)
-        for i, (k, v) in enumerate(where.items()):
-            v = _sanitize_value(v)
-            if i == 0:
-                _where = f"{k}=?"
-                args = [v]
-            else:
-                _where += f" AND {k}=?"
-                args.append(v)
+        # values are always bound, so the statement text only depends on
+        # the keys and is reused from the sqlite statement cache
+        keys = _sanitize_colnames(list(where.keys()))
+        _where = ' AND '.join(f"{k}=?" for k in keys) or None
+        args = [_sanitize_value(v) for v in where.values()] or None
     elif isinstance(where, str):
         _where = where
     elif isinstance(where, (list, tuple)):
@@ -581,7 +627,7 @@ class SQLDatabase:
     - '__id__' is only for internal indexing. It is ignored on returns.
     """
 
-    def __init__(self, db=':memory:', autocommit=True):
+    def __init__(self, db=':memory:', autocommit=True, pragmas=None):
         """Initialize the database.
 
         Parameters
@@ -592,19 +638,62 @@ class SQLDatabase:
         autocommit : bool (optional)
             Whether to commit changes to the database after each operation.
             Defaults to True.
+        pragmas : dict (optional)
+            SQLite pragmas to set in the connection, like
+            ``{'synchronous': 'FULL'}``. They update the defaults, which use
+            WAL journal, ``synchronous=NORMAL`` and in-memory temp store.
+            Set a pragma to `None` to keep the SQLite default.
         """
         self._db = db
-        self._con = sql.connect(self._db)
+        # the same few commands are executed many times, keep more of them
+        # prepared in the connection statement cache
+        self._con = sql.connect(self._db, cached_statements=256)
         self._cur = self._con.cursor()
         self.autocommit = autocommit
+        self._set_pragmas(pragmas)
+
+        # {table: [columns]} cache, built on demand from sqlite_master
+        self._schema = None
 
         self._row_indexes = {}
+        # tables that may have rows changed by raw sql commands
+        self._unchecked_rows = set()
         self._build_row_indexes()
 
+    def _set_pragmas(self, pragmas=None):
+        """Set the connection pragmas."""
+        prag = dict(_DEFAULT_PRAGMAS)
+        prag.update(pragmas or {})
+        if self._db == ':memory:':
+            # already memory-resident, WAL and mmap do not apply
+            prag = {k: v for k, v in prag.items()
+                    if k not in _FILE_ONLY_PRAGMAS or k in (pragmas or {})}
+        for k, v in prag.items():
+            if v is not None:
+                self._cur.execute(f"PRAGMA {k}={v};").fetchall()
+
     def execute(self, command, arguments=None):
         """Execute a SQL command in the database."""
-        logger.debug('executing sql command: "%s"',
-                     str.replace(command, '\n', ' '))
+        self._check_raw_command(command)
+        return self._execute(command, arguments)
+
+    def executemany(self, command, arguments):
+        """Execute a SQL command in the database."""
+        self._check_raw_command(command)
+        return self._executemany(command, arguments)
+
+    def _check_raw_command(self, command):
+        """Mark the row indexes to be checked after raw row changes."""
+        if not command.lstrip()[:6].upper().startswith(_READ_KEYWORDS):
+            self._unchecked_rows.update(self._row_indexes)
+
+    def _execute(self, command, arguments=None):
+        """Execute a SQL command, without checking the row indexes."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('executing sql command: "%s"',
+                         str.replace(command, '\n', ' '))
+        if command.lstrip()[:6].upper().startswith(_DDL_KEYWORDS):
+            self._invalidate_schema()
         try:
             if arguments is None:
                 self._cur.execute(command)
@@ -613,25 +702,32 @@ class SQLDatabase:
             res = self._cur.fetchall()
         except sql.Error as e:
             self._con.rollback()
+            self._invalidate_schema()
             raise e
 
-        if self.autocommit:
+        # read-only statements do not open a transaction, nothing to commit
+        if self.autocommit and self._con.in_transaction:
             self.commit()
         return res
 
-    def executemany(self, command, arguments):
-        """Execute a SQL command in the database."""
-        logger.debug('executing sql command: "%s"',
-                     str.replace(command, '\n', ' '))
+    def _executemany(self, command, arguments):
+        """Execute a SQL command many times, without checking row indexes."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('executing sql command: "%s"',
+                         str.replace(command, '\n', ' '))
 
+        if command.lstrip()[:6].upper().startswith(_DDL_KEYWORDS):
+            self._invalidate_schema()
         try:
             self._cur.executemany(command, arguments)
             res = self._cur.fetchall()
         except sql.Error as e:
             self._con.rollback()
+            self._invalidate_schema()
             raise e
 
-        if self.autocommit:
+        # read-only statements do not open a transaction, nothing to commit
+        if self.autocommit and self._con.in_transaction:
             self.commit()
         return res
 
@@ -639,6 +735,48 @@ class SQLDatabase:
         """Commit the current transaction."""
         self._con.commit()
 
+    @contextmanager
+    def transaction(self):
+        """Run a block of operations in a single transaction.
+
+        The changes are committed once at the end of the block, instead of
+        after each operation. If an error is raised inside the block, all
+        its changes are rolled back.
+        """
+        began = not self._con.in_transaction
+        autocommit = self.autocommit
+        self.autocommit = False
+        if began:
+            self._cur.execute('BEGIN IMMEDIATE;')
+        try:
+            yield self
+        except BaseException:
+            if began:
+                if self._con.in_transaction:
+                    self._con.rollback()
+                self._invalidate_schema()
+                self._row_indexes = {}
+                self._build_row_indexes()
+            raise
+        else:
+            if began:
+                self.commit()
+        finally:
+            self.autocommit = autocommit
+
+    def _atomic(self):
+        """Transaction for multi-statement operations.
+
+        With autocommit, the operation runs in its own transaction. Otherwise,
+        it runs inside the pending transaction of the caller, opened here if
+        needed, and is committed only by `commit`.
+        """
+        if self.autocommit:
+            return self.transaction()
+        if not self._con.in_transaction:
+            self._cur.execute('BEGIN;')
+        return nullcontext(self)
+
     def count(self, table, where=None):
         """Get the number of rows in the table."""
         self._check_table(table)
@@ -648,7 +786,7 @@ class SQLDatabase:
         if where is not None:
             comm += f"WHERE {where}"
         comm += ";"
-        return self.execute(comm, args)[0][0]
+        return self._execute(comm, args)[0][0]
 
     def select(self, table, columns=None, where=None, order=None, limit=None,
                offset=None):
@@ -669,7 +807,7 @@ class SQLDatabase:
         """
         self._check_table(table)
         if columns is None:
-            columns = self[table].column_names
+            columns = self._column_list(table)
         elif isinstance(columns, str):
             columns = [columns]
         # only use sanitized column names
@@ -706,7 +844,7 @@ class SQLDatabase:
 
         if args == []:
             args = None
-        res = self.execute(comm, args)
+        res = self._execute(comm, args)
         return res
 
     def copy(self, indexes=None):
@@ -715,12 +853,12 @@ class SQLDatabase:
 
     def column_names(self, table):
         """Get the column names of the table."""
+        return list(self._column_list(table))
+
+    def _column_list(self, table):
+        """Get the cached column names list of the table. Do not modify it."""
         self._check_table(table)
-        comm = "SELECT * FROM "
-        comm += f"{table} LIMIT 1;"
-        self.execute(comm)
-        return [i[0].lower() for i in self._cur.description
-                if i[0].lower() != _ID_KEY.lower()]
+        return self._get_schema()[table]
 
     @property
     def db(self):
@@ -730,17 +868,35 @@ class SQLDatabase:
     @property
     def table_names(self):
         """Get the table names in the database."""
+        return list(self._get_schema())
+
+    def _get_schema(self):
+        """Get the {table: [columns]} schema, reading it if not cached."""
+        if self._schema is not None:
+            return self._schema
+        schema = {}
         comm = "SELECT name FROM sqlite_master WHERE type='table';"
-        return [i[0] for i in self.execute(comm) if i[0] != 'sqlite_sequence']
+        for (table,) in self._execute(comm):
+            if table == 'sqlite_sequence':
+                continue
+            self._execute(f"SELECT * FROM {table} LIMIT 1;")
+            schema[table] = [i[0].lower() for i in self._cur.description
+                             if i[0].lower() != _ID_KEY.lower()]
+        self._schema = schema
+        return schema
+
+    def _invalidate_schema(self):
+        """Discard the cached schema. It is read again when needed."""
+        self._schema = None
 
     def _check_table(self, table):
         """Check if the table exists in the database."""
-        if table not in self.table_names:
+        if table not in self._get_schema():
             raise KeyError(f'Table "{table}" does not exist.')
 
     def _add_missing_columns(self, table, columns):
         """Add missing columns to the table."""
-        existing = set(self.column_names(table))
+        existing = set(self._column_list(table))
         for col in [i for i in columns if i not in existing]:
             self.add_column(table, col)
 
@@ -751,13 +907,31 @@ class SQLDatabase:
         if add_columns:
             self._add_missing_columns(table, data.keys())
 
-        dict_row_list = _dict2row(cols=self.column_names(table), **data)
-        try:
-            rows = np.broadcast(*dict_row_list)
-        except ValueError:
-            rows = broadcast(*dict_row_list)
-        rows = list(zip(*rows.iters))
-        self._add_data_list(table, rows, skip_sanitize=skip_sanitize)
+        columns = _dict2row(cols=self._column_list(table), **data)
+
+        # broadcast scalars and length-1 arrays to the length of the
+        # arrays, column by column
+        length = None
+        scalars = []
+        for i, col in enumerate(columns):
+            if col is None or isinstance(col, (str, bytes)) or \
+               np.ndim(col) == 0:
+                scalars.append(i)
+                columns[i] = col if skip_sanitize else _sanitize_value(col)
+                continue
+            columns[i] = col if skip_sanitize else _sanitize_array(col)
+            if len(col) == 1:
+                scalars.append(i)
+                columns[i] = columns[i][0]
+            elif length is None:
+                length = len(col)
+            elif len(col) != length:
+                raise ValueError("All array arguments must have the same "
+                                 "length.")
+        length = 1 if length is None else length
+        for i in scalars:
+            columns[i] = [columns[i]]*length
+        self._insert_rows(table, list(zip(*columns)))
 
     def _add_data_list(self, table, data, skip_sanitize=False):
         """Add data stored in a list to the table."""
@@ -767,35 +941,73 @@ class SQLDatabase:
         if np.ndim(data) == 1:
             data = np.reshape(data, (1, len(data)))
 
-        if np.shape(data)[1] != len(self.column_names(table)):
+        if np.shape(data)[1] != len(self._column_list(table)):
             raise ValueError('data must have the same number of columns as '
                              'the table.')
 
         if not skip_sanitize:
             data = [tuple(map(_sanitize_value, d)) for d in data]
-        comm = f"INSERT INTO {table} VALUES "
-        comm += f"(NULL, {', '.join(['?']*len(data[0]))})"
-        comm += ';'
-        self.executemany(comm, data)
+        self._insert_rows(table, data)
+
+    def _insert_rows(self, table, rows):
+        """Insert a list of already sanitized row tuples in the table."""
+        if len(rows) == 0:
+            return
+        # multi-row VALUES statements are parsed and stepped once for many
+        # rows. Keep each statement under the bound parameters limit.
+        ncols = len(rows[0])
+        chunk = max(1, _MAX_SQL_VARIABLES // max(1, ncols))
+        values = f"(NULL, {', '.join(['?']*ncols)})"
+        nfull = len(rows) - len(rows) % chunk
+        if nfull > 0:
+            comm = f"INSERT INTO {table} VALUES "
+            comm += ', '.join([values]*chunk) + ';'
+            self._executemany(comm,
+                              (list(chain.from_iterable(rows[i:i+chunk]))
+                               for i in range(0, nfull, chunk)))
+        if nfull < len(rows):
+            comm = f"INSERT INTO {table} VALUES "
+            comm += ', '.join([values]*(len(rows) - nfull)) + ';'
+            self._execute(comm, list(chain.from_iterable(rows[nfull:])))
 
         # Update the row indexes
         rl = self._row_indexes[table]
-        rl.extend([_SQLRowIndexer(rl) for i in range(len(data))])
+        rl.extend([_SQLRowIndexer(rl) for i in range(len(rows))])
 
     def _get_indexes(self, table):
         """Get the indexes of the table."""
         comm = f"SELECT {_ID_KEY} FROM {table};"
-        return [i[0] for i in self.execute(comm)]
+        return [i for i, in self._execute(comm)]
 
     def _update_indexes(self, table):
         """Update the indexes of the table."""
         rows = list(range(1, self.count(table) + 1))
         origin = self._get_indexes(table)
         comm = f"UPDATE {table} SET {_ID_KEY} = ? WHERE {_ID_KEY} = ?;"
-        self.executemany(comm, zip(rows, origin))
+        self._executemany(comm, zip(rows, origin))
+
+    def _nrows(self, table):
+        """Get the number of rows of a table from its row indexes."""
+        self._check_table(table)
+        rl = self._row_indexes.get(table)
+        if rl is None:
+            # table created outside the class methods
+            return self.count(table)
+        if table in self._unchecked_rows:
+            self._check_row_indexes(table)
+        return len(rl)
+
+    def _check_row_indexes(self, table):
+        """Resize the row indexes of a table to its number of rows."""
+        rl = self._row_indexes[table]
+        size = self.count(table)
+        del rl[size:]
+        rl.extend([_SQLRowIndexer(rl) for i in range(size - len(rl))])
+        self._unchecked_rows.discard(table)
 
     def _build_row_indexes(self):
         """Build the row indexes."""
+        self._unchecked_rows = set()
         for table in self.table_names:
             size = self.count(table)
             # Create the list that must be passed to _SQLRowIndexer
@@ -823,7 +1035,10 @@ class SQLDatabase:
                     comm += ",\n"
         comm += "\n);"
 
-        self.execute(comm)
+        schema = self._get_schema()
+        self._execute(comm)
+        schema[table] = [str(c).lower() for c in columns or []]
+        self._schema = schema
 
         # Add the row indexer list
         self._row_indexes[table] = []
@@ -846,11 +1061,15 @@ class SQLDatabase:
         col = _sanitize_colnames([column])[0]
         comm = f"ALTER TABLE {table} ADD COLUMN '{col}' ;"
         logger.debug('adding column "%s" to table "%s"', col, table)
-        self.execute(comm)
+        with self._atomic():
+            schema = self._get_schema()
+            self._execute(comm)
+            schema[table].append(col)
+            self._schema = schema
 
-        # adding the data to the table
-        if data is not None:
-            self.set_column(table, column, data)
+            # adding the data to the table
+            if data is not None:
+                self.set_column(table, column, data)
 
     def delete_column(self, table, column):
         """Delete a column from a table."""
@@ -858,12 +1077,15 @@ class SQLDatabase:
 
         if column in (_ID_KEY, 'table', 'default'):
             raise ValueError(f"{column} is a protected name.")
-        if column not in self.column_names(table):
+        if column not in self._column_list(table):
             raise KeyError(f'Column "{column}" does not exist.')
 
         comm = f"ALTER TABLE {table} DROP COLUMN '{column}' ;"
         logger.debug('deleting column "%s" from table "%s"', column, table)
-        self.execute(comm)
+        schema = self._get_schema()
+        self._execute(comm)
+        schema[table].remove(column)
+        self._schema = schema
 
     def add_rows(self, table, data, add_columns=False, skip_sanitize=False):
         """Add a dict row to a table.
@@ -895,7 +1117,7 @@ class SQLDatabase:
             return self._add_data_list(table, data,
                                        skip_sanitize=skip_sanitize)
         if isinstance(data, Table):
-            data = {c: list(data[c]) for c in data.colnames}
+            data = {c: data[c] for c in data.colnames}
             return self._add_data_dict(table, data, add_columns=add_columns,
                                        skip_sanitize=skip_sanitize)
 
@@ -907,7 +1129,7 @@ class SQLDatabase:
         self._check_table(table)
         row = _fix_row_index(index, len(self[table]))
         comm = f"DELETE FROM {table} WHERE {_ID_KEY}={row+1};"
-        self.execute(comm)
+        self._execute(comm)
         self._row_indexes[table].pop(row)
         self._update_indexes(table)
 
@@ -915,7 +1137,10 @@ class SQLDatabase:
         """Drop a table from the database."""
         self._check_table(table)
         comm = f"DROP TABLE {table};"
-        self.execute(comm)
+        schema = self._get_schema()
+        self._execute(comm)
+        del schema[table]
+        self._schema = schema
         del self._row_indexes[table]
 
     def get_table(self, table, column_map=None):
@@ -933,29 +1158,58 @@ class SQLDatabase:
     def get_column(self, table, column):
         """Get a column from the table."""
         column = column.lower()
-        if column not in self.column_names(table):
+        if column not in self._column_list(table):
             raise KeyError(f"column {column} does not exist.")
         return SQLColumn(self, table, column)
 
     def get_item(self, table, column, row):
         """Get an item from the table."""
         self._check_table(table)
-        row = _fix_row_index(row, len(self[table]))
+        row = _fix_row_index(row, self.count(table))
         column = _sanitize_colnames([column])[0]
-        return self.get_column(table, column)[row]
+        if column not in self._column_list(table):
+            raise KeyError(f"column {column} does not exist.")
+        # fetch only the requested cell
+        return self._execute(f"SELECT {column} FROM {table} "
+                             f"WHERE {_ID_KEY}=?;", (int(row)+1,))[0][0]
 
     def set_item(self, table, column, row, value):
         """Set a value in a cell."""
         row = _fix_row_index(row, self.count(table))
         column = _sanitize_colnames([column])[0]
         value = _sanitize_value(value)
-        self.execute(f"UPDATE {table} SET {column}=? "
-                     f"WHERE {_ID_KEY}=?;", (value, row+1))
+        self._execute(f"UPDATE {table} SET {column}=? "
+                      f"WHERE {_ID_KEY}=?;", (value, row+1))
+
+    def _set_items(self, table, column, rows, value):
+        """Set the values of a column in a list of row indexes."""
+        column = _sanitize_colnames([column])[0]
+        if column not in self._column_list(table):
+            raise KeyError(f"column {column} does not exist.")
+        ids = [int(i)+1 for i in rows]
+        if value is None or isinstance(value, (str, bytes)) or \
+           np.ndim(value) == 0:
+            values = [_sanitize_value(value)]
+        else:
+            values = _sanitize_array(value)
+        if len(values) not in (1, len(ids)):
+            raise ValueError(f'cannot set {len(values)} values in '
+                             f'{len(ids)} rows.')
+
+        comm = f"UPDATE {table} SET {column}=? "
+        if len(values) == 1:
+            # the same value in all rows is set with a single statement
+            if len(set(ids)) != self._nrows(table):
+                comm += f"WHERE {_ID_KEY} IN ({', '.join(map(str, ids))})"
+            self._execute(comm + ';', values)
+        else:
+            comm += f"WHERE {_ID_KEY}=?;"
+            self._executemany(comm, zip(values, ids))
 
     def set_row(self, table, row, data):
         """Set a row in the table."""
         row = _fix_row_index(row, self.count(table))
-        colnames = self.column_names(table)
+        colnames = self._column_list(table)
 
         if isinstance(data, dict):
             data = _dict2row(colnames, **data)
@@ -970,27 +1224,31 @@ class SQLDatabase:
         comm = f"UPDATE {table} SET "
         comm += f"{', '.join(f'{i}=?' for i in colnames)} "
         comm += f" WHERE {_ID_KEY}=?;"
-        self.execute(comm, tuple(list(map(_sanitize_value, data)) + [row+1]))
+        self._execute(comm,
+                      tuple(list(map(_sanitize_value, data)) + [row+1]))
 
     def set_column(self, table, column, data):
         """Set a column in the table."""
         tablen = self.count(table)
-        if column not in self.column_names(table):
+        if column not in self._column_list(table):
             raise KeyError(f"column {column} does not exist.")
         if len(data) != tablen and tablen != 0:
             raise ValueError("data must have the same length as the table.")
 
-        if tablen == 0:
-            for i in range(len(data)):
-                self.add_rows(table, {})
-
-        col = _sanitize_colnames([column])[0]
-        comm = f"UPDATE {table} SET "
-        comm += f"{col}=? "
-        comm += f" WHERE {_ID_KEY}=?;"
-        args = list(zip([_sanitize_value(d) for d in data],
-                        range(1, self.count(table)+1)))
-        self.executemany(comm, args)
+        # rows creation and update are committed at once
+        with self._atomic():
+            if tablen == 0 and len(data) > 0:
+                # create all the empty rows in a single batch
+                ncols = len(self._column_list(table))
+                self._add_data_list(table, [(None,)*ncols]*len(data),
+                                    skip_sanitize=True)
+
+            col = _sanitize_colnames([column])[0]
+            comm = f"UPDATE {table} SET "
+            comm += f"{col}=? "
+            comm += f" WHERE {_ID_KEY}=?;"
+            args = zip(_sanitize_array(data), range(1, self.count(table)+1))
+            self._executemany(comm, args)
 
     def index_of(self, table, where):
         """Get the index(es) where a given condition is satisfied."""
@@ -1036,9 +1294,8 @@ class SQLDatabase:
         s = f"{self.__class__.__name__} '{self.db}' at {hex(id(self))}:"
         if len(self) == 0:
             s += '\n\tEmpty database.'
-        for i in self.table_names:
-            s += f"\n\t{i}: {len(self.column_names(i))} columns"
-            s += f" {len(self[i])} rows"
+        for i, cols in self._get_schema().items():
+            s += f"\n\t{i}: {len(cols)} columns {self.count(i)} rows"
         return s
 
     def __copy__(self, indexes=None):
@@ -1064,7 +1321,33 @@ class SQLDatabase:
             return self.select(table, where=where)
 
         # when copying, always copy to memory
+        def _has_id(table):
+            comm = f"PRAGMA table_info({table});"
+            return _ID_KEY in [i[1] for i in self._execute(comm)]
+
         db = SQLDatabase(':memory:')
+        # full copies are done page by page by sqlite. The backup cannot
+        # read a source with uncommitted changes and keeps tables without
+        # row ids as they are, so re-insert the rows in these cases.
+        if indexes is None and not self._con.in_transaction and \
+           all(_has_id(i) for i in self.table_names):
+            self._con.backup(db._con)
+            db._invalidate_schema()
+            has_seq = len(db._execute("SELECT name FROM sqlite_master "
+                                      "WHERE name='sqlite_sequence';")) > 0
+            for i in db.table_names:
+                n = db.count(i)
+                # keep the copy with continuous row ids
+                last = db._execute(f"SELECT MAX({_ID_KEY}) FROM {i};")[0][0]
+                if last not in (None, n):
+                    db._update_indexes(i)
+                if has_seq:
+                    db._execute("UPDATE sqlite_sequence SET seq=? "
+                                "WHERE name=?;", (n, i))
+            db._row_indexes = {}
+            db._build_row_indexes()
+            return db
+
         if indexes is None:
             indexes = {}
         for i in self.table_names:
@@ -1,9 +1,20 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 """Put a `unit` property in classes."""
 
+from functools import lru_cache
+
 from astropy import units
 
 
+@lru_cache(maxsize=256)
+def _parse_unit(value):
+    """Parse a unit once. Dimensionless unscaled units become `None`."""
+    unit = units.Unit(value)
+    if unit == units.dimensionless_unscaled:
+        return None
+    return unit
+
+
 def unit_property(cls):
     """Add a `unit` property to a class."""
     def _unit_getter(obj):
@@ -12,10 +23,14 @@ def unit_property(cls):
         return obj._unit
 
     def _unit_setter(obj, value):
-        if value is None or units.Unit(value) == units.dimensionless_unscaled:
+        if value is None or value is units.dimensionless_unscaled:
             obj._unit = None
-        else:
-            obj._unit = units.Unit(value)
+            return
+        try:
+            obj._unit = _parse_unit(value)
+        except TypeError:
+            # unhashable values can't be cached
+            obj._unit = _parse_unit.__wrapped__(value)
 
     cls._unit = None
     cls.unit = property(_unit_getter, _unit_setter,
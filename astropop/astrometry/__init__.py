@@ -8,6 +8,7 @@ from .astrometrynet import AstrometryNetUnsolvedField, \
                            solve_astrometry_xy, \
                            solve_astrometry_hdu, \
                            solve_astrometry_framedata, \
+                           solve_astrometry_batch, \
                            create_xyls
 from .manual_wcs import wcs_from_coords
 from .coords_utils import guess_coordinates
@@ -15,5 +16,6 @@ from .coords_utils import guess_coordinates
 __all__ = ['guess_coordinates', 'wcs_from_coords', 'AstrometrySolver',
            'AstrometricSolution', 'solve_astrometry_hdu',
            'solve_astrometry_xy', 'solve_astrometry_image',
-           'solve_astrometry_framedata', 'create_xyls',
+           'solve_astrometry_framedata', 'solve_astrometry_batch',
+           'create_xyls',
            'AstrometryNetUnsolvedField']
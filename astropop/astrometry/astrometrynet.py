@@ -6,11 +6,18 @@ improvements.
 """
 
 import os
+import atexit
+import mmap
+import glob
 import shutil
-from subprocess import CalledProcessError
+import functools
+from subprocess import CalledProcessError, TimeoutExpired
 import copy
-from tempfile import NamedTemporaryFile, mkdtemp
+from tempfile import NamedTemporaryFile, mkdtemp, mkstemp
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.util import Finalize
 import warnings
+from io import BytesIO
 
 import numpy as np
 
@@ -24,13 +31,40 @@ from ..framedata._compat import extract_header_wcs
 from ..logger import logger
 from ..py_utils import run_command, check_number
 
+# cfitsio based I/O is faster for the small tables and headers handled here
+try:
+    import fitsio
+except ImportError:
+    fitsio = None
+
 
 __all__ = ['AstrometrySolver', 'solve_astrometry_xy', 'solve_astrometry_image',
-           'solve_astrometry_framedata', 'create_xyls',
-           'AstrometryNetUnsolvedField']
+           'solve_astrometry_framedata', 'solve_astrometry_batch',
+           'create_xyls', 'AstrometryNetUnsolvedField']
+
+
+@functools.lru_cache(maxsize=1)
+def _which_solve_field():
+    """Look up ``solve-field`` in the system path, with cache."""
+    return shutil.which('solve-field')
+
+
+def _resolve_solve_field():
+    """Find the ``solve-field`` command in the system path.
+
+    Only found paths are cached, so a ``solve-field`` installed later in the
+    session is still found.
+    """
+    command = _which_solve_field()
+    if command is None:
+        _which_solve_field.cache_clear()
+    return command
 
 
-_solve_field = shutil.which('solve-field')
+# solve-field writes several small files per run. Keep them in RAM when
+# a tmpfs is available and has enough free space.
+_shm_dir = '/dev/shm'
+_shm_min_free = 256*1024*1024  # 256 MB
 
 _center_help = 'only search in indexes within `radius` of the field center ' \
                'given by `ra` and `dec`'
@@ -248,6 +282,7 @@ solve_field_params = {
         'To astrometry.cfg file. If no depths are given, use these.'
     )
 }
+_solve_field_keys = frozenset(solve_field_params)
 # These are the parameters that can be set in the astrometry.cfg file
 _conf_file = ['inparallel', 'minwidth', 'maxwidth', 'depths',
               'add_path', 'autoindex', 'index']
@@ -273,11 +308,75 @@ class AstrometryNetUnsolvedField(CalledProcessError):
         return f"{self.path}: could not solve field"
 
 
+def _default_tmpdir():
+    """Get the default directory to store the temporary solving files.
+
+    The ``ASTROPOP_ASTROMETRY_TMPDIR`` environment variable takes precedence.
+    If not set, ``/dev/shm`` is used when available and with enough free
+    space. Otherwise, `None` is returned, meaning the system default.
+    """
+    tmpdir = os.environ.get('ASTROPOP_ASTROMETRY_TMPDIR', None)
+    if tmpdir:
+        return tmpdir
+    if os.path.isdir(_shm_dir):
+        try:
+            if shutil.disk_usage(_shm_dir).free >= _shm_min_free:
+                return _shm_dir
+        except OSError:
+            pass
+    return None
+
+
+# plain numbers without unit are already angles in degrees
+_angle_number_types = frozenset([float, int, np.float64, np.float32,
+                                 np.int64, np.int32])
+
+
+_cleanup_executors = {}
+
+
+def _cleanup_executor():
+    """Return the thread pool that removes the temporary dirs."""
+    # threads are not copied by fork, so each process has its own pool
+    pid = os.getpid()
+    if pid not in _cleanup_executors:
+        _cleanup_executors[pid] = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix='astrometry-cleanup')
+    return _cleanup_executors[pid]
+
+
+def _wait_cleanup():
+    """Wait the pending removals of this process."""
+    executor = _cleanup_executors.pop(os.getpid(), None)
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+atexit.register(_wait_cleanup)
+
+
+def _remove_tree(path):
+    """Remove a directory tree in background."""
+    _cleanup_executor().submit(shutil.rmtree, path, ignore_errors=True)
+
+
+def _warm_file(fname):
+    """Ask the kernel to read a file into the page cache in background."""
+    with open(fname, 'rb') as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        elif hasattr(mmap, 'MADV_WILLNEED'):
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                m.madvise(mmap.MADV_WILLNEED)
+
+
 def _parse_angle(angle, unit=None):
     """Transform angle in float."""
     # plate scale
     # radius
     # bare ra and dec
+    if unit is None and type(angle) in _angle_number_types:
+        return float(angle)
     if isinstance(angle, str):
         try:
             angle = Angle(angle)
@@ -370,6 +469,44 @@ def _parse_crpix(options):
     return []
 
 
+def _parse_options_args(options):
+    """Parse the options dict to ``solve-field`` arguments list.
+
+    Parsed options are popped from the `options` dict.
+    """
+    args = []
+    args += _parse_coordinates(options)  # parse center
+    args += _parse_pltscl(options)  # parse plate scale
+    if 'radius' in options:  # parse radius
+        args += ['--radius',
+                 str(_parse_angle(options.pop('radius', None)))]
+    args += _parse_crpix(options)  # parse crpix
+
+    for key, value in options.items():
+        if value is False:
+            # disabled flag, like a default overrided by the user
+            continue
+        if value is None:
+            args.append(f'--{key}')
+        else:
+            if isinstance(value, (list, tuple)):
+                value = ",".join(value)
+            args += [f'--{key}', str(value)]
+
+    return args
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_options_args(items):
+    """Parse (key, type, value) items with `_parse_options_args`, cached.
+
+    Return the arguments tuple and the keys not popped by the parsing.
+    """
+    options = {k: v for k, _, v in items}
+    args = _parse_options_args(options)
+    return tuple(args), tuple(options)
+
+
 class AstrometricSolution():
     """Store astrometric solution.
 
@@ -380,6 +517,12 @@ class AstrometricSolution():
     correspondences: `~astropy.table.Table` (optional)
         A table containing the matched correspondences between the (x, y)
         positions and the matched (ra, dec) catalog coordinates.
+
+    Notes
+    -----
+    - The properties return the stored objects, not copies. Use
+      `~astropop.astrometry.AstrometricSolution.copy` to get an independent
+      solution before changing them in place.
     """
 
     _wcs = None
@@ -390,28 +533,33 @@ class AstrometricSolution():
         with warnings.catch_warnings():
             warnings.simplefilter('ignore')
             self._wcs = WCS(header, relax=True)
-            self._header = fits.Header(header)
-            if correspondences is not None:
+            if isinstance(header, fits.Header):
+                self._header = header
+            else:
+                self._header = fits.Header(header)
+            if isinstance(correspondences, Table):
+                self._corr = correspondences
+            elif correspondences is not None:
                 self._corr = Table(correspondences)
 
     @property
     def wcs(self):
         """World Coordinate System `~astropy.coordinates.WCS` solution."""
-        return copy.deepcopy(self._wcs)
+        return self._wcs
 
     @property
     def header(self):
         """`~astropy.io.fits.Header` containing the astrometric solution."""
-        return copy.deepcopy(self._header)
+        return self._header
 
     @property
     def correspondences(self):
         """Correspondece `~astropy.table.Table` between image stars and
         ``astrometry.net`` index objects.
 
-        This property is not so smart. It just returns a copy of the table
-        passed as input. If this is an ``astrometry.net`` correspondences
-        table, it will have the following columns:
+        This property is not so smart. It just returns the table passed as
+        input. If this is an ``astrometry.net`` correspondences table, it
+        will have the following columns:
 
         - field_x and field_y
             Image coordinates of each star in the solved image.
@@ -424,7 +572,15 @@ class AstrometricSolution():
             Physical RA and DEC of the matched star in the index file used to
             solve the image.
         """
-        return copy.deepcopy(self._corr)
+        return self._corr
+
+    def copy(self):
+        """Copy the current solution to a new instance."""
+        sol = AstrometricSolution.__new__(AstrometricSolution)
+        sol._wcs = copy.deepcopy(self._wcs)
+        sol._header = copy.deepcopy(self._header)
+        sol._corr = copy.deepcopy(self._corr)
+        return sol
 
 
 class AstrometrySolver():
@@ -445,11 +601,20 @@ class AstrometrySolver():
         will be read from the default ``astrometry.cfg`` file.
     defaults: `dict` (optional)
         Default arguments to be passed to ``solve-field`` program. If not set,
-        arguments ``no-plot`` and ``overwrite`` will be used. Use only double
-        dashed arguments, ignoring the dashed in the `dict` keys.
+        arguments ``no-plots``, ``overwrite``, ``no-remove-lines`` and
+        ``uniformize 0`` will be used, to speed up the solving. Use only
+        double dashed arguments, ignoring the dashed in the `dict` keys.
+        A `False` value disables a flag. For images with strong horizontal
+        or vertical artifacts, re-enable the lines removal with
+        ``{'no-remove-lines': False}``.
         See `~astropop.astrometry.astrometrynet.print_options_help`
     keep_files: bool (optional)
         Keep the temporary files after finish.
+    tmpdir: string (optional)
+        Directory where the temporary solving directories will be created.
+        If `None`, the ``ASTROPOP_ASTROMETRY_TMPDIR`` environment variable is
+        used. If it is not set, ``/dev/shm`` will be used when available, so
+        the small files created by ``solve-field`` stay in memory.
 
     Notes
     -----
@@ -474,17 +639,19 @@ class AstrometrySolver():
     """
 
     def __init__(self, solve_field=None, config=None, config_file=None,
-                 defaults=None, keep_files=False):
+                 defaults=None, keep_files=False, tmpdir=None):
         # declare the defaults here to be safer
-        self._defaults = {'no-plots': None, 'overwrite': None}
+        self._defaults = {'no-plots': None, 'overwrite': None,
+                          'no-remove-lines': None, 'uniformize': 0}
         if defaults is None:
             defaults = {}
         self._defaults.update(defaults)
 
         self.config = self._read_config(config_file, config)
 
-        self._command = solve_field or _solve_field
+        self._command = solve_field or _resolve_solve_field()
         self._keep = keep_files
+        self._tmpdir = tmpdir
 
     def solve_field(self, filename, options=None, output_dir=None, **kwargs):
         """Try to solve an image using the astrometry.net.
@@ -506,7 +673,8 @@ class AstrometrySolver():
             Directory to output all solved files.
         **kwargs :
             Additional keyword arguments to be passed to
-            `~astropop.py_utils.run_command`.
+            `~astropop.py_utils.run_command`. Use ``timeout`` to limit the
+            wall time of the run, in seconds.
 
         Returns
         -------
@@ -515,11 +683,7 @@ class AstrometrySolver():
             the `~astropy.wcs.WCS` solved class and the correspondence table
             between the sources and the catalog.
         """
-        if options is None:
-            options = {}
-
-        n_opt = copy.copy(self._defaults)
-        n_opt.update(options)
+        n_opt = {**self._defaults, **(options or {})}
 
         solved_header, coorespond = self._run_solver(filename,
                                                      options=n_opt,
@@ -529,6 +693,45 @@ class AstrometrySolver():
         return AstrometricSolution(header=solved_header,
                                    correspondences=coorespond)
 
+    def warm_indexes(self, config=None):
+        """Start reading the index files to the system page cache.
+
+        ``solve-field`` maps the index files in memory and, in a cold start,
+        most of the solving time is spent in disk reads. This method only
+        hints the kernel to read the files in background and returns
+        immediately, so the disk reading overlaps the next solves.
+
+        Parameters
+        ----------
+        config: dict (optional)
+            Config parameters updating the solver config, like ``add_path``
+            and ``index``.
+
+        Returns
+        -------
+        list of str
+            The index files found.
+        """
+        cfg = self._updated_config(config)
+        paths = cfg.get('add_path', [])
+        files = []
+        if cfg.get('autoindex', False):
+            for path in paths:
+                files += sorted(glob.glob(os.path.join(path, 'index-*.fits')))
+        for index in cfg.get('index', []):
+            # index can be a full path or a name inside the add_path dirs
+            for name in [index] + [os.path.join(p, index) for p in paths]:
+                for fname in (name, name + '.fits'):
+                    if os.path.isfile(fname) and fname not in files:
+                        files.append(fname)
+
+        for fname in files:
+            try:
+                _warm_file(fname)
+            except (OSError, ValueError) as e:
+                logger.debug('Could not warm index %s: %s', fname, e)
+        return files
+
     def print_options_help(self):
         """Print the available options for ``solve-field``."""
         print(get_options_help())
@@ -536,7 +739,8 @@ class AstrometrySolver():
     def _get_output_dir(self, root, output_dir):
         """Check output directory and create the temporary directory."""
         if output_dir is None:
-            output_dir = mkdtemp(prefix=root + '_', suffix='_astrometry.net')
+            output_dir = mkdtemp(prefix=root + '_', suffix='_astrometry.net',
+                                 dir=self._tmpdir or _default_tmpdir())
             tmp_dir = True
             os.makedirs(output_dir, exist_ok=True)
         else:
@@ -546,32 +750,26 @@ class AstrometrySolver():
     def _parse_options(self, options):
         """Parse and check all known options."""
         for key in options.keys():
-            if key not in solve_field_params:
+            if key not in _solve_field_keys:
                 raise KeyError(f'option {key} not supported.')
 
-        args = []
-        args += _parse_coordinates(options)  # parse center
-        args += _parse_pltscl(options)  # parse plate scale
-        if 'radius' in options:  # parse radius
-            args += ['--radius',
-                     str(_parse_angle(options.pop('radius', None)))]
-        args += _parse_crpix(options)  # parse crpix
-
-        for key, value in options.items():
-            if value is None:
-                args.append(f'--{key}')
-            else:
-                if isinstance(value, (list, tuple)):
-                    value = ",".join(value)
-                args += [f'--{key}', str(value)]
-
-        return args
+        # options sets with only hashable values are parsed once and cached.
+        # The items keep the dict order, so the arguments keep it too
+        items = tuple((k, type(v), v) for k, v in options.items())
+        try:
+            hash(items)
+        except TypeError:
+            return _parse_options_args(options)
+        args, kept = _cached_options_args(items)
+        for key in [k for k in options if k not in kept]:
+            options.pop(key)
+        return list(args)
 
     def _read_config(self, fname=None, config=None):
         """Read the default configuration file and return the config."""
 
         if fname is None:
-            prefix = os.path.dirname(os.path.dirname(_solve_field))
+            prefix = os.path.dirname(os.path.dirname(_resolve_solve_field()))
             fname = os.path.join(prefix, 'etc', 'astrometry.cfg')
         default = open(fname, 'r')
 
@@ -611,15 +809,19 @@ class AstrometrySolver():
         Config is updated using config parameter. All present parameters are
         overwritten.
         """
-        cfg = self.config.copy()
+        # copy the lists too, so self.config is never changed
+        cfg = {k: list(v) if isinstance(v, list) else v
+               for k, v in self.config.items()}
         if config is not None:
+            config = dict(config)
             # # indexes deactivate 'autoindex'
             # if 'index' in config:
             #     cfg['autoindex'] = False
             if 'add_path' in config:
-                cfg['add_path'].extend(np.atleast_1d(config.pop('add_path')))
+                add_path = np.atleast_1d(config.pop('add_path')).tolist()
+                cfg['add_path'] = cfg.get('add_path', []) + add_path
             cfg.update(config)
-        return config
+        return cfg
 
     def _write_config(self, fname, config=None):
         """Create the astrometry.cfg file for the run."""
@@ -668,6 +870,41 @@ class AstrometrySolver():
         args += ['--corr', correspond]
         return args
 
+    def _load_solution(self, filename, output_dir, root):
+        """Load the solved header and correspondences from `output_dir`.
+
+        Raises `AstrometryNetUnsolvedField` if the ``.solved`` file does not
+        flag a solved field.
+        """
+        # .solved file must exist and contain a binary one
+        solved_file = os.path.join(output_dir, root + '.solved')
+        with open(solved_file, 'rb') as fd:
+            if ord(fd.read()) != 1:
+                raise AstrometryNetUnsolvedField(filename)
+
+        solved_wcs_file = os.path.join(output_dir, root + '.wcs')
+        correspond = os.path.join(output_dir, root + '.corr')
+        logger.debug('Loading solved header from %s', solved_wcs_file)
+        if fitsio is not None:
+            hdr = fitsio.read_header(solved_wcs_file, 0)
+            solved_header = fits.Header.fromstring(
+                '\n'.join(r['card_string'] for r in hdr.records()),
+                sep='\n')
+            corr = Table(fitsio.read(correspond, ext=1))
+            return solved_header, corr
+
+        # only the first HDUs are needed, avoid parsing the others
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            with fits.open(solved_wcs_file, memmap=True,
+                           lazy_load_hdus=True) as hdul:
+                solved_header = hdul[0].header.copy()
+            with fits.open(correspond, memmap=True,
+                           lazy_load_hdus=True) as hdul:
+                # copy, so the file can be closed
+                corr = Table.read(hdul[1]).copy(copy_data=True)
+        return solved_header, corr
+
     def _run_solver(self, filename, options, output_dir=None, **kwargs):
         """Run the astrometry.net localy using the given params.
 
@@ -680,42 +917,34 @@ class AstrometrySolver():
         # Ensure the output directory exist
         os.makedirs(output_dir, exist_ok=True)
         correspond = os.path.join(output_dir, root + '.corr')
-        solved_file = os.path.join(output_dir, root + '.solved')
         args = self._get_args(root, filename, options, output_dir=output_dir,
                               correspond=correspond)
 
         try:
             process, _, _ = run_command(args, **kwargs)
-            # .solved file must exist and contain a binary one
-            with open(solved_file, 'rb') as fd:
-                if ord(fd.read()) != 1:
-                    raise AstrometryNetUnsolvedField(filename)
-            solved_wcs_file = os.path.join(output_dir, root + '.wcs')
-            logger.debug('Loading solved header from %s', solved_wcs_file)
-            with warnings.catch_warnings():
-                warnings.simplefilter('ignore')
-                solved_header = fits.getheader(solved_wcs_file, 0)
-                corr = Table.read(correspond)
+            solved_header, corr = self._load_solution(filename, output_dir,
+                                                      root)
 
             # remove the tree if the file is temporary and not set to keep
             if not self._keep and tmp_dir:
-                shutil.rmtree(output_dir)
+                _remove_tree(output_dir)
 
             return solved_header, corr
 
-        except CalledProcessError as e:
+        except (CalledProcessError, TimeoutExpired) as e:
             if not self._keep and tmp_dir:
-                shutil.rmtree(output_dir)
+                _remove_tree(output_dir)
             raise e
 
         # If .solved file doesn't exist or contain one
         except (IOError, AstrometryNetUnsolvedField):
             if not self._keep and tmp_dir:
-                shutil.rmtree(output_dir)
+                _remove_tree(output_dir)
             raise AstrometryNetUnsolvedField(filename)
 
 
-def create_xyls(fname, x, y, flux, imagew, imageh, header=None, dtype='f8'):
+def create_xyls(fname, x, y, flux, imagew, imageh, header=None, dtype='f4',
+                max_sources=None):
     """Create and save the xyls file to run in astrometry.net
 
     Parameters
@@ -733,18 +962,53 @@ def create_xyls(fname, x, y, flux, imagew, imageh, header=None, dtype='f8'):
     imageh: float or int
         Height of the original image. `IMAGEH` header field of .xyls
     dtype: `~numpy.dtype`, optional
-        Data type of the fields. Default: 'f8'
+        Data type of the fields. Single precision is enough for the sources
+        ordering and positions of images up to 10^5 pixels width, with
+        sub-pixel precision, and halves the file size. Use 'f8' if full
+        precision is needed. Default: 'f4'
+    max_sources: int, optional
+        Only save the ``max_sources`` brightest sources. Default: `None`,
+        save all the sources.
     """
     head = {'IMAGEW': imagew,
             'IMAGEH': imageh}
-    sort = np.argsort(flux)
-    xyls = np.array(list(zip(x, y, flux)),
+    flux = np.asarray(flux)
+    # brightest sources first. Sorting the negated flux gives a contiguous
+    # index array and keeps the input order of equal fluxes.
+    sort = np.argsort(-flux, kind='stable')
+    if max_sources is not None:
+        sort = sort[:max_sources]
+    xyls = np.empty(len(sort),
                     np.dtype([('x', dtype), ('y', dtype), ('flux', dtype)]))
-    f = fits.HDUList([fits.PrimaryHDU(header=header),
-                      fits.BinTableHDU(xyls[sort[::-1]],
-                                       header=fits.Header(head))])
+    xyls['x'] = np.asarray(x)[sort]
+    xyls['y'] = np.asarray(y)[sort]
+    xyls['flux'] = flux[sort]
+
     logger.debug('Saving .xyls to %s', fname)
-    f.writeto(fname, output_verify="ignore")
+    if fitsio is not None:
+        cards = []
+        if header is not None:
+            cards = [{'name': c.keyword, 'value': c.value,
+                      'comment': c.comment}
+                     for c in fits.Header(header).cards]
+        with fitsio.FITS(fname, 'rw', clobber=True) as f:
+            f.write(None, header=cards)
+            f.write(xyls, header=head)
+        return
+
+    # serialize in memory and write the file at once
+    buffer = BytesIO()
+    f = fits.HDUList([fits.PrimaryHDU(header=header),
+                      fits.BinTableHDU(xyls, header=fits.Header(head))])
+    f.writeto(buffer, output_verify="ignore")
+    with open(fname, 'wb') as fd:
+        fd.write(buffer.getbuffer())
+
+
+@functools.lru_cache(maxsize=4)
+def _default_solver(command=None):
+    """Solver shared by the helper functions, one per ``solve-field``."""
+    return AstrometrySolver(solve_field=command)
 
 
 def solve_astrometry_xy(x, y, flux, width, height,
@@ -791,12 +1055,16 @@ def solve_astrometry_xy(x, y, flux, width, height,
     else:
         image_header = fits.Header()
 
-    f = NamedTemporaryFile(suffix='.xyls')
-    create_xyls(f.name, x, y, flux, width, height,
-                header=image_header)
-    solver = AstrometrySolver(solve_field=command)
     options.update({'width': width, 'height': height})
-    return solver.solve_field(f.name, options=options, **kwargs)
+    # solve-field will only use the `objs` brightest sources
+    max_sources = options.get('objs')
+    if max_sources is not None:
+        max_sources = int(max_sources)
+    with NamedTemporaryFile(suffix='.xyls', dir=_default_tmpdir()) as f:
+        create_xyls(f.name, x, y, flux, width, height,
+                    header=image_header, max_sources=max_sources)
+        solver = _default_solver(command)
+        return solver.solve_field(f.name, options=options, **kwargs)
 
 
 def solve_astrometry_framedata(frame, options=None, command=None,
@@ -826,11 +1094,11 @@ def solve_astrometry_framedata(frame, options=None, command=None,
     f = NamedTemporaryFile(suffix='.fits')
     frame.write(f.name, no_fits_standard_units=True)
     options = options or {}
-    solver = AstrometrySolver(solve_field=command)
+    solver = _default_solver(command)
     return solver.solve_field(f.name, options=options, **kwargs)
 
 
-def solve_astrometry_image(filename, options=None, command=_solve_field,
+def solve_astrometry_image(filename, options=None, command=None,
                            **kwargs):
     """Solve astrometry from an image using astrometry.net.
 
@@ -855,7 +1123,7 @@ def solve_astrometry_image(filename, options=None, command=_solve_field,
         Astrometric solution ot the field.
     """
     options = options or {}
-    solver = AstrometrySolver(solve_field=command)
+    solver = _default_solver(command)
     return solver.solve_field(filename, options=options, **kwargs)
 
 
@@ -883,9 +1151,83 @@ def solve_astrometry_hdu(hdu, options=None, command=None, **kwargs):
         Astrometric solution ot the field.
     """
     options = options or {}
-    hdu.header, _ = extract_header_wcs(hdu.header)
-    f = NamedTemporaryFile(suffix='.fits')
-    hdu = fits.PrimaryHDU(hdu.data, header=hdu.header)
-    hdu.writeto(f.name)
-    solver = AstrometrySolver(solve_field=command)
-    return solver.solve_field(f.name, options=options, **kwargs)
+    header, _ = extract_header_wcs(hdu.header)
+    # serialize in memory and write the file at once
+    buffer = BytesIO()
+    fits.PrimaryHDU(hdu.data, header=header).writeto(buffer)
+    fd, fname = mkstemp(suffix='.fits', dir=_default_tmpdir())
+    try:
+        with open(fd, 'wb') as f:
+            f.write(buffer.getbuffer())
+        solver = _default_solver(command)
+        return solver.solve_field(fname, options=options, **kwargs)
+    finally:
+        os.unlink(fname)
+
+
+def _batch_initializer():
+    """Avoid threads oversubscription in the batch workers."""
+    os.environ['OMP_NUM_THREADS'] = '1'
+    # workers do not run atexit, finish the removals in their finalizers
+    Finalize(None, _wait_cleanup, exitpriority=10)
+
+
+def _batch_solve(item, options, command, kwargs):
+    """Solve a single item of `solve_astrometry_batch`."""
+    # options dict is changed by the solving functions
+    options = dict(options)
+    try:
+        if isinstance(item, str):
+            return solve_astrometry_image(item, options=options,
+                                          command=command, **kwargs)
+        x, y, flux, width, height = item
+        return solve_astrometry_xy(x, y, flux, width, height,
+                                   options=options, command=command,
+                                   **kwargs)
+    except AstrometryNetUnsolvedField:
+        logger.warning('Astrometry not solved for %s', item
+                       if isinstance(item, str) else 'sources list')
+        return None
+
+
+def solve_astrometry_batch(items, options=None, command=None, workers=None,
+                           **kwargs):
+    """Solve the astrometry of several fields in parallel processes.
+
+    ``astrometry.net`` solves each field in a single process. This function
+    runs one ``solve-field`` per worker process.
+
+    Parameters
+    ----------
+    items: list
+        List of the fields to solve. Each item can be the path to an image
+        or a ``(x, y, flux, width, height)`` tuple of a sources list.
+    options: dict
+        Dictionary of ``solve-field`` options, used for all the fields. See
+        `~astropop.astrometry.astrometrynet.print_options_help` for all
+        available options.
+    command: str
+        Full path of astrometry.net ``solve-field`` command.
+    workers: int (optional)
+        Number of parallel processes. If `None`, the number of CPUs is used.
+    **kwargs :
+        Additional keyword arguments to be passed to
+        `~astropop.py_utils.run_command`.
+
+    Returns
+    -------
+    list of `~astropop.astrometry.AstrometricSolution`
+        Astrometric solutions of the fields, in the same order of `items`.
+        Unsolved fields are `None`.
+    """
+    options = options or {}
+    items = list(items)
+    workers = workers or os.cpu_count()
+    # the page cache is shared by the workers, so warm the indexes only once
+    _default_solver(command).warm_indexes()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_batch_initializer) as executor:
+        futures = [executor.submit(_batch_solve, item, options, command,
+                                   kwargs)
+                   for item in items]
+        return [f.result() for f in futures]
@@ -2,6 +2,8 @@
 """Stack and combine astronomical images in FrameData."""
 
 import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import mkdtemp
 import numpy as np
 from astropy.stats import mad_std
@@ -12,6 +14,72 @@ from ..logger import logger
 from ._tools import merge_header
 
 
+# maximum axis size to be sorted by a sorting network
+_network_max_size = 5
+
+
+@functools.lru_cache(maxsize=None)
+def _network_pairs(n):
+    """Compare-exchange pairs of Batcher's odd-even merge sort of n items."""
+    pairs = []
+    p = 1
+    while p < n:
+        k = p
+        while k >= 1:
+            for j in range(k % p, n-k, 2*k):
+                for i in range(min(k, n-j-k)):
+                    if (i+j)//(2*p) == (i+j+k)//(2*p):
+                        pairs.append((i+j, i+j+k))
+            k //= 2
+        p *= 2
+    return tuple(pairs)
+
+
+def _network_sort(data, axis):
+    """Sort a short axis with elementwise min/max of the planes.
+
+    nans are replaced by infinity, so they are sorted to the end.
+    """
+    planes = [np.where(np.isnan(p), np.inf, p)
+              for p in np.moveaxis(data, axis, 0)]
+    for i, j in _network_pairs(len(planes)):
+        low = np.minimum(planes[i], planes[j])
+        np.maximum(planes[i], planes[j], out=planes[j])
+        planes[i] = low
+    return np.stack(planes, axis=axis)
+
+
+def _nanmedian(data, axis=None, overwrite_input=False):
+    """Compute the median ignoring nans.
+
+    `~numpy.nanmedian` uses `~numpy.ma.median` to reduce short axes, like
+    the images axis of a stack, which is much slower than sorting the data.
+    Stacks of few images are sorted with a sorting network.
+    """
+    data = np.asarray(data)
+    if axis is None:
+        data = data.ravel()
+        axis = 0
+    if data.shape[axis] == 0:
+        return np.nanmedian(data, axis=axis)
+
+    n = np.sum(~np.isnan(data), axis=axis, keepdims=True)
+    if data.ndim > 1 and data.shape[axis] <= _network_max_size:
+        data = _network_sort(data, axis)
+    elif overwrite_input:
+        data.sort(axis=axis)
+    else:
+        data = np.sort(data, axis=axis)
+    # nans are sorted to the end, so the median of the n valid values is
+    # in the first n elements.
+    last = data.shape[axis] - 1
+    low = np.take_along_axis(data, np.clip((n-1)//2, 0, last), axis=axis)
+    high = np.take_along_axis(data, np.clip(n//2, 0, last), axis=axis)
+    med = (low + high)/2
+    med[n == 0] = np.nan
+    return np.squeeze(med, axis=axis)[()]
+
+
 # bottleneck has faster median
 try:
     import bottleneck as bn
@@ -23,7 +91,7 @@ try:
     }
 except ImportError:
     _funcs = {
-        'median': np.nanmedian,
+        'median': _nanmedian,
         'mean': np.nanmean,
         'sum': np.nansum,
         'std': np.nanstd
@@ -33,7 +101,31 @@ except ImportError:
 __all__ = ['imcombine', 'ImCombiner']
 
 
-_funcs['mad_std'] = functools.partial(mad_std, ignore_nan=True)
+# float64 accumulators, used when the combiner works in lower precision
+_wide_funcs = {
+    'mean': functools.partial(np.nanmean, dtype=np.float64),
+    'sum': functools.partial(np.nansum, dtype=np.float64),
+    'std': functools.partial(np.nanstd, dtype=np.float64)
+}
+
+_funcs['mad_std'] = functools.partial(mad_std, func=_nanmedian,
+                                      ignore_nan=True)
+# 1/Phi^-1(3/4), converts median absolute deviation to standard deviation
+_mad_std_factor = 1.482602218505602
+
+
+def _sigma_thresholds(threshold):
+    """Normalize the sigma clipping threshold to (low, high) values."""
+    if check_number(threshold):
+        return threshold, threshold
+    if np.isscalar(threshold):
+        raise TypeError(f'Sigma clipping threshold {threshold} not'
+                        ' recognized.')
+    threshold = tuple(threshold)
+    if len(threshold) == 1:
+        return threshold[0], threshold[0]
+    slow, shigh = threshold
+    return slow, shigh
 
 
 def _sigma_clip(data, threshold=3, cen_func='median', dev_func='mad_std',
@@ -66,16 +158,12 @@ def _sigma_clip(data, threshold=3, cen_func='median', dev_func='mad_std',
     mask: `~numpy.ndarray`
         Array with the same shape of `data` containing the mask for elements.
     """
-    data = np.array(data)
+    data = np.asarray(data)
+    slow, shigh = _sigma_thresholds(threshold)
 
-    if check_number(threshold):
-        slow = threshold
-        shigh = threshold
-    elif not np.isscalar(threshold):
-        slow, shigh = threshold
-    else:
-        raise TypeError(f'Sigma clipping threshold {threshold} not'
-                        ' recognized.')
+    # mad_std would compute the same median again
+    reuse_median = isinstance(cen_func, str) and cen_func == 'median' and \
+        isinstance(dev_func, str) and dev_func == 'mad_std'
 
     if not callable(cen_func):
         cen_func = _funcs[cen_func]
@@ -83,14 +171,25 @@ def _sigma_clip(data, threshold=3, cen_func='median', dev_func='mad_std',
         dev_func = _funcs[dev_func]
 
     cen = cen_func(data, axis=axis)
-    dev = dev_func(data, axis=axis)
+    if axis is not None:
+        # thresholds must broadcast along the reduced axis
+        cen = np.expand_dims(cen, axis)
+
+    if reuse_median:
+        dev = _funcs['median'](np.abs(data - cen), axis=axis)
+        dev *= _mad_std_factor
+    else:
+        dev = dev_func(data, axis=axis)
+    if axis is not None:
+        dev = np.expand_dims(dev, axis)
 
     # also mask nans and infs
-    mask = ~np.isfinite(data)
+    mask = np.isfinite(data)
+    np.logical_not(mask, out=mask)
     if slow is not None:
-        mask |= data < cen-(slow*dev)
+        mask |= np.less(data, cen-slow*dev)
     if shigh is not None:
-        mask |= data > cen+(shigh*dev)
+        mask |= np.greater(data, cen+shigh*dev)
 
     logger.debug('Rejected %i pixels by sigmaclip method.',
                  np.sum(mask))
@@ -119,15 +218,29 @@ def _minmax_clip(data, min_clip=None, max_clip=None):
     mask: `~numpy.ndarray`
         Array with the same shape of `data` containing the mask for elements.
     """
-    data = np.array(data)
-    # masking nan and infinity
-    mask = ~np.isfinite(data)
-
-    if min_clip is not None:
-        mask[np.where(data < min_clip)] = True
-
-    if max_clip is not None:
-        mask[np.where(data > max_clip)] = True
+    data = np.asarray(data)
+    if data.dtype.kind == 'f':
+        # Limits are bounded to the finite range of the dtype. So, nan fails
+        # both comparisons and infinities are out of the limits, and the
+        # valid pixels are the ones inside the limits.
+        big = np.finfo(data.dtype).max
+        low = -big if min_clip is None else max(min_clip, -big)
+        high = big if max_clip is None else min(max_clip, big)
+        mask = np.greater_equal(data, low)
+        mask &= np.less_equal(data, high)
+        np.logical_not(mask, out=mask)
+    else:
+        if data.dtype.kind in 'biu':
+            # integers are always finite
+            mask = np.zeros(data.shape, dtype=bool)
+        else:
+            # masking nan and infinity
+            mask = np.isfinite(data)
+            np.logical_not(mask, out=mask)
+        if min_clip is not None:
+            mask |= np.less(data, min_clip)
+        if max_clip is not None:
+            mask |= np.greater(data, max_clip)
 
     logger.debug('Rejected %i pixels by minmax method.',
                  np.sum(mask))
@@ -135,6 +248,22 @@ def _minmax_clip(data, min_clip=None, max_clip=None):
     return mask
 
 
+def _prefetch(func, items, n=4):
+    """Yield `func` results for `items`, in order, computing ahead.
+
+    The next `n` items are computed in background threads, so the results
+    are never kept in memory for more than `n` items.
+    """
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        futures = deque()
+        for item in items:
+            futures.append(executor.submit(func, item))
+            if len(futures) > n:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
 def _yield_slices(shape, n_chunks):
     """Yield slices for a given shape and number of chunks."""
     if n_chunks == 1:
@@ -167,6 +296,8 @@ class ImCombiner:
     _max_memory = 1e8  # max memory to be used by the combiner
     _buffer = None  # Temporary buffer to store the image
     _unct_bf = None  # Temporary buffer to store the uncertainties
+    _buffer_store = None  # Memory reused by the image buffers
+    _unct_store = None  # Memory reused by the uncertainty buffers
     _disk_cache = False  # Enable disk caching for _images
     _images = None  # List containing the loaded images
     _methods = {'median', 'mean', 'sum'}
@@ -189,6 +320,8 @@ class ImCombiner:
           Default: 1e9 (1GB)
         dtype: `~numpy.dtype` (optional)
           Data type to be used during the operations and the final result.
+          `~numpy.float32` halves the memory used. In this case, means, sums
+          and standard deviations are still accumulated in float64.
           Defualt: `~numpy.float64`
         tmp_dir: `str` (optional)
           Directory to store temporary files used in the combining. If None,
@@ -253,7 +386,7 @@ class ImCombiner:
         if not np.isscalar(sigma_limits):
             if len(sigma_limits) not in (1, 2):
                 raise ValueError('Invalid sigma clipping thresholds'
-                                 r' {sigma_limits}')
+                                 f' {sigma_limits}')
 
         if not callable(center_func) and \
            center_func not in ('median', 'mean'):
@@ -331,9 +464,16 @@ class ImCombiner:
         self._header_strategy = strategy
         self._header_merge_keys = keys
 
-    def _clear(self):
-        """Clear buffer and images."""
+    def _clear(self, release=False):
+        """Clear buffer and images.
+
+        The memory of the buffers is kept for the next combine, unless
+        `release` is True.
+        """
         self._buffer = None
+        if release:
+            self._buffer_store = None
+            self._unct_store = None
         # ensure cleaning of tmp files and free memory
         for i in self._images:
             i.disable_memmap()
@@ -350,9 +490,10 @@ class ImCombiner:
         if len(image_list) == 0:
             raise ValueError('Image list is empty.')
 
-        for indx, i in enumerate(image_list):
-            # before combine, copy everything to FrameData
-            ic = check_framedata(i, copy=True)
+        # before combine, copy everything to FrameData. Reading files is I/O
+        # bound, so the next images are read while the current is processed.
+        read = functools.partial(check_framedata, copy=True)
+        for indx, ic in enumerate(_prefetch(read, image_list)):
             ic = ic.astype(self._dtype)
 
             # for optimization, only enable memmap when needed.
@@ -366,22 +507,30 @@ class ImCombiner:
         """Check the consistency between loaded images."""
         if len(self._images) == 0:
             raise ValueError('Combiner have no images.')
-        base_shape = None
-        base_unit = None
-        for i, v in enumerate(self._images):
-            # supose self._images only have FrameData beacuse it's protected
-            if i == 0:
-                base_shape = v.shape
-                base_unit = v.unit
-            elif v.shape != base_shape:
+        # supose self._images only have FrameData beacuse it's protected
+        base_shape = self._images[0].shape
+        base_unit = self._images[0].unit
+        for i, v in enumerate(self._images[1:], start=1):
+            if v.shape != base_shape:
                 raise ValueError(f"Image {i} has a shape incompatible with "
                                  "the others")
-            elif v.unit != base_unit:
+            # parsed units are singletons, identity skips the comparison
+            unit = v.unit
+            if unit is not base_unit and unit != base_unit:
                 raise ValueError(f"Image {i} has a unit incompatible with "
                                  "the others")
         self._shape = base_shape
         self._unit = base_unit
 
+    def _get_buffer(self, store, shape):
+        """Get a buffer view from a reusable memory store, growing it."""
+        size = int(np.prod(shape))
+        mem = getattr(self, store)
+        if mem is None or mem.size < size or mem.dtype != self._dtype:
+            mem = np.empty(size, dtype=self._dtype)
+            setattr(self, store, mem)
+        return mem[:size].reshape(shape)
+
     def _chunk_yielder(self, method):
         """Split the data in chuncks according to the method."""
         # sum needs uncertainties, others ignore it
@@ -414,10 +563,11 @@ class ImCombiner:
             buff_shp = (len(self._images),
                         slc_y.stop-slc_y.start,
                         slc_x.stop-slc_x.start)
-            buffer = np.full(buff_shp, fill_value=np.nan, dtype=self._dtype)
+            # the memory is reused by the next chunk. All the values are
+            # overwritten, so no need to fill them
+            buffer = self._get_buffer('_buffer_store', buff_shp)
             if unct:
-                unct_buffer = np.full(buff_shp, fill_value=np.nan,
-                                      dtype=self._dtype)
+                unct_buffer = self._get_buffer('_unct_store', buff_shp)
             else:
                 unct_buffer = None
 
@@ -431,7 +581,8 @@ class ImCombiner:
             yield buffer, unct_buffer, (slc_y, slc_x)
 
     def _apply_rejection(self):
-        mask = np.zeros(self._buffer[0].shape)
+        # all the rejections are accumulated in a single mask
+        mask = None
         if self._sigma_clip is not None:
             mask = _sigma_clip(self._buffer,
                                threshold=self._sigma_clip,
@@ -441,12 +592,28 @@ class ImCombiner:
 
         if self._minmax is not None:
             _min, _max = self._minmax
-            mask = np.logical_or(_minmax_clip(self._buffer, _min, _max),
-                                 mask)
-
-        mask = np.logical_or(np.isnan(self._buffer), mask)
+            if mask is None:
+                mask = _minmax_clip(self._buffer, _min, _max)
+            else:
+                # invalid values are already masked by sigma clipping
+                if _min is not None:
+                    mask |= np.less(self._buffer, _min)
+                if _max is not None:
+                    mask |= np.greater(self._buffer, _max)
+
+        if mask is None:
+            mask = np.isnan(self._buffer)
         self._buffer[mask] = np.nan
 
+    def _reduce(self, func, data):
+        """Reduce the data along the images axis with a named function.
+
+        Sums are accumulated in float64 if the combiner dtype is narrower.
+        """
+        if func in _wide_funcs and np.dtype(self._dtype).itemsize < 8:
+            return _wide_funcs[func](data, axis=0)
+        return _funcs[func](data, axis=0)
+
     def _combine(self, method, **kwargs):
         """Process the combine and compute the uncertainty."""
         # number of masked pixels for each position
@@ -457,18 +624,18 @@ class ImCombiner:
         n_no_mask = n - n_masked
 
         if method == 'sum':
-            data = _funcs['sum'](self._buffer, axis=0)
+            data = self._reduce('sum', self._buffer)
             if self._unct_bf is None:
                 logger.info('Data with no uncertainties. Using the std dev'
                             ' approximation to compute the sum uncertainty.')
                 # we consider, here, that the deviation in each pixel (x, y) is
                 # the error of each image in that position. So
                 # unct = stddev*sqrt(n)
-                unct = _funcs['std'](self._buffer, axis=0)*np.sqrt(n_no_mask)
+                unct = self._reduce('std', self._buffer)*np.sqrt(n_no_mask)
             else:
                 # direct propagate the errors in the sum
                 # unct = sqrt(sigma1^2 + ) for i in sigma2^2 + ...)
-                unct = _funcs['sum'](np.square(self._unct_bf), axis=0)
+                unct = self._reduce('sum', np.square(self._unct_bf))
                 unct = np.sqrt(unct)
 
             if kwargs.get('sum_normalize', True):
@@ -477,9 +644,9 @@ class ImCombiner:
                 unct *= norm
 
         elif method in ('median', 'mean'):
-            data = _funcs[method](self._buffer, axis=0)
+            data = self._reduce(method, self._buffer)
             # uncertainty = sigma/sqrt(n)
-            unct = _funcs['std'](self._buffer, axis=0)
+            unct = self._reduce('std', self._buffer)
             unct /= np.sqrt(n_no_mask)
 
         return data, unct
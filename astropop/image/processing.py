@@ -1,7 +1,6 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
 import os
-import numpy as np
 import astroscrappy
 
 from ..logger import logger
@@ -232,7 +231,7 @@ def flat_correct(image, master_flat, min_value=None, norm_value=None,
     if min_value is not None:
         logger.debug('Set lower flat value to %s', min_value)
         mask = master_flat.data < min_value
-        master_flat.data[np.where(mask)] = min_value
+        master_flat.data[mask] = min_value
 
     if norm_value is not None:
         logger.debug('Normalizing flat with %s value.', norm_value)
@@ -1,6 +1,7 @@
 """Function derivatives for error propagation."""
 
 import sys
+import math
 import numpy as np
 import copy
 
@@ -93,6 +94,45 @@ derivatives = {
 }
 
 
+def _get_derivative(func, nvars):
+    """Get the derivative(s) of a function with ``nvars`` variables."""
+    # looked up on every call, so changes to `derivatives` take effect
+    try:
+        deriv = derivatives[func]
+    except KeyError:
+        raise ValueError(f'func {func} not in derivatives.') from None
+    n = len(deriv) if isinstance(deriv, (tuple, list)) else 1
+    if n != nvars:
+        raise ValueError(f'func {func} is not a {nvars} variable function.')
+    return deriv
+
+
+def _square(a, overwrite_input=False):
+    """Square a value, in place if allowed and possible."""
+    if overwrite_input and isinstance(a, np.ndarray) and a.dtype.kind == 'f':
+        return np.square(a, out=a)
+    return np.square(a)
+
+
+def _quadrature(a, b, overwrite_input=False):
+    """Compute ``sqrt(a**2 + b**2)`` reusing the squared buffer in place.
+
+    If ``overwrite_input`` is `True`, float array inputs are temporaries
+    of the caller and are used as work buffers, avoiding new allocations.
+    """
+    if isinstance(a, float) and isinstance(b, float):
+        # scalars don't need numpy at all
+        return math.sqrt(a*a + b*b)
+    a2 = _square(a, overwrite_input)
+    b2 = _square(b, overwrite_input)
+    if isinstance(a2, np.ndarray) and a2.dtype.kind == 'f' and \
+       a2.dtype == np.result_type(a2, b2) and \
+       a2.shape == np.broadcast(a2, b2).shape:
+        np.add(a2, b2, out=a2)
+        return np.sqrt(a2, out=a2)
+    return np.sqrt(a2 + b2)
+
+
 def propagate_1(func, fx, x, sx):
     """Propagate errors using function derivatives.
 
@@ -113,14 +153,9 @@ def propagate_1(func, fx, x, sx):
     sf: float or array_like
         1-sigma uncorrelated error associated to the operation.
     """
-    if func not in derivatives.keys():
-        raise ValueError(f'func {func} not in derivatives.')
-
-    if np.size(derivatives[func]) != 1:
-        raise ValueError(f'func {func} is not a 1 variable function.')
-
+    deriv_x = _get_derivative(func, 1)
     try:
-        deriv = derivatives[func](x)
+        deriv = deriv_x(x)
         sf = deriv*sx
         return sf
     except (ValueError, ZeroDivisionError, OverflowError):
@@ -151,13 +186,7 @@ def propagate_2(func, fxy, x, y, sx, sy):
     sf: float or array_like
         1-sigma uncorrelated error associated to the operation.
     """
-    if func not in derivatives.keys():
-        raise ValueError(f'func {func} not in derivatives.')
-
-    if np.size(derivatives[func]) != 2:
-        raise ValueError(f'func {func} is not a 2 variable function.')
-
-    deriv_x, deriv_y = derivatives[func]
+    deriv_x, deriv_y = _get_derivative(func, 2)
     try:
         del_x2 = np.square(deriv_x(x, y))
         del_y2 = np.square(deriv_y(x, y))
@@ -7,14 +7,14 @@ Simplified version of `uncertainties` python package with some
 """
 
 import numbers
-from functools import partial
+from functools import partial, lru_cache, wraps
 from astropy import units
 from astropy.units.quantity_helper.helpers import get_converters_and_unit
-from astropy.units import UnitsError, Quantity
+from astropy.units import UnitsError, UnitConversionError, Quantity
 import numpy as np
 
 from .._unit_property import unit_property
-from ._deriv import propagate_2, propagate_1
+from ._deriv import propagate_2, propagate_1, _quadrature
 
 
 __all__ = ['unit_property', 'QFloat', 'qfloat', 'units', 'UnitsError',
@@ -41,6 +41,21 @@ def _implements_ufunc(numpy_ufunc):
     return decorator_ufunc
 
 
+_fast_number_types = (float, int, np.floating, np.integer)
+
+
+def _is_real_numeric(value):
+    """Check if value is a real number or a non-empty real numeric array.
+
+    Values passing this check don't need the slower validation of generic
+    inputs, like lists or object arrays.
+    """
+    if isinstance(value, _fast_number_types):
+        return True
+    return isinstance(value, np.ndarray) and value.dtype.kind in 'biuf' \
+        and value.size > 0
+
+
 def convert_to_qfloat(value):
     """Convert a value to QFloat.
 
@@ -53,9 +68,14 @@ def convert_to_qfloat(value):
         * Numpy simple arrays.
     """
     # Not change if value is already a qfloat
-    if isinstance(value, QFloat):
+    if value.__class__ is QFloat or isinstance(value, QFloat):
         return value
 
+    # plain numbers are the most common operands. Concrete types are much
+    # faster to check than the `numbers.Number` ABC.
+    if isinstance(value, _fast_number_types):
+        return QFloat(value)
+
     # extract unit (force)
     unit = getattr(value, 'unit', None)
 
@@ -88,6 +108,7 @@ def convert_to_qfloat(value):
 
 def require_qfloat(func):
     """Require qfloat as argument decorator."""
+    @wraps(func)
     def decorator(self, *others):
         others = [convert_to_qfloat(i) for i in others]
         return func(self, *others)
@@ -96,7 +117,9 @@ def require_qfloat(func):
 
 def _get_round_digit(std, sig):
     """Get the number of digits to round the error."""
-    return -np.int_(np.floor(np.log10(np.abs(std)))) + sig - 1
+    # zero, inf and nan errors raise in int() and are handled by the caller
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return -int(np.floor(np.log10(np.abs(std)))) + sig - 1
 
 
 def _round_to_error(nom, std, sdig):
@@ -126,49 +149,92 @@ def _format_qfloat(nominal, std_dev, sig_digits, pm_sign='+-'):
     return f"{nom}{pm_sign}{std}"
 
 
-class _FormaterElement:
-    """Class to format a QFloat array."""
+def _format_qfloat_array(nominal, std_dev, sig_digits):
+    """Format a qfloat array, like numpy does for plain arrays."""
+    # A flat index array is passed to numpy, so only the elements that
+    # are really printed (after the summarization) are formatted.
+    index = np.arange(np.size(nominal)).reshape(np.shape(nominal))
+    nominal = np.ravel(nominal)
+    std_dev = np.ravel(std_dev)
 
-    __slots__ = ('_value', '_std', '_sig_digits')
+    def formatter(i):
+        return _format_qfloat(nominal[i], std_dev[i], sig_digits)
 
-    def __init__(self, value, std, sig_digits):
-        self._value = value
-        self._std = std
-        self._sig_digits = sig_digits
+    opt = np.get_printoptions()
+    return np.array2string(index, separator=', ',
+                           max_line_width=opt['linewidth'],
+                           edgeitems=opt['edgeitems'],
+                           threshold=50,
+                           formatter={'int': formatter})
 
-    def __repr__(self):
-        return _format_qfloat(self._value, self._std, self._sig_digits)
 
+class _NamedFunc:
+    """Stand-in carrying only the function name used in astropy errors."""
 
-def _create_formater_array(n, s, digits):
-    """Create an array of _FormaterElements."""
-    if np.isscalar(n):
-        return _FormaterElement(n, s, digits)
-    else:
-        return [_create_formater_array(ni, si, digits) for ni, si in zip(n, s)]
+    __slots__ = ('__name__',)
 
+    def __init__(self, name):
+        self.__name__ = name
 
-def same_unit(qfloat1, qfloat2, func=None):
-    """Put 2 qfloats in the same unit."""
-    # both units must be the same
-    def convert(converter, qf, unit):
-        if converter is None:
-            return qf
-        nom = converter(qf.nominal)
-        std = converter(qf.uncertainty)
-        return QFloat(nom, std, unit)
 
-    qfloat1, qfloat2 = [convert_to_qfloat(i) for i in (qfloat1, qfloat2)]
+@lru_cache(maxsize=1024)
+def _cached_converters(func_name, unit1, unit2):
+    """Cache `get_converters_and_unit` results for a pair of units."""
+    converters, unit = get_converters_and_unit(_NamedFunc(func_name),
+                                               unit1, unit2)
+    return tuple(converters), unit
+
+
+def _convert_with(converter, qf, unit):
+    """Apply an astropy converter to a QFloat."""
+    if converter is None:
+        return qf
+    nom = converter(qf.nominal)
+    std = converter(qf.uncertainty)
+    return QFloat(nom, std, unit)
 
-    # The error raising require a funcion name
-    converters, unit = get_converters_and_unit(func, qfloat1.unit,
-                                               qfloat2.unit)
-    qfloat1 = convert(converters[0], qfloat1, unit)
-    qfloat2 = convert(converters[1], qfloat2, unit)
+
+def _same_unit(qfloat1, qfloat2, func=None):
+    """Put 2 qfloats in the same unit. Both must already be QFloats."""
+    # identical units, or both dimensionless, need no conversion at all
+    if qfloat1._unit is qfloat2._unit:
+        return qfloat1, qfloat2
+
+    # The error raising require a funcion name. Equal, but not identical,
+    # units are resolved once by the cache to `None` converters.
+    name = getattr(func, '__name__', str(func))
+    converters, unit = _cached_converters(name, qfloat1.unit, qfloat2.unit)
+    qfloat1 = _convert_with(converters[0], qfloat1, unit)
+    qfloat2 = _convert_with(converters[1], qfloat2, unit)
 
     return qfloat1, qfloat2
 
 
+def _align_nominal(qfloat1, qfloat2, func=None):
+    """Nominal values of 2 qfloats in the same unit, without uncertainties.
+
+    Returns ``(nominal1, nominal2, unit)``. Intended for comparisons, that
+    don't need the converted QFloats.
+    """
+    if qfloat1._unit is qfloat2._unit:
+        return qfloat1._nominal, qfloat2._nominal, qfloat1.unit
+
+    name = getattr(func, '__name__', str(func))
+    converters, unit = _cached_converters(name, qfloat1.unit, qfloat2.unit)
+    nom1, nom2 = qfloat1._nominal, qfloat2._nominal
+    if converters[0] is not None:
+        nom1 = converters[0](nom1)
+    if converters[1] is not None:
+        nom2 = converters[1](nom2)
+    return nom1, nom2, unit
+
+
+def same_unit(qfloat1, qfloat2, func=None):
+    """Put 2 qfloats in the same unit."""
+    qfloat1, qfloat2 = [convert_to_qfloat(i) for i in (qfloat1, qfloat2)]
+    return _same_unit(qfloat1, qfloat2, func)
+
+
 def equal_within_errors(qf1, qf2):
     """Check if two QFloats are equal within errors.
 
@@ -179,10 +245,11 @@ def equal_within_errors(qf1, qf2):
 
     Returns
     -------
-    bool:
+    bool or `~numpy.ndarray` of bool:
         `True` if the numbers are equal within the uncertainties,
         (the difference is smaller then the sum of errors). `False`
-        if they are different.
+        if they are different. For arrays, the comparison is done
+        element-wise and a boolean array is returned.
 
     Notes
     -----
@@ -192,7 +259,7 @@ def equal_within_errors(qf1, qf2):
     """
     qf1, qf2 = [convert_to_qfloat(i) for i in (qf1, qf2)]
     try:
-        qf1, qf2 = same_unit(qf1, qf2, equal_within_errors)
+        qf1, qf2 = _same_unit(qf1, qf2, equal_within_errors)
     except UnitsError:
         # Incompatible units are different numbers.
         return False
@@ -225,6 +292,33 @@ def qfloat(value, uncertainty=None, unit=None):
     return f
 
 
+def _write_out(result, out):
+    """Copy an already computed ufunc result to a pre-allocated output.
+
+    The result is computed fully before, so this costs one extra copy. It
+    gives ``out=`` support, keeping the output buffers, not a speed-up.
+    """
+    if not isinstance(result, QFloat):
+        # functions on nominal values only return plain arrays
+        np.copyto(out, result)
+        return out
+
+    if not isinstance(out, QFloat):
+        raise TypeError('QFloat results can only be written to a QFloat.')
+
+    if out.shape != result.shape:
+        raise ValueError(f'Output with shape {out.shape} do not match the '
+                         f'result shape {result.shape}.')
+
+    if out._is_array and out._uncert.dtype.kind == 'f':
+        np.copyto(out._nominal, result.nominal)
+        np.copyto(out._uncert, result.uncertainty)
+        out.unit = result.unit
+    else:
+        out.reset(result.nominal, result.uncertainty, result.unit)
+    return out
+
+
 @unit_property
 class QFloat():
     """Storing float values with stddev uncertainties and units.
@@ -251,10 +345,12 @@ class QFloat():
     _uncert = None
     _unit = None
     _sig_digits = 1
+    _is_array = False
 
     def __init__(self, value, uncertainty=None, unit=None):
         value, uncertainty, unit = self._check_inputs(value, uncertainty, unit)
         self._nominal = value
+        self._is_array = isinstance(value, np.ndarray)
         self._set_uncert(uncertainty)
         self.unit = unit
 
@@ -269,10 +365,11 @@ class QFloat():
             if unit is not None:
                 raise ValueError('unit must be None if value is a QFloat.')
             unit = qf.unit
-        if np.any(np.array(value) == None):  # noqa: E711
-            raise TypeError('value must be not None.')
+        if not _is_real_numeric(value):
+            if np.any(np.array(value) == None):  # noqa: E711
+                raise TypeError('value must be not None.')
         for i in value, uncertainty:
-            if not np.any(np.isreal(i)):
+            if not _is_real_numeric(i) and not np.any(np.isreal(i)):
                 raise TypeError('value and uncertainty must be real numbers, '
                                 'or arrays of real numbers.')
         if not np.isscalar(value):
@@ -283,23 +380,25 @@ class QFloat():
 
     def _set_uncert(self, value):
         if value is None:
-            if not np.isscalar(self._nominal):
+            if self._is_array:
                 self._uncert = np.zeros_like(self._nominal)
             else:
                 self._uncert = 0.0
         else:
-            if not np.any(np.isreal(value)):
+            if not _is_real_numeric(value) and not np.any(np.isreal(value)):
                 raise TypeError('uncertainty must be real numbers')
-            if np.shape(value) != np.shape(self._nominal):
+            if np.shape(value) != self.shape:
                 raise ValueError('Uncertainty with shape different from '
                                  'nominal value: '
                                  f'{np.shape(value)} '
-                                 f'{np.shape(self._nominal)}')
-            if not np.isscalar(self._nominal):
-                # Errors must be always positive
+                                 f'{self.shape}')
+            if self._is_array:
+                # Errors must be always positive. A single copy is done,
+                # and the absolute value is computed in place.
                 value = np.array(value)
-                value[value == None] = 0.0  # noqa: E711
-                self._uncert = np.abs(np.array(value))
+                if value.dtype.kind == 'O':
+                    value[value == None] = 0.0  # noqa: E711
+                self._uncert = np.abs(value, out=value)
             else:
                 self._uncert = float(abs(value))
 
@@ -313,6 +412,7 @@ class QFloat():
                 value, uncertainty, unit = value
         value, uncertainty, unit = self._check_inputs(value, uncertainty, unit)
         self._nominal = value
+        self._is_array = isinstance(value, np.ndarray)
         self._set_uncert(uncertainty)
         if unit is not None:
             self.unit = unit
@@ -347,12 +447,16 @@ class QFloat():
     @property
     def shape(self):
         """Shape of the quantity."""
-        return np.shape(self.nominal)
+        if self._is_array:
+            return self._nominal.shape
+        return ()
 
     @property
     def size(self):
         """Number of elements in the quantity."""
-        return np.size(self.nominal)
+        if self._is_array:
+            return self._nominal.size
+        return 1
 
     @property
     def sig_digits(self):
@@ -396,13 +500,19 @@ class QFloat():
             A new instance of this class, converted to the new unit.
         """
         other = units.Unit(unit, parse_strict='silent')
-        (_, conv), unit = get_converters_and_unit(self.to, other, self.unit)
-        if conv is not None:
-            nvalue = conv(self.nominal)
-            nstd = conv(self.uncertainty)
-            return QFloat(nvalue, nstd, unit)
-        # None converter means no conversion
-        return QFloat(self.nominal, self.uncertainty, self.unit)
+        if other is self.unit:
+            # same unit means no conversion
+            return QFloat(self.nominal, self.uncertainty, self.unit)
+        try:
+            # a single scale factor, applied once to each array
+            scale = self.unit.to(other)
+        except UnitsError as e:
+            raise UnitConversionError("Can only apply 'to' function to "
+                                      "quantities with compatible "
+                                      "dimensions") from e
+        if scale == 1.0:
+            return QFloat(self.nominal, self.uncertainty, other)
+        return QFloat(self.nominal*scale, self.uncertainty*scale, other)
 
     @property
     def value(self):
@@ -414,18 +524,13 @@ class QFloat():
         return f'<QFloat at {i}>\n{self.__str__()}'
 
     def __str__(self):
-        if np.isscalar(self.nominal):
+        if not self._is_array:
             s = _format_qfloat(self.nominal, self.uncertainty, self.sig_digits)
         else:
-            opt = np.get_printoptions()
-            a = _create_formater_array(self.nominal, self.uncertainty,
-                                       self.sig_digits)
-            s = np.array2string(np.array(a), separator=', ',
-                                max_line_width=opt['linewidth'],
-                                edgeitems=opt['edgeitems'],
-                                threshold=50)
+            s = _format_qfloat_array(self.nominal, self.uncertainty,
+                                     self.sig_digits)
         if self.unit != units.dimensionless_unscaled:
-            if not np.isscalar(self.nominal):
+            if self._is_array:
                 s += ' unit='
             else:
                 s += ' '
@@ -441,7 +546,7 @@ class QFloat():
     def __setitem__(self, index, value):
         """Set one item at given index if this is iterable."""
         value = convert_to_qfloat(value)
-        _, value = same_unit(self, value, self.__setitem__)
+        _, value = _same_unit(self, value, self.__setitem__)
 
         self._nominal[index] = value.nominal
         self._uncert[index] = value.uncertainty
@@ -449,6 +554,37 @@ class QFloat():
     def __len__(self):
         return len(self.nominal)
 
+    def __array__(self, dtype=None, copy=None):
+        """Nominal values as `~numpy.ndarray`, without copy if possible.
+
+        Uncertainties and units are dropped. Used by `~numpy.asarray` and
+        by plotting and fitting libraries that only need the values. When
+        no copy is done, the returned array is a read-only view, so the
+        QFloat can't be changed through it.
+
+        Notes
+        -----
+        Sequences of QFloats are converted too: ``np.array([qf1, qf2])``
+        is a float array of the nominal values, not an object array of
+        QFloats. Use `~astropop.math.physical.qfloat` or `numpy.stack` to
+        keep uncertainties and units.
+
+        `~astropy.units.Quantity` reads the values with this method, so
+        ``Quantity(qf)`` silently drops the uncertainties and keeps only
+        the nominal values with the unit. Before, it raised `TypeError`.
+        """
+        if copy:
+            return np.array(self._nominal, dtype=dtype, copy=True)
+        arr = np.asarray(self._nominal, dtype=dtype)
+        if not np.shares_memory(arr, self._nominal):
+            if copy is False:
+                raise ValueError('Unable to avoid copy while creating an '
+                                 'array as requested.')
+            return arr
+        arr = arr.view()
+        arr.flags.writeable = False
+        return arr
+
     def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
         """Wrap numpy ufuncs, using uncertainties and units.
 
@@ -471,24 +607,39 @@ class QFloat():
         -------
         result : `~astropop.math.QFloat`
             Results of the ufunc, with the unit and uncertainty.
+
+        Notes
+        -----
+        - ``out`` QFloat arrays have their buffers overwritten with the
+          result, and their unit set to the result unit. The result is
+          computed first and then copied, so ``out`` is not faster than
+          the plain call.
         """
         # Only call supported now
         if method != '__call__':
             return NotImplemented
 
-        if ufunc not in HANDLED_UFUNCS:
+        func = HANDLED_UFUNCS.get(ufunc, None)
+        if func is None:
             return NotImplemented
 
+        out = kwargs.pop('out', None)
+        if out is not None:
+            for o in out:
+                if not isinstance(o, (QFloat, np.ndarray)):
+                    raise NotImplementedError("`out` argument must be QFloat"
+                                              " or numpy arrays.")
+
         # put all inputs as QFloats, a local "require_qfloat"
         inputs = [convert_to_qfloat(i) for i in inputs]
 
-        out = kwargs.get('out', None)
-        if out is not None:
-            raise NotImplementedError("`out` argument not supported yet.")
-
-        result = HANDLED_UFUNCS[ufunc](*inputs, **kwargs)
+        result = func(*inputs, **kwargs)
+        if out is None:
+            return result
 
-        return result
+        if len(out) == 1:
+            return _write_out(result, out[0])
+        return tuple(_write_out(r, o) for r, o in zip(result, out))
 
     def __array_function__(self, func, types, args, kwargs):
         """Wrap numpy functions.
@@ -518,33 +669,39 @@ class QFloat():
             # Incompatible types are different
             return False
 
-        if np.any(this.nominal != other.nominal) or \
-           np.any(this.uncertainty != other.uncertainty):
-            return False
-        return True
+        if this.shape != other.shape:
+            # numbers are broadcasted, like in numpy comparisons
+            try:
+                np.broadcast_shapes(this.shape, other.shape)
+            except ValueError:
+                return False
+            return bool(np.all(this.nominal == other.nominal) and
+                        np.all(this.uncertainty == other.uncertainty))
+        return bool(np.array_equal(this.nominal, other.nominal) and
+                    np.array_equal(this.uncertainty, other.uncertainty))
 
     def __ne__(self, other):
         return not self == other
 
     @require_qfloat
     def __gt__(self, other):
-        this, other = same_unit(self, other, self.__gt__)
-        return this.nominal > other.nominal
+        this, other, _ = _align_nominal(self, other, self.__gt__)
+        return this > other
 
     @require_qfloat
     def __ge__(self, other):
-        this, other = same_unit(self, other, self.__lt__)
-        return this.nominal >= other.nominal
+        this, other, _ = _align_nominal(self, other, self.__ge__)
+        return this >= other
 
     @require_qfloat
     def __lt__(self, other):
-        this, other = same_unit(self, other, self.__lt__)
-        return this.nominal < other.nominal
+        this, other, _ = _align_nominal(self, other, self.__lt__)
+        return this < other
 
     @require_qfloat
     def __le__(self, other):
-        this, other = same_unit(self, other, self.__lt__)
-        return this.nominal <= other.nominal
+        this, other, _ = _align_nominal(self, other, self.__le__)
+        return this <= other
 
     def __lshift__(self, other):
         """Lshift operator used to convert units."""
@@ -557,11 +714,10 @@ class QFloat():
 
     @require_qfloat
     def __add__(self, other):
-        qf1, qf2 = same_unit(self, other, self.__add__)
+        qf1, qf2 = _same_unit(self, other, self.__add__)
         sum_n = qf1.nominal + qf2.nominal
-        sum_s = propagate_2('add', sum_n,
-                            qf1.nominal, qf2.nominal,
-                            qf1.std_dev, qf2.std_dev)
+        # analytical propagation, no derivative dispatch for the basic ops
+        sum_s = _quadrature(qf1.std_dev, qf2.std_dev)
         return QFloat(sum_n, sum_s, qf1.unit)
 
     @require_qfloat
@@ -576,11 +732,9 @@ class QFloat():
 
     @require_qfloat
     def __sub__(self, other):
-        qf1, qf2 = same_unit(self, other, self.__add__)
+        qf1, qf2 = _same_unit(self, other, self.__add__)
         sub_n = qf1.nominal - qf2.nominal
-        sub_s = propagate_2('add', sub_n,
-                            qf1.nominal, qf2.nominal,
-                            qf1.std_dev, qf2.std_dev)
+        sub_s = _quadrature(qf1.std_dev, qf2.std_dev)
         return QFloat(sub_n, sub_s, qf1.unit)
 
     @require_qfloat
@@ -595,12 +749,19 @@ class QFloat():
 
     @require_qfloat
     def __mul__(self, other):
-        unit = self.unit * other.unit
+        # multiplying astropy units is slow, skip it for dimensionless
+        if other._unit is None:
+            unit = self.unit
+        elif self._unit is None:
+            unit = other.unit
+        else:
+            unit = self.unit * other.unit
         qf1, qf2 = self, other
         mul_n = qf1.nominal * qf2.nominal
-        mul_s = propagate_2('mul', mul_n,
-                            qf1.nominal, qf2.nominal,
-                            qf1.std_dev, qf2.std_dev)
+        # products are temporaries, so they can be squared in place
+        mul_s = _quadrature(qf2.nominal*qf1.std_dev,
+                            qf1.nominal*qf2.std_dev,
+                            overwrite_input=True)
         return QFloat(mul_n, mul_s, unit)
 
     @require_qfloat
@@ -615,12 +776,16 @@ class QFloat():
 
     @require_qfloat
     def __truediv__(self, other):
-        unit = self.unit / other.unit
+        if other._unit is None:
+            unit = self.unit
+        else:
+            unit = self.unit / other.unit
         qf1, qf2 = self, other
         div_n = qf1.nominal / qf2.nominal
-        div_s = propagate_2('truediv', div_n,
-                            qf1.nominal, qf2.nominal,
-                            qf1.std_dev, qf2.std_dev)
+        # sqrt((sx/y)**2 + (x*sy/y**2)**2), with x/y already computed
+        div_s = _quadrature(qf1.std_dev/qf2.nominal,
+                            div_n*qf2.std_dev/qf2.nominal,
+                            overwrite_input=True)
         return QFloat(div_n, div_s, unit)
 
     @require_qfloat
@@ -679,7 +844,7 @@ class QFloat():
         # to an array due to inconsistencies in unit. Each element could
         # have it's own unit.
         if other.unit != units.dimensionless_unscaled or \
-           not np.isscalar(other.nominal):
+           other._is_array:
             raise ValueError('Power operation size-1 require dimensionless'
                              ' expoent')
         qf1, qf2 = self, other
@@ -725,7 +890,7 @@ class QFloat():
 #             - copyto, broadcast, broadcast_to
 #             - sum, prod, nanprod, nansum, cumprod, cumsum, nancumprod,
 #             - nancumsum, diff, ediff1d, cross
-#             - concatenate, stack, block, vstack, hstack, dstack, columnstack
+#             - block
 
 @_implements_array_func(np.shape)
 def _qfloat_shape(qf):
@@ -745,8 +910,29 @@ def _qfloat_clip(qf, a_min, a_max, **kwargs):
     return QFloat(nominal, qf.std_dev, qf.unit)
 
 
+def _qfloat_from_arrays(nominal, std, unit):
+    """Create a QFloat that takes ownership of new, already valid, arrays.
+
+    Notes
+    -----
+    - The arrays are used as they are, without the input checks and copies
+      done by `QFloat.__init__`. Only use it with arrays created for the
+      new QFloat, never with views or user arrays.
+    """
+    if not isinstance(nominal, np.ndarray) or \
+       not isinstance(std, np.ndarray) or nominal.size == 0:
+        # scalars and empty arrays go through the full checks
+        return QFloat(nominal, std, unit)
+    qf = QFloat.__new__(QFloat)
+    qf._nominal = nominal
+    qf._is_array = True
+    qf._uncert = std
+    qf.unit = unit
+    return qf
+
+
 # Use a simple wrapper for general functions
-def _array_func_simple_wrapper(numpy_func):
+def _array_func_simple_wrapper(numpy_func, copies=False):
     """Wraps simple array functions.
 
     Notes
@@ -755,32 +941,67 @@ def _array_func_simple_wrapper(numpy_func):
       std_dev values and return a new QFloat with the applied values.
     - No conversion or special treatment is done in this wrapper.
     - Only for one array ate once.
+    - If ``copies`` is `True`, ``numpy_func`` always return new arrays,
+      that are used by the QFloat without being copied again.
     """
     def wrapper(qf, *args, **kwargs):
         nominal = numpy_func(qf.nominal, *args, **kwargs)
         std = numpy_func(qf.uncertainty, *args, **kwargs)
+        if copies:
+            return _qfloat_from_arrays(nominal, std, qf.unit)
         return QFloat(nominal, std, qf.unit)
     _implements_array_func(numpy_func)(wrapper)
 
 
-_array_func_simple_wrapper(np.delete)
+# functions that return views of the input
 _array_func_simple_wrapper(np.expand_dims)
 _array_func_simple_wrapper(np.flip)
 _array_func_simple_wrapper(np.fliplr)
 _array_func_simple_wrapper(np.flipud)
 _array_func_simple_wrapper(np.moveaxis)
 _array_func_simple_wrapper(np.ravel)
-_array_func_simple_wrapper(np.repeat)
 _array_func_simple_wrapper(np.reshape)
-_array_func_simple_wrapper(np.resize)
-_array_func_simple_wrapper(np.roll)
 _array_func_simple_wrapper(np.rollaxis)
 _array_func_simple_wrapper(np.rot90)
 _array_func_simple_wrapper(np.squeeze)
 _array_func_simple_wrapper(np.swapaxes)
-_array_func_simple_wrapper(np.take)
-_array_func_simple_wrapper(np.tile)
 _array_func_simple_wrapper(np.transpose)
+# functions that always return new arrays
+_array_func_simple_wrapper(np.delete, copies=True)
+_array_func_simple_wrapper(np.repeat, copies=True)
+_array_func_simple_wrapper(np.resize, copies=True)
+_array_func_simple_wrapper(np.roll, copies=True)
+_array_func_simple_wrapper(np.take, copies=True)
+_array_func_simple_wrapper(np.tile, copies=True)
+
+
+def _array_func_join_wrapper(numpy_func):
+    """Wrap functions that join a sequence of arrays.
+
+    Notes
+    -----
+    - All the QFloats are converted to the unit of the first one.
+    - Nominal and uncertainty are joined with a single call each, and the
+      new arrays are used by the result without another copy.
+    """
+    def wrapper(arrays, *args, **kwargs):
+        if kwargs.get('out', None) is not None:
+            raise NotImplementedError("`out` argument not supported yet.")
+        arrays = [convert_to_qfloat(a) for a in arrays]
+        first = arrays[0]
+        arrays = [_same_unit(first, a, numpy_func)[1] for a in arrays]
+        nominal = numpy_func([a.nominal for a in arrays], *args, **kwargs)
+        std = numpy_func([a.uncertainty for a in arrays], *args, **kwargs)
+        return _qfloat_from_arrays(nominal, std, first.unit)
+    _implements_array_func(numpy_func)(wrapper)
+
+
+_array_func_join_wrapper(np.concatenate)
+_array_func_join_wrapper(np.stack)
+_array_func_join_wrapper(np.vstack)
+_array_func_join_wrapper(np.hstack)
+_array_func_join_wrapper(np.dstack)
+_array_func_join_wrapper(np.column_stack)
 
 
 @_implements_array_func(np.round)
@@ -965,16 +1186,17 @@ def _qfloat_degrees(qf, *args, **kwargs):
 def _trigonometric_simple_wrapper(numpy_ufunc):
     def trig_wrapper(qf, *args, **kwargs):
         # check if qf is angle
-        if qf.unit not in (units.degree, units.radian):
+        if qf.unit == units.radian:
+            x, sx = qf.nominal, qf.std_dev
+        elif qf.unit == units.degree:
+            # numpy inputs must be in radian. Scale the values inline,
+            # without building an intermediate converted QFloat.
+            x, sx = np.deg2rad(qf.nominal), np.deg2rad(qf.std_dev)
+        else:
             raise UnitsError('qfloat unit is not degree or radian.')
 
-        # if degree, convert to radian as required for numpy inputs.
-        if qf.unit == units.degree:
-            qf = qf.to(units.radian)
-
-        nominal = numpy_ufunc(qf.nominal)
-        std = propagate_1(numpy_ufunc.__name__, nominal,
-                          qf.nominal, qf.std_dev)
+        nominal = numpy_ufunc(x)
+        std = propagate_1(numpy_ufunc.__name__, nominal, x, sx)
         return QFloat(nominal, std, units.dimensionless_unscaled)
     _implements_ufunc(numpy_ufunc)(trig_wrapper)
 
@@ -1044,12 +1266,8 @@ def _general_ufunc_wrapper(numpy_ufunc):
     - These functions will not operate with kwarg.
     - These functions will just wrap QFloat math methods.
     """
-    ufunc_name = numpy_ufunc.__name__
-    true_func = _ufunc_translate[ufunc_name]
-
-    def ufunc_wrapper(*inputs):
-        return true_func(*inputs)
-    _implements_ufunc(numpy_ufunc)(ufunc_wrapper)
+    # QFloat math methods are registered directly, with no extra call layer
+    _implements_ufunc(numpy_ufunc)(_ufunc_translate[numpy_ufunc.__name__])
 
 
 _general_ufunc_wrapper(np.add)
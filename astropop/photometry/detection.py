@@ -9,6 +9,7 @@ from astropy.utils import lazyproperty
 from photutils.detection import DAOStarFinder
 from photutils.segmentation import SourceFinder, SourceCatalog, \
                                    make_2dgaussian_kernel
+from scipy.ndimage import convolve1d
 
 from astropop.math.models import PSFMoffatRadial, PSFGaussianRadial
 from astropop.math.array import trim_array, xy2r
@@ -23,6 +24,25 @@ _default_morfology_columns = ['segment_flux', 'fwhm', 'eccentricity',
                               'orientation']
 
 
+def _gaussian_convolve(data, fwhm, mask=None):
+    """Convolve data with a normalized circular gaussian kernel.
+
+    The circular gaussian kernel is separable, so without mask and non-finite
+    values the convolution is performed as two 1D passes, with the same zero
+    filled borders of `~astropy.convolution.convolve`.
+    """
+    ksize = int(np.max([np.ceil(2*fwhm)+1, 3]))
+    kernel = make_2dgaussian_kernel(fwhm=fwhm, size=ksize)
+    if mask is not None or not np.all(np.isfinite(data)):
+        return convolve(data, kernel, mask=mask, normalize_kernel=True)
+
+    k1d = kernel.array.sum(axis=0)
+    k1d /= k1d.sum()
+    conv = convolve1d(np.asarray(data, dtype='f8'), k1d, axis=0,
+                      mode='constant')
+    return convolve1d(conv, k1d, axis=1, mode='constant')
+
+
 def segfind(data, threshold, background, noise, mask=None, fwhm=None, npix=5,
             deblend=True):
     """Find sources using `~photutils.segmentation`.
@@ -95,9 +115,7 @@ def segfind(data, threshold, background, noise, mask=None, fwhm=None, npix=5,
 
     # perform the detection on convolved data
     if fwhm is not None:
-        ksize = int(np.max([np.ceil(2*fwhm)+1, 3]))
-        kernel = make_2dgaussian_kernel(fwhm=fwhm, size=ksize)
-        conv_data = convolve(data, kernel, mask=mask, normalize_kernel=True)
+        conv_data = _gaussian_convolve(data, fwhm, mask=mask)
 
     # algorithm needs the absolute value threshold
     threshold = threshold*noise
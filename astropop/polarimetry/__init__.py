@@ -2,10 +2,10 @@
 """Compute polarimetry of dual beam polarimeters images."""
 
 import abc
+import math
 import numpy as np
 from dataclasses import dataclass, field
 from typing import List
-from astropy.table import Table
 from scipy.spatial import cKDTree
 from scipy.optimize import curve_fit
 from astropy import units
@@ -26,13 +26,19 @@ def _compute_theta(q, u):
     theta = np.degrees(0.5*np.arctan2(u, q))
     if not hasattr(theta, 'unit'):
         theta = theta*units.degree
-    # do not allow negative values
-    if theta < 0*units.degree:
-        theta += 180*units.degree
-    return theta
+    # do not allow negative values. Works for scalars and arrays.
+    return theta + 180*(theta < 0*units.degree)*units.degree
 
 
-def estimate_dxdy(x, y, steps=[100, 30, 5, 3], bins=30, dist_limit=100):
+def _xy_points(x, y):
+    """Pack x and y in a C-contiguous (N, 2) float64 array for cKDTree."""
+    pts = np.empty((len(x), 2), dtype=np.float64)
+    pts[:, 0] = x
+    pts[:, 1] = y
+    return pts
+
+
+def estimate_dxdy(x, y, steps=(100, 30, 5, 3), bins=30, dist_limit=100):
     """Estimate the displacement between the two beams.
 
     To compute the displacement between the ordinary and extraordinary
@@ -43,8 +49,9 @@ def estimate_dxdy(x, y, steps=[100, 30, 5, 3], bins=30, dist_limit=100):
     ----------
     x, y: array_like
         Arrays of x and y positions of the sources.
-    steps: list of int
+    steps: sequence of float
         Number of pixels, around the mode, to clip the histogram in each step.
+        Default is (100, 30, 5, 3).
     bins: int
         Number of bins to use in the histogram.
     dist_limit: float
@@ -53,35 +60,62 @@ def estimate_dxdy(x, y, steps=[100, 30, 5, 3], bins=30, dist_limit=100):
     Return
     ------
     dx, dy: float
-        Displacement between the ordinary and extraordinary beams.
+        Displacement between the ordinary and extraordinary beams. If there
+        is no pair of sources closer than ``dist_limit``, ``(0.0, 0.0)`` is
+        returned.
     """
     def _find_max(d):
         dx = 0
-        for lim in (np.max(d), *steps):
+        sub, sub_lo, sub_hi = d, -np.inf, np.inf
+        for lim in (float(np.max(d)), *steps):
             lo, hi = (dx-lim, dx+lim)
             lo, hi = (lo, hi) if (lo < hi) else (hi, lo)
-            histx = np.histogram(d, bins=bins, range=[lo, hi])
-            mx = np.argmax(histx[0])
-            dx = (histx[1][mx]+histx[1][mx+1])/2
+            if lo == hi:
+                # same as numpy.histogram for empty ranges
+                lo, hi = lo-0.5, hi+0.5
+            # uniform bins histogram, lighter than numpy.histogram
+            scale = bins/(hi-lo)
+            # the ranges usually shrink, so only the values kept by the
+            # previous step need to be checked
+            if not (sub_lo <= lo and hi <= sub_hi):
+                sub = d
+            sub = sub[(sub >= lo) & (sub <= hi)]
+            sub_lo, sub_hi = lo, hi
+            idx = ((sub - lo)*scale).astype(np.intp)
+            # values in the upper edge go to the last bin
+            np.minimum(idx, bins-1, out=idx)
+            mx = np.argmax(np.bincount(idx, minlength=bins))
+            dx = lo + (mx+0.5)/scale
         return dx
 
-    # take all combinations
-    comb = np.array(np.meshgrid(np.arange(len(x)),
-                                np.arange(len(x)))).T.reshape(-1, 2)
-    # filter only y[j] > y[i]
-    filt = y[comb[:, 1]] > y[comb[:, 0]]
-    comb = comb[np.where(filt)]
-
-    # compute the distances
-    dx = x[comb[:, 0]] - x[comb[:, 1]]
-    dy = y[comb[:, 0]] - y[comb[:, 1]]
-
-    # filter by distance
-    filt = (np.abs(dx) <= dist_limit) & (np.abs(dy) <= dist_limit)
-    dx = dx[np.where(filt)]
-    dy = dy[np.where(filt)]
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    steps = [float(i) for i in steps]
+    if len(x) < 2:
+        logger.debug('Less than 2 sources, no displacement to estimate.')
+        return (0.0, 0.0)
+
+    # take each unordered pair only once, only for sources close enough.
+    # The circle of radius dist_limit*sqrt(2) contains the distance box.
+    kd = cKDTree(_xy_points(x, y), balanced_tree=False, compact_nodes=False)
+    pairs = kd.query_pairs(r=dist_limit*np.sqrt(2), output_type='ndarray')
+    dx = x[pairs[:, 0]] - x[pairs[:, 1]]
+    dy = y[pairs[:, 0]] - y[pairs[:, 1]]
+    del pairs
+
+    # orient the pairs so y[j] > y[i], which is the same as swap them
+    swap = dy > 0
+    np.negative(dx, out=dx, where=swap)
+    np.negative(dy, out=dy, where=swap)
+
+    # filter by distance, discarding pairs with the same y
+    filt = (dy != 0) & (np.abs(dx) <= dist_limit) & (np.abs(dy) <= dist_limit)
+    dx = dx[filt]
+    dy = dy[filt]
 
     logger.debug(f"Determining the best dx,dy with {len(dx)} combinations.")
+    if len(dx) == 0:
+        return (0.0, 0.0)
 
     return (_find_max(dx), _find_max(dy))
 
@@ -108,21 +142,24 @@ def match_pairs(x, y, dx, dy, tolerance=1.0):
         indexes of the ordinary points, column 'e' the indexes of the
         extraordinary points.
     """
-    kd = cKDTree(list(zip(x, y)))
+    if len(x) == 0:
+        return np.empty(0, dtype=[('o', 'i8'), ('e', 'i8')])
 
-    px = np.array(x-dx)
-    py = np.array(y-dy)
+    pts = _xy_points(x, y)
+    # unbalanced, non-compact trees are faster to build and good enough
+    # for the uniform distribution of sources in images
+    kd = cKDTree(pts, balanced_tree=False, compact_nodes=False)
 
-    d, ind = kd.query(list(zip(px, py)), k=1, distance_upper_bound=tolerance,
+    d, ind = kd.query(pts - [dx, dy], k=1, distance_upper_bound=tolerance,
                       workers=-1)
 
-    o = np.arange(len(x))[np.where(d <= tolerance)]
-    e = np.array(ind[np.where(d <= tolerance)])
-    result = Table()
-    result['o'] = o
-    result['e'] = e
+    matched = d <= tolerance
+    result = np.empty(np.count_nonzero(matched),
+                      dtype=[('o', 'i8'), ('e', 'i8')])
+    result['o'] = np.flatnonzero(matched)
+    result['e'] = ind[matched]
 
-    return result.as_array()
+    return result
 
 
 def quarterwave_model(psi, q, u, v, zero=0):
@@ -147,8 +184,10 @@ def quarterwave_model(psi, q, u, v, zero=0):
     if zero is not None:
         psi = psi+zero  # avoid inplace modification
     psi = np.radians(psi)
-    psi2 = 2*psi
-    zi = q*(np.cos(psi2)**2) + u*np.sin(psi2)*np.cos(psi2) - v*np.sin(psi2)
+    # cos(2psi)**2 = (1+cos(4psi))/2 and sin(2psi)*cos(2psi) = sin(4psi)/2
+    psi4 = 4*psi
+    q2, u2 = 0.5*q, 0.5*u
+    zi = q2 + q2*np.cos(psi4) + u2*np.sin(psi4) - v*np.sin(2*psi)
     return zi
 
 
@@ -173,11 +212,62 @@ def halfwave_model(psi, q, u, zero=None):
     """
     if zero is not None:
         psi = psi+zero  # avoid inplace modification
-    psi = np.radians(psi)
-    zi = q*np.cos(4*psi) + u*np.sin(4*psi)
+    psi4 = 4*np.radians(psi)
+    zi = q*np.cos(psi4) + u*np.sin(psi4)
     return zi
 
 
+def _halfwave_fit_model(psi, zero=None):
+    """Halfwave model with the trigonometric terms precomputed for fitting.
+
+    The returned function ignores its first argument and must be used with
+    the same ``psi`` positions, like in `~scipy.optimize.curve_fit`.
+    """
+    if zero is not None:
+        psi = psi+zero
+    psi4 = 4*np.radians(psi)
+    # the model is a linear combination of the basis rows, computed in a
+    # single dot product without temporaries
+    basis = np.array([np.cos(psi4), np.sin(psi4)])
+
+    def model(psi, q, u):
+        return np.dot((q, u), basis)
+    return model
+
+
+def _quarterwave_fit_model(psi, zero=None):
+    """Quarterwave model with the trigonometric terms precomputed for fitting.
+
+    If ``zero`` is None, it becomes the last parameter of the model and the
+    angle sum identities are used, so only scalars are computed per call.
+    The returned function ignores its first argument and must be used with
+    the same ``psi`` positions, like in `~scipy.optimize.curve_fit`.
+    """
+    if zero is not None:
+        psi = psi+zero
+    psi = np.radians(psi)
+    # rows: 1, cos(4psi), sin(4psi), sin(2psi), cos(2psi)
+    basis = np.array([np.ones_like(psi), np.cos(4*psi), np.sin(4*psi),
+                      np.sin(2*psi), np.cos(2*psi)])
+
+    if zero is not None:
+        basis = basis[:4]
+
+        def model(psi, q, u, v):
+            q2, u2 = 0.5*q, 0.5*u
+            return np.dot((q2, q2, u2, -v), basis)
+        return model
+
+    def model_zero(psi, q, u, v, zero):
+        zero = math.radians(zero)
+        cz2, sz2 = math.cos(2*zero), math.sin(2*zero)
+        cz4, sz4 = math.cos(4*zero), math.sin(4*zero)
+        q2, u2 = 0.5*q, 0.5*u
+        return np.dot((q2, q2*cz4 + u2*sz4, u2*cz4 - q2*sz4, -v*cz2, -v*sz2),
+                      basis)
+    return model_zero
+
+
 @dataclass
 class StokesParameters:
     """Store the Stokes parameters results from dual beam polarimeters.
@@ -352,7 +442,8 @@ class _DualBeamPolarimetry(abc.ABC):
 
     def _calc_zi(self, f_ord, f_ext, k):
         """Compute zi from ordinary and extraordinary fluxes."""
-        return (f_ord - f_ext*k)/(f_ord + f_ext*k)
+        f_ext = f_ext*k
+        return (f_ord - f_ext)/(f_ord + f_ext)
 
     def _estimate_normalize_half(self, psi, f_ord, f_ext):
         """Estimate the normalization factor for halfwave retarder."""
@@ -361,13 +452,21 @@ class _DualBeamPolarimetry(abc.ABC):
         ford_mean = np.full(self._n_pos, np.nan)
         fext_mean = np.full(self._n_pos, np.nan)
 
+        # only the nominal values are used
+        f_ord = np.asarray(f_ord, dtype=float)
+        f_ext = np.asarray(f_ext, dtype=float)
+        has_nan = np.isnan(f_ord).any() or np.isnan(f_ext).any()
+        median = np.nanmedian if has_nan else np.median
+
         for i in range(self._n_pos):
-            if np.all(np.isnan(f_ord[pos_in_cycle == i])) or \
-               np.all(np.isnan(f_ext[pos_in_cycle == i])):
+            filt = pos_in_cycle == i
+            o, e = f_ord[filt], f_ext[filt]
+            if o.size == 0 or (has_nan and (np.all(np.isnan(o)) or
+                                            np.all(np.isnan(e)))):
                 raise ValueError('Could not estimate the normalization '
                                  'factor.')
-            ford_mean[i] = np.nanmedian(f_ord[pos_in_cycle == i])
-            fext_mean[i] = np.nanmedian(f_ext[pos_in_cycle == i])
+            ford_mean[i] = median(o)
+            fext_mean[i] = median(e)
 
         # use the means for each position. This fixes problems with missing
         # points
@@ -564,7 +663,7 @@ class SLSDualBeamPolarimetry(_DualBeamPolarimetry):
     def _half_fit(self, psi, zi):
         """Fit the model for halfwave retarder."""
         # change the model to do not have to fit the zero position
-        model = partial(halfwave_model, zero=self.zero)
+        model = _halfwave_fit_model(psi, zero=self.zero)
         fitter = self._get_fitter(zi)
 
         # fit the model
@@ -581,12 +680,12 @@ class SLSDualBeamPolarimetry(_DualBeamPolarimetry):
     def _quarter_fit(self, psi, zi):
         # if zero is not set, estimate it from the data
         if self.zero is not None:
-            model = partial(quarterwave_model, zero=self.zero)
+            model = _quarterwave_fit_model(psi, zero=self.zero)
             bounds = ([-1, -1, -1], [1, 1, 1])
             pnames = ['q', 'u', 'v']
             logger.debug('Using fixed value of zero: %s', self.zero)
         else:
-            model = quarterwave_model
+            model = _quarterwave_fit_model(psi)
             bounds = ([-1, -1, -1, self.zero_range[0]],
                       [1, 1, 1, self.zero_range[1]])
             pnames = ['q', 'u', 'v', 'zero']
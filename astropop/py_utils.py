@@ -1,7 +1,9 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 """Small python addons to be used in astropop."""
 
+import os
 from os import linesep
+import signal
 import subprocess
 import asyncio
 import shlex
@@ -176,14 +178,29 @@ async def _read_stream(stream, callback):
             break
 
 
+def _kill_process(proc):
+    """Kill a process and, in posix systems, its session."""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
 async def _subprocess(args, stdout, stderr, stdout_loglevel, stderr_loglevel,
-                      logger, **kwargs):
+                      logger, timeout=None, **kwargs):
     """Execute subprocesses."""
     def proccess_out(line, std_l, loglevel):
         line = line.decode("utf-8").strip('\n')
         std_l.append(line)
         logger.log(loglevel, line)
 
+    if timeout is not None and hasattr(os, 'killpg'):
+        # own session, so the shell children are killed in timeout
+        kwargs['start_new_session'] = True
+
     # TODO: when deprecate py37, use shlex.join(args)
     proc = await asyncio.create_subprocess_shell(
         ' '.join(shlex.quote(arg) for arg in args),
@@ -206,10 +223,20 @@ async def _subprocess(args, stdout, stderr, stdout_loglevel, stderr_loglevel,
                                           proccess_out(x, stderr,
                                                        stderr_loglevel)))
         tasks.append(t)
-    await asyncio.wait(set(tasks))
+    # the timeout bounds both the output reading and the process exit
+    wait = loop.create_task(proc.wait())
+    _, pending = await asyncio.wait(set(tasks + [wait]), timeout=timeout)
+    if pending:
+        logger.error('Process timed out after %s seconds. Killing it.',
+                     timeout)
+        _kill_process(proc)
+        await asyncio.wait(pending)
+        raise subprocess.TimeoutExpired(args, timeout,
+                                        output=linesep.join(stdout),
+                                        stderr=linesep.join(stderr))
 
     return subprocess.CompletedProcess(args=args,
-                                       returncode=await proc.wait(),
+                                       returncode=wait.result(),
                                        stdout=linesep.join(stdout) + linesep,
                                        stderr=linesep.join(stderr) + linesep)
 
@@ -236,7 +263,8 @@ def _run_async_task(task):
 
 
 def run_command(args, stdout=None, stderr=None, stdout_loglevel='DEBUG',
-                stderr_loglevel='ERROR', logger=logger, **kwargs):
+                stderr_loglevel='ERROR', logger=logger, timeout=None,
+                **kwargs):
     """Run a command in command line with logging.
 
     Parameters
@@ -255,6 +283,10 @@ def run_command(args, stdout=None, stderr=None, stdout_loglevel='DEBUG',
         Log level to print the stderr lines. Default is 'ERROR'.
     logger: `~logging.Logger` (optional)
         Custom logger to print the outputs.
+    timeout: float (optional)
+        Maximum wall time, in seconds, to wait for the command. If exceeded,
+        the process is killed and `~subprocess.TimeoutExpired` is raised.
+        Default is `None`, wait forever.
     **kwargs: dict (optional)
         Additional arguments to be passed to `~asyncio.create_subprocess_shell`
 
@@ -278,7 +310,7 @@ def run_command(args, stdout=None, stderr=None, stdout_loglevel='DEBUG',
     # Run the command
     loc_logger = logger
     proc = _subprocess(args, stdout, stderr, stdout_loglevel, stderr_loglevel,
-                       logger=loc_logger, **kwargs)
+                       logger=loc_logger, timeout=timeout, **kwargs)
 
     result = _run_async_task(proc)
     # restore original args to mimic subproces.run()
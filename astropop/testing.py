@@ -62,6 +62,24 @@ def assert_false(a, msg=None):
 @func_wrapper
 def assert_equal(a, b, msg=None):
     """Check if two objects are equal. Arrays supported."""
+    if isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and \
+       a.dtype == bool and b.dtype == bool and a.shape == b.shape:
+        # fast path for masks. Only format the full diff if they differ
+        if not np.any(a ^ b):
+            return
+    if isinstance(a, (list, tuple)) and \
+       isinstance(b, (list, tuple, np.ndarray)):
+        # fast path for python sequences. Only use numpy if they differ
+        if isinstance(b, np.ndarray):
+            b_list = b.tolist()
+        else:
+            b_list = b
+        try:
+            if a == b_list:
+                return
+        except ValueError:
+            # elements are arrays, with ambiguous truth value
+            pass
     if not np.isscalar(a) or not np.isscalar(b):
         if msg is None:
             msg = ''
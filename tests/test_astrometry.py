@@ -15,16 +15,23 @@ from astropy.wcs import WCS
 from astropy import units
 from astropy.utils.data import download_file
 
-from astropop.astrometry.astrometrynet import _solve_field, \
+from astropop.astrometry.astrometrynet import _resolve_solve_field, \
                                               solve_astrometry_image, \
                                               solve_astrometry_xy, \
                                               solve_astrometry_hdu, \
                                               solve_astrometry_framedata, \
-                                              AstrometrySolver
+                                              solve_astrometry_batch, \
+                                              AstrometrySolver, \
+                                              AstrometricSolution, \
+                                              create_xyls
 from astropop.astrometry.astrometrynet import _parse_angle, \
                                               _parse_coordinates, \
                                               _parse_crpix, \
-                                              _parse_pltscl
+                                              _parse_pltscl, \
+                                              _default_tmpdir, \
+                                              _remove_tree, \
+                                              _wait_cleanup, \
+                                              _which_solve_field
 from astropop.astrometry.manual_wcs import wcs_from_coords
 from astropop.astrometry.coords_utils import guess_coordinates
 from astropop.framedata import FrameData
@@ -40,11 +47,30 @@ def compare_wcs(wcs, nwcs):
         assert_almost_equal(res1, res2, decimal=1)
 
 
-skip_astrometry = pytest.mark.skipif("_solve_field is None or "
+skip_astrometry = pytest.mark.skipif("_resolve_solve_field() is None or "
                                      "os.getenv('SKIP_TEST_ASTROMETRY', "
                                      "False)")
 
 
+def test_resolve_solve_field_later_install(tmp_path, monkeypatch):
+    _which_solve_field.cache_clear()
+    try:
+        monkeypatch.setenv('PATH', str(tmp_path))
+        assert_is_none(_resolve_solve_field())
+
+        # installed after a failed lookup: must be found
+        command = tmp_path / 'solve-field'
+        command.write_text('#!/bin/sh\n')
+        command.chmod(0o755)
+        assert_equal(_resolve_solve_field(), str(command))
+
+        # found paths are cached
+        monkeypatch.setenv('PATH', '')
+        assert_equal(_resolve_solve_field(), str(command))
+    finally:
+        _which_solve_field.cache_clear()
+
+
 @pytest.mark.remote_data
 class Test_AstrometrySolver:
     def get_image(self):
@@ -85,6 +111,8 @@ class Test_AstrometrySolver:
 
     @pytest.mark.parametrize('angle,unit,fail', [(Angle(1.0, 'degree'), None, False),
                                                  (1.0, None, False),
+                                                 (1, None, False),
+                                                 (np.float32(1), None, False),
                                                  ('1 degree', None, False),
                                                  ('1 deg', None, False),
                                                  (np.radians(1.0), 'radian', False),
@@ -185,6 +213,64 @@ class Test_AstrometrySolver:
             _parse_crpix({'crpix-center': None, 'crpix-x': 1, 'crpix-y': 1})
         assert_equal(_parse_crpix({}), [])
 
+    def test_default_tmpdir(self, tmpdir, monkeypatch):
+        monkeypatch.setenv('ASTROPOP_ASTROMETRY_TMPDIR', str(tmpdir))
+        assert_equal(_default_tmpdir(), str(tmpdir))
+
+        monkeypatch.delenv('ASTROPOP_ASTROMETRY_TMPDIR')
+        monkeypatch.setattr('astropop.astrometry.astrometrynet._shm_dir',
+                            str(tmpdir.join('not_exists')))
+        assert_is_none(_default_tmpdir())
+
+    def test_remove_tree(self, tmpdir):
+        path = tmpdir.join('solve')
+        path.join('file.wcs').write('test', ensure=True)
+        _remove_tree(str(path))
+        _wait_cleanup()
+        assert_false(os.path.exists(str(path)))
+
+    def test_create_xyls(self, tmpdir):
+        fname = str(tmpdir.join('test.xyls'))
+        x = [1.0, 2.0, 3.0, 4.0]
+        y = [5.0, 6.0, 7.0, 8.0]
+        flux = [10.0, 40.0, 20.0, 30.0]
+        create_xyls(fname, x, y, flux, 100, 200)
+
+        hdr = fits.getheader(fname, 1)
+        assert_equal(hdr['IMAGEW'], 100)
+        assert_equal(hdr['IMAGEH'], 200)
+        tab = Table.read(fname)
+        # sorted by decreasing flux
+        assert_equal(tab['x'], [2.0, 4.0, 3.0, 1.0])
+        assert_equal(tab['y'], [6.0, 8.0, 7.0, 5.0])
+        assert_equal(tab['flux'], [40.0, 30.0, 20.0, 10.0])
+        assert_equal(tab['x'].dtype.kind, 'f')
+        assert_equal(tab['x'].dtype.itemsize, 4)
+
+        create_xyls(fname, x, y, flux, 100, 200, dtype='f8')
+        tab = Table.read(fname)
+        assert_equal(tab['x'].dtype.itemsize, 8)
+
+    def test_create_xyls_equal_flux(self, tmpdir):
+        fname = str(tmpdir.join('test.xyls'))
+        create_xyls(fname, [1.0, 2.0, 3.0], [4.0, 5.0, 6.0],
+                    [10.0, 20.0, 10.0], 100, 200)
+        tab = Table.read(fname)
+        # equal fluxes keep the input order
+        assert_equal(tab['x'], [2.0, 1.0, 3.0])
+
+    def test_create_xyls_max_sources(self, tmpdir):
+        fname = str(tmpdir.join('test.xyls'))
+        x = [1.0, 2.0, 3.0, 4.0]
+        y = [5.0, 6.0, 7.0, 8.0]
+        flux = [10.0, 40.0, 20.0, 30.0]
+        create_xyls(fname, x, y, flux, 100, 200, max_sources=2)
+
+        tab = Table.read(fname)
+        assert_equal(tab['x'], [2.0, 4.0])
+        assert_equal(tab['y'], [6.0, 8.0])
+        assert_equal(tab['flux'], [40.0, 30.0])
+
     @skip_astrometry
     def test_read_cfg(self):
         a = AstrometrySolver()  # read the default configuration
@@ -267,6 +353,26 @@ class Test_AstrometrySolver:
                                     'indx4', 'indx5'])
         assert_true(cfg['autoindex'])
 
+    def test_warm_indexes(self, tmpdir):
+        for i in ['index-4107.fits', 'index-4108.fits', 'other.fits']:
+            tmpdir.join('data', i).write_binary(b'0'*2880, ensure=True)
+        tmpdir.join('extra', 'my-index.fits').write_binary(b'0'*2880,
+                                                           ensure=True)
+        fname = tmpdir / 'test.cfg'
+        with open(fname, 'w') as f:
+            f.write(f"add_path {tmpdir / 'data'}\n")
+            f.write("autoindex\n")
+
+        a = AstrometrySolver(config_file=fname)
+        files = a.warm_indexes()
+        assert_equal(files, [str(tmpdir / 'data' / 'index-4107.fits'),
+                             str(tmpdir / 'data' / 'index-4108.fits')])
+
+        files = a.warm_indexes({'add_path': str(tmpdir / 'extra'),
+                                'index': ['my-index'],
+                                'autoindex': False})
+        assert_equal(files, [str(tmpdir / 'extra' / 'my-index.fits')])
+
     @skip_astrometry
     def test_write_config(self, tmpdir):
         fname = tmpdir / 'test.cfg'
@@ -317,6 +423,33 @@ class Test_AstrometrySolver:
         assert_equal(cfg['index'], ['011', '012'])
         assert_equal(cfg['add_path'], ['/path1', '/path2'])
 
+    def test_parse_options_disabled_flag(self, tmpdir):
+        fname = tmpdir / 'test.cfg'
+        fname.write('autoindex\n')
+        a = AstrometrySolver(config_file=fname)
+        args = a._parse_options({'no-remove-lines': None})
+        assert_equal(args, ['--no-remove-lines'])
+        args = a._parse_options({'uniformize': 0})
+        assert_equal(args, ['--uniformize', '0'])
+        args = a._parse_options({'no-remove-lines': False,
+                                 'overwrite': None})
+        assert_equal(args, ['--overwrite'])
+
+    def test_parse_options_order_and_pop(self, tmpdir):
+        fname = tmpdir / 'test.cfg'
+        fname.write('autoindex\n')
+        a = AstrometrySolver(config_file=fname)
+        for _ in range(2):  # second run is cached
+            options = {'uniformize': 0, 'radius': 1.0, 'overwrite': None,
+                       'cpulimit': 300, 'no-remove-lines': None}
+            args = a._parse_options(options)
+            assert_equal(args, ['--radius', '1.0', '--uniformize', '0',
+                                '--overwrite', '--cpulimit', '300',
+                                '--no-remove-lines'])
+            # parsed options are popped, like in the uncached path
+            assert_equal(list(options), ['uniformize', 'overwrite',
+                                         'cpulimit', 'no-remove-lines'])
+
     @skip_astrometry
     def test_only_write_config_when_needed(self, tmpdir):
         a = AstrometrySolver()
@@ -400,6 +533,64 @@ class Test_AstrometrySolver:
         compare_wcs(wcs, result.wcs)
         assert_is_instance(result.header, fits.Header)
 
+    @skip_astrometry
+    def test_solve_astrometry_batch(self, tmpdir):
+        data, index, options = self.get_image()
+        hdu = fits.open(data)[0]
+        header, wcs = _generate_wcs_and_update_header(hdu.header)
+        hdu.header = header
+        names = []
+        for i in range(2):
+            name = tmpdir.join(f'testimage{i}.fits').strpath
+            hdu.writeto(name)
+            names.append(name)
+        results = solve_astrometry_batch(names, options=options, workers=2)
+        assert_equal(len(results), 2)
+        for result in results:
+            compare_wcs(wcs, result.wcs)
+            assert_is_instance(result.header, fits.Header)
+
+
+class Test_AstrometricSolution:
+    def get_header(self):
+        header = fits.Header()
+        header['CTYPE1'] = 'RA---TAN'
+        header['CTYPE2'] = 'DEC--TAN'
+        header['CRVAL1'] = 10.0
+        header['CRVAL2'] = 20.0
+        header['CRPIX1'] = 50.0
+        header['CRPIX2'] = 50.0
+        header['CDELT1'] = 1e-4
+        header['CDELT2'] = 1e-4
+        return header
+
+    def test_solution_properties(self):
+        header = self.get_header()
+        corr = Table({'field_x': [1.0, 2.0], 'field_y': [3.0, 4.0]})
+        sol = AstrometricSolution(header, correspondences=corr)
+        assert_is(sol.header, header)
+        assert_is(sol.correspondences, corr)
+        assert_equal(sol.wcs.wcs.crval, [10.0, 20.0])
+        assert_equal(sol.correspondences['field_x'], [1.0, 2.0])
+
+    def test_solution_correspondences_dict(self):
+        corr = {'field_x': [1.0, 2.0], 'field_y': [3.0, 4.0]}
+        sol = AstrometricSolution(self.get_header(), correspondences=corr)
+        assert_is_instance(sol.correspondences, Table)
+        assert_equal(sol.correspondences['field_y'], [3.0, 4.0])
+
+    def test_solution_copy(self):
+        header = self.get_header()
+        sol = AstrometricSolution(header)
+        nsol = sol.copy()
+        assert_is_not(nsol.header, sol.header)
+        assert_is_not(nsol.wcs, sol.wcs)
+        nsol.wcs.wcs.crval = [1.0, 2.0]
+        nsol.header['CRVAL1'] = 1.0
+        assert_equal(sol.wcs.wcs.crval, [10.0, 20.0])
+        assert_equal(sol.header['CRVAL1'], 10.0)
+        assert_is_none(nsol.correspondences)
+
 
 class Test_ManualWCS:
     def test_manual_wcs_top(self):
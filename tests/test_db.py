@@ -12,16 +12,55 @@ import sqlite3
 import copy
 
 
+# columns and rows of the template 'test' table. Read-only, shared by tests
+_A = np.arange(10, 20)
+_B = np.arange(20, 30)
+_A.setflags(write=False)
+_B.setflags(write=False)
+_EXPECT_ROWS = list(zip(_A.tolist(), _B.tolist()))
+_EXPECT_BASE = np.column_stack([_A, _B])
+_EXPECT_BASE.setflags(write=False)
+
+
+@pytest.fixture(scope='module')
+def template_db():
+    """Database with 'test' table, cloned by the tests that need it."""
+    db = SQLDatabase(':memory:')
+    with db.transaction():
+        db.add_table('test')
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
+    return db
+
+
+class _TemplateDBClone:
+    """Give the tests a `db` property, with a clone of `template_db`."""
+
+    @pytest.fixture(autouse=True)
+    def _clone_db(self, template_db):
+        self._template = template_db
+        self._db = None
+
+    @property
+    def db(self):
+        # clone only in the tests that use it
+        if self._db is None:
+            self._db = self._template.copy()
+        return self._db
+
+
 def test_sanitize_string():
     for i in ['test-2', 'test!2', 'test@2', 'test#2', 'test$2',
               'test&2', 'test*2', 'test(2)', 'test)2', 'test[2]', 'test]2',
               'test{2}', 'test}2', 'test|2', 'test\\2', 'test^2', 'test~2'
               'test"2', 'test\'2', 'test`2', 'test<2', 'test>2', 'test=2',
-              'test,2', 'test;2', 'test:2', 'test?2', 'test/2']:
+              'test,2', 'test;2', 'test:2', 'test?2', 'test/2', 'test 2',
+              '_-_']:
         with pytest.raises(ValueError):
             _sanitize_colnames(i)
 
-    for i in ['test', 'test_1', 'test_1_2', 'test_1_2', 'Test', 'Test_1']:
+    for i in ['test', 'test_1', 'test_1_2', 'test_1_2', 'Test', 'Test_1',
+              '_test', 'test_', '_']:
         assert_equal(_sanitize_colnames(i), i.lower())
 
 
@@ -117,17 +156,30 @@ class Test_SQLDatabase_Creation_Modify:
         assert_equal(db.table_names, ['test'])
         assert_equal(len(db), 1)
 
+    def test_sql_add_column_invalid_data_rollback(self):
+        db = SQLDatabase(':memory:')
+        db.add_table('test')
+        with pytest.raises(TypeError):
+            db.add_column('test', 'a', data=[1, 2, {'invalid': 3}])
+
+        # neither the column nor the empty rows were kept
+        assert_equal(db.column_names('test'), [])
+        assert_equal(len(db['test']), 0)
+
     def test_sql_add_column_name_and_data(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
-        assert_equal(db.get_column('test', 'a').values, np.arange(10, 20))
-        assert_equal(db.get_column('test', 'b').values, np.arange(20, 30))
+        assert_equal(db.get_column('test', 'a').values, _A)
+        assert_equal(db.get_column('test', 'b').values, _B)
         assert_equal(db.column_names('test'), ['a', 'b'])
         assert_equal(len(db), 1)
         assert_equal(db.table_names, ['test'])
+        # rows created by the first column are indexed
+        assert_equal(len(db['test']), 10)
+        assert_equal(db['test', 4].values, [14, 24])
 
     def test_sql_add_column_only_name(self):
         db = SQLDatabase(':memory:')
@@ -143,15 +195,55 @@ class Test_SQLDatabase_Creation_Modify:
 
     def test_sql_add_table_from_data_table(self):
         db = SQLDatabase(':memory:')
-        d = Table(names=['a', 'b'], data=[np.arange(10, 20), np.arange(20, 30)])
+        d = Table(names=['a', 'b'], data=[_A, _B])
         db.add_table('test', data=d)
 
-        assert_equal(db.get_column('test', 'a').values, np.arange(10, 20))
-        assert_equal(db.get_column('test', 'b').values, np.arange(20, 30))
+        assert_equal(db.get_column('test', 'a').values, _A)
+        assert_equal(db.get_column('test', 'b').values, _B)
         assert_equal(db.column_names('test'), ['a', 'b'])
         assert_equal(len(db), 1)
         assert_equal(db.table_names, ['test'])
 
+    def test_sql_add_table_from_data_table_masked(self):
+        db = SQLDatabase(':memory:')
+        d = Table(names=['a', 'b'], data=[np.arange(3), ['x', 'y', 'z']],
+                  masked=True)
+        d['a'].mask = [False, True, False]
+        db.add_table('test', data=d)
+
+        assert_equal(db.get_column('test', 'a').values, [0, None, 2])
+        assert_equal(db.get_column('test', 'b').values, ['x', 'y', 'z'])
+
+    def test_sql_add_table_from_data_many_rows(self):
+        # more rows than fit in one multi-row insert statement
+        n = 1000
+        db = SQLDatabase(':memory:')
+        db.add_table('test', data={'a': np.arange(n), 'b': np.arange(n)*2.0,
+                                   'c': ['x']*n})
+        assert_equal(len(db['test']), n)
+        assert_equal(db.get_column('test', 'a').values, np.arange(n))
+        assert_equal(db.get_column('test', 'b').values, np.arange(n)*2.0)
+        assert_equal(db.get_row('test', -1).values, (n-1, 2.0*(n-1), 'x'))
+        assert_equal(db.execute('SELECT MAX(__id__) FROM test;'), [(n,)])
+
+    def test_sql_add_table_from_data_dict_scalar(self):
+        db = SQLDatabase(':memory:')
+        db.add_table('test', data={'a': np.arange(3), 'b': 'x'})
+
+        assert_equal(db.get_column('test', 'a').values, [0, 1, 2])
+        assert_equal(db.get_column('test', 'b').values, ['x', 'x', 'x'])
+
+        with pytest.raises(ValueError, match='same length'):
+            db.add_rows('test', {'a': np.arange(3), 'b': ['x', 'y']})
+        assert_equal(len(db['test']), 3)
+
+        # length-1 arrays are broadcasted like scalars
+        db.add_rows('test', {'a': [9], 'b': ['y', 'z']})
+        db.add_rows('test', {'a': np.array([7]), 'b': ['w']})
+        assert_equal(db.get_column('test', 'a').values, [0, 1, 2, 9, 9, 7])
+        assert_equal(db.get_column('test', 'b').values,
+                     ['x', 'x', 'x', 'y', 'z', 'w'])
+
     def test_sql_add_table_from_data_ndarray(self):
         dtype = [('a', 'i4'), ('b', 'f8')]
         data = np.array([(1, 2.0), (3, 4.0), (5, 6.0), (7, 8.0)], dtype=dtype)
@@ -165,12 +257,12 @@ class Test_SQLDatabase_Creation_Modify:
         assert_equal(db.table_names, ['test'])
 
     def test_sql_add_table_from_data_dict(self):
-        d = {'a': np.arange(10, 20), 'b': np.arange(20, 30)}
+        d = {'a': _A, 'b': _B}
         db = SQLDatabase(':memory:')
         db.add_table('test', data=d)
 
-        assert_equal(db.get_column('test', 'a').values, np.arange(10, 20))
-        assert_equal(db.get_column('test', 'b').values, np.arange(20, 30))
+        assert_equal(db.get_column('test', 'a').values, _A)
+        assert_equal(db.get_column('test', 'b').values, _B)
         assert_equal(db.column_names('test'), ['a', 'b'])
         assert_equal(len(db), 1)
         assert_equal(db.table_names, ['test'])
@@ -316,6 +408,19 @@ class Test_SQLDatabase_Creation_Modify:
         with pytest.raises(ValueError):
             db.set_column('test', 'a', [10, 20, 30, 40])
 
+    def test_sql_set_column_ndarray_types(self):
+        db = SQLDatabase(':memory:')
+        db.add_table('test')
+        db.add_column('test', 'i', np.arange(3, dtype=np.int16))
+        db.add_column('test', 'f', np.array([0.5, 1.5, 2.5], dtype='f4'))
+        db.add_column('test', 'b', np.array([True, False, True]))
+        db.add_column('test', 's', np.array(['a', 'bb', 'ccc']))
+
+        row = db.select('test')[1]
+        assert_equal(row, (1, 1.5, 0, 'bb'))
+        for v, t in zip(row, (int, float, int, str)):
+            assert_is_instance(v, t)
+
     def test_sql_set_row(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
@@ -348,8 +453,8 @@ class Test_SQLDatabase_Creation_Modify:
     def test_sql_setitem_tuple_only(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         with pytest.raises(KeyError):
             db[1] = 0
@@ -363,14 +468,14 @@ class Test_SQLDatabase_Creation_Modify:
     def test_sql_setitem(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         db['test', 'a'] = np.arange(50, 60)
         db['test', 0] = {'a': 1, 'b': 2}
         db['test', 'b', 5] = -999
 
-        expect = np.transpose([np.arange(50, 60), np.arange(20, 30)])
+        expect = np.column_stack([np.arange(50, 60), _B])
         expect[0] = [1, 2]
         expect[5, 1] = -999
 
@@ -399,6 +504,50 @@ class Test_SQLDatabase_Creation_Modify:
         assert_equal(db2.get_column('test', 'a').values, [1, 3, 5])
         assert_equal(db2.get_column('test', 'b').values, [2, 4, 6])
 
+    def test_sql_copy_independent(self, template_db):
+        # work on a clone, so a broken copy can't corrupt the template
+        db = template_db.copy()
+        db2 = db.copy()
+        db2.delete_row('test', 0)
+        db2.add_rows('test', {'a': 99, 'b': 98})
+        assert_equal(len(db['test']), 10)
+        assert_equal(db['test']['a'].values, _A)
+
+        # row ids are continuous in the copy
+        db3 = db2.copy()
+        db3.add_rows('test', {'a': 97, 'b': 96})
+        assert_equal(len(db3['test']), 11)
+        assert_equal(db3['test', 'a', 10], 97)
+        assert_equal(db3['test', 'a', 9], 99)
+
+    def test_sql_copy_uncommitted(self):
+        db = SQLDatabase(':memory:', autocommit=False)
+        db.add_table('test', columns=['a'])
+        db.add_rows('test', {'a': [1, 2, 3]})
+
+        db2 = db.copy()
+        assert_equal(db2.get_column('test', 'a').values, [1, 2, 3])
+        db2.add_rows('test', {'a': 4})
+        assert_equal(db2['test', 'a', 3], 4)
+
+    def test_sql_copy_raw_tables(self):
+        db = SQLDatabase(':memory:')
+        db.execute(f"CREATE TABLE test ({_ID_KEY} INTEGER PRIMARY KEY, a);")
+        db.execute("INSERT INTO test VALUES (NULL, 1), (NULL, 2);")
+        db.execute("CREATE TABLE other (x, y);")
+        db.execute("INSERT INTO other VALUES (3, 4);")
+
+        db2 = db.copy()
+        assert_equal(db2.table_names, ['test', 'other'])
+        assert_equal(db2.get_column('test', 'a').values, [1, 2])
+        assert_equal(db2.get_column('other', 'x').values, [3])
+
+        # only tables with row ids
+        db.execute("DROP TABLE other;")
+        db2 = db.copy()
+        assert_equal(db2.table_names, ['test'])
+        assert_equal(db2.get_column('test', 'a').values, [1, 2])
+
     def test_sql_copy_indexes(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
@@ -474,11 +623,10 @@ class Test_SQLDatabase_Access:
     def test_sql_get_table(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
-        assert_equal(db.get_table('test').values, list(zip(np.arange(10, 20),
-                                                           np.arange(20, 30))))
+        assert_equal(db.get_table('test').values, _EXPECT_ROWS)
         assert_is_instance(db.get_table('test'), SQLTable)
 
         with pytest.raises(KeyError):
@@ -494,17 +642,17 @@ class Test_SQLDatabase_Access:
     def test_sql_get_column(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
-        assert_equal(db.get_column('test', 'a').values, np.arange(10, 20))
-        assert_equal(db.get_column('test', 'b').values, np.arange(20, 30))
+        assert_equal(db.get_column('test', 'a').values, _A)
+        assert_equal(db.get_column('test', 'b').values, _B)
         assert_is_instance(db.get_column('test', 'a'), SQLColumn)
         assert_is_instance(db.get_column('test', 'b'), SQLColumn)
 
         # same access from table
-        assert_equal(db.get_table('test').get_column('a').values, np.arange(10, 20))
-        assert_equal(db.get_table('test').get_column('b').values, np.arange(20, 30))
+        assert_equal(db.get_table('test').get_column('a').values, _A)
+        assert_equal(db.get_table('test').get_column('b').values, _B)
         assert_is_instance(db.get_table('test').get_column('a'), SQLColumn)
         assert_is_instance(db.get_table('test').get_column('b'), SQLColumn)
 
@@ -516,8 +664,8 @@ class Test_SQLDatabase_Access:
     def test_sql_get_row(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         assert_equal(db.get_row('test', 4).values, (14, 24))
         assert_is_instance(db.get_row('test', 4), SQLRow)
@@ -541,11 +689,11 @@ class Test_SQLDatabase_Access:
     def test_sql_getitem(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
-        assert_equal(db['test']['a'].values, np.arange(10, 20))
-        assert_equal(db['test']['b'].values, np.arange(20, 30))
+        assert_equal(db['test']['a'].values, _A)
+        assert_equal(db['test']['b'].values, _B)
         assert_is_instance(db['test']['a'], SQLColumn)
         assert_is_instance(db['test']['b'], SQLColumn)
 
@@ -567,11 +715,11 @@ class Test_SQLDatabase_Access:
     def test_sql_getitem_tuple(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
-        assert_equal(db['test', 'a'].values, np.arange(10, 20))
-        assert_equal(db['test', 'b'].values, np.arange(20, 30))
+        assert_equal(db['test', 'a'].values, _A)
+        assert_equal(db['test', 'b'].values, _B)
         assert_is_instance(db['test', 'a'], SQLColumn)
         assert_is_instance(db['test', 'b'], SQLColumn)
 
@@ -592,8 +740,8 @@ class Test_SQLDatabase_Access:
     def test_sql_getitem_table_force(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         with pytest.raises(ValueError):
             db[1]
@@ -609,8 +757,8 @@ class Test_SQLDatabase_PropsComms:
     def test_sql_select_where(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         a = db.select('test', columns='a', where={'a': 15})
         assert_equal(a, 15)
@@ -619,7 +767,7 @@ class Test_SQLDatabase_PropsComms:
         assert_equal(a, [(12, 22)])
 
         a = db.select('test', columns=['a', 'b'], where=None)
-        assert_equal(a, list(zip(np.arange(10, 20), np.arange(20, 30))))
+        assert_equal(a, _EXPECT_ROWS)
 
         a = db.select('test', columns=['a', 'b'], where=['a > 12', 'b < 26'])
         assert_equal(a, [(13, 23), (14, 24), (15, 25)])
@@ -627,8 +775,8 @@ class Test_SQLDatabase_PropsComms:
     def test_sql_select_limit_offset(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         a = db.select('test', columns='a', limit=1)
         assert_equal(a, 10)
@@ -639,8 +787,8 @@ class Test_SQLDatabase_PropsComms:
     def test_sql_select_invalid(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         with pytest.raises(sqlite3.OperationalError,
                            match='no such column: c'):
@@ -665,12 +813,11 @@ class Test_SQLDatabase_PropsComms:
     def test_sql_select_order(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30)[::-1])
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B[::-1])
 
         a = db.select('test', order='b')
-        assert_equal(a, list(zip(np.arange(10, 20),
-                                 np.arange(20, 30)[::-1]))[::-1])
+        assert_equal(a, list(zip(_A, _B[::-1]))[::-1])
 
         a = db.select('test', order='b', limit=2)
         assert_equal(a, [(19, 20), (18, 21)])
@@ -690,14 +837,16 @@ class Test_SQLDatabase_PropsComms:
     def test_sql_count(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         assert_equal(db.count('test'), 10)
         assert_equal(db.count('test', where={'a': 15}), 1)
         assert_equal(db.count('test', where={'a': 15, 'b': 22}), 0)
         assert_equal(db.count('test', where='a > 15'), 4)
         assert_equal(db.count('test', where=['a > 15', 'b < 27']), 1)
+        assert_equal(db.count('test', where={'A': np.int64(15)}), 1)
+        assert_equal(db.count('test', where={}), 10)
 
     def test_sql_prop_db(self, tmp_path):
         db = SQLDatabase(':memory:')
@@ -706,6 +855,88 @@ class Test_SQLDatabase_PropsComms:
         db = SQLDatabase(str(tmp_path / 'test.db'))
         assert_equal(db.db, str(tmp_path / 'test.db'))
 
+    def test_sql_pragmas(self, tmp_path):
+        db = SQLDatabase(str(tmp_path / 'test.db'))
+        assert_equal(db.execute('PRAGMA journal_mode;'), [('wal',)])
+        assert_equal(db.execute('PRAGMA synchronous;'), [(1,)])
+        assert_equal(db.execute('PRAGMA temp_store;'), [(2,)])
+
+        db = SQLDatabase(str(tmp_path / 'test2.db'),
+                         pragmas={'journal_mode': 'DELETE',
+                                  'synchronous': 'FULL'})
+        assert_equal(db.execute('PRAGMA journal_mode;'), [('delete',)])
+        assert_equal(db.execute('PRAGMA synchronous;'), [(2,)])
+
+        db = SQLDatabase(':memory:')
+        assert_equal(db.execute('PRAGMA journal_mode;'), [('memory',)])
+        assert_equal(db.execute('PRAGMA temp_store;'), [(2,)])
+
+    def test_sql_schema_cache_external_ddl(self):
+        db = SQLDatabase(':memory:')
+        db.add_table('test', columns=['a'])
+        assert_equal(db.column_names('test'), ['a'])
+
+        db.execute("ALTER TABLE test ADD COLUMN 'B';")
+        db.execute("CREATE TABLE other (x, y);")
+        assert_equal(db.column_names('test'), ['a', 'b'])
+        assert_equal(db.column_names('other'), ['x', 'y'])
+        assert_equal(db.table_names, ['test', 'other'])
+
+        # the returned lists are not the cache itself
+        db.column_names('test').append('c')
+        db.table_names.append('c')
+        assert_equal(db.column_names('test'), ['a', 'b'])
+        assert_equal(db.table_names, ['test', 'other'])
+
+    def test_sql_transaction(self, tmp_path):
+        db = SQLDatabase(str(tmp_path / 'test.db'))
+        with db.transaction():
+            db.add_table('test', columns=['a'])
+            db.add_rows('test', {'a': [1, 2, 3]})
+            assert_true(db._con.in_transaction)
+        assert_false(db._con.in_transaction)
+        assert_true(db.autocommit)
+
+        # changes are visible to other connections after the block
+        other = SQLDatabase(str(tmp_path / 'test.db'))
+        assert_equal(other.get_column('test', 'a').values, [1, 2, 3])
+
+    def test_sql_transaction_rollback(self):
+        db = SQLDatabase(':memory:')
+        db.add_table('test', columns=['a'])
+        db.add_rows('test', {'a': [1, 2]})
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.add_table('other')
+                db.add_column('test', 'b')
+                db.add_rows('test', {'a': [3, 4]})
+                raise RuntimeError('abort')
+        assert_equal(db.table_names, ['test'])
+        assert_equal(db.column_names('test'), ['a'])
+        assert_equal(len(db['test']), 2)
+        assert_equal(db.get_column('test', 'a').values, [1, 2])
+        assert_true(db.autocommit)
+
+    def test_sql_no_autocommit_add_set_column(self, tmp_path):
+        fname = str(tmp_path / 'test.db')
+        db = SQLDatabase(fname, autocommit=False)
+        db.add_table('test', columns=['a'])
+        db.add_rows('test', {'a': [1, 2, 3]})
+        db.commit()
+
+        db.add_column('test', 'b', data=[4, 5, 6])
+        db.set_column('test', 'a', [7, 8, 9])
+        assert_true(db._con.in_transaction)
+
+        # nothing visible to other connections before commit
+        other = sqlite3.connect(fname)
+        assert_equal(other.execute('SELECT * FROM test;').fetchall(),
+                     [(1, 1), (2, 2), (3, 3)])
+        db.commit()
+        assert_equal(other.execute('SELECT * FROM test;').fetchall(),
+                     [(1, 7, 4), (2, 8, 5), (3, 9, 6)])
+        other.close()
+
     def test_sql_prop_table_names(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
@@ -715,18 +946,18 @@ class Test_SQLDatabase_PropsComms:
     def test_sql_prop_column_names(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
         assert_equal(db.column_names('test'), ['a', 'b'])
 
     def test_sql_repr(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
         db.add_table('test2')
-        db.add_column('test2', 'a', data=np.arange(10, 20))
-        db.add_column('test2', 'b', data=np.arange(20, 30))
+        db.add_column('test2', 'a', data=_A)
+        db.add_column('test2', 'b', data=_B)
 
         expect = f"SQLDatabase ':memory:' at {hex(id(db))}:\n"
         expect += "\ttest: 2 columns 10 rows\n"
@@ -749,23 +980,15 @@ class Test_SQLDatabase_PropsComms:
     def test_sql_index_of(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         assert_equal(db.index_of('test', {'a': 15}), 5)
         assert_equal(db.index_of('test', 'b >= 27'), [7, 8, 9])
         assert_equal(db.index_of('test', {'a': 1, 'b': 2}), [])
 
 
-class Test_SQLRow:
-    @property
-    def db(self):
-        db = SQLDatabase(':memory:')
-        db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
-        return db
-
+class Test_SQLRow(_TemplateDBClone):
     def test_row_copy_error(self):
         db = self.db
         row = db['test'][1]
@@ -853,15 +1076,7 @@ class Test_SQLRow:
         assert_equal(repr(row), "SQLRow 0 in table 'test' {'a': 10, 'b': 20}")
 
 
-class Test_SQLTable:
-    @property
-    def db(self):
-        db = SQLDatabase(':memory:')
-        db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
-        return db
-
+class Test_SQLTable(_TemplateDBClone):
     def test_table_copy_error(self):
         db = self.db
         table = db['test']
@@ -876,20 +1091,17 @@ class Test_SQLTable:
         assert_equal(table.name, 'test')
         assert_equal(table.db, db.db)
         assert_equal(table.column_names, ['a', 'b'])
-        assert_equal(table.values, list(zip(np.arange(10, 20),
-                                            np.arange(20, 30))))
+        assert_equal(table.values, _EXPECT_ROWS)
 
     def test_table_select(self):
         db = self.db
         table = db['test']
 
         a = table.select()
-        assert_equal(a, list(zip(np.arange(10, 20),
-                                 np.arange(20, 30))))
+        assert_equal(a, _EXPECT_ROWS)
 
         a = table.select(order='a')
-        assert_equal(a, list(zip(np.arange(10, 20),
-                                 np.arange(20, 30))))
+        assert_equal(a, _EXPECT_ROWS)
 
         a = table.select(order='a', limit=2)
         assert_equal(a, [(10, 20), (11, 21)])
@@ -916,8 +1128,7 @@ class Test_SQLTable:
         a = table.as_table()
         assert_is_instance(a, Table)
         assert_equal(a.colnames, ['a', 'b'])
-        assert_equal(a, Table(names=['a', 'b'], data=[np.arange(10, 20),
-                                                      np.arange(20, 30)]))
+        assert_equal(a, Table(names=['a', 'b'], data=[_A, _B]))
 
     def test_table_as_table_empty(self):
         db = SQLDatabase(':memory:')
@@ -934,6 +1145,34 @@ class Test_SQLTable:
         table = db['test']
         assert_equal(len(table), 10)
 
+        table.add_rows({'a': [1, 2], 'b': [3, 4]})
+        assert_equal(len(table), 12)
+        assert_equal(len(table['a']), 12)
+        table.delete_row(0)
+        assert_equal(len(table), 11)
+        assert_equal(len(table), db.count('test'))
+
+    def test_table_len_external_table(self):
+        db = self.db
+        db.execute("CREATE TABLE other (x, y);")
+        db.execute("INSERT INTO other VALUES (1, 2), (3, 4);")
+        assert_equal(len(db['other']), 2)
+
+    def test_table_len_raw_sql(self):
+        db = self.db
+        table = db['test']
+        assert_equal(len(table), 10)
+
+        db.execute("INSERT INTO test VALUES (NULL, 1, 2);")
+        assert_equal(len(table), 11)
+        assert_equal(len(table['a']), 11)
+        assert_equal(table[10]['a'], 1)
+
+        db.executemany(f"DELETE FROM test WHERE {_ID_KEY}=?;",
+                       [(10,), (11,)])
+        assert_equal(len(table), 9)
+        assert_equal(len(table), db.count('test'))
+
     def test_table_iter(self):
         db = self.db
         table = db['test']
@@ -943,6 +1182,31 @@ class Test_SQLTable:
             assert_equal(i, (v, v + 10))
             v += 1
 
+    def test_table_iter_using_db(self):
+        db = self.db
+        table = db['test']
+
+        # other queries inside the loop must not break the iteration
+        rows = []
+        for i in table:
+            assert_equal(len(table), 10)
+            rows.append(i)
+        assert_equal(rows, _EXPECT_ROWS)
+
+    def test_table_iter_changing_db(self):
+        db = self.db
+        db.add_table('big', columns=['x'])
+        db.add_rows('big', {'x': np.arange(3000)})
+
+        # rows added inside the loop are not iterated
+        n = 0
+        for i in db['big']:
+            if n % 1000 == 0:
+                db.add_rows('big', {'x': [-1]})
+            n += 1
+        assert_equal(n, 3000)
+        assert_equal(len(db['big']), 3003)
+
     def test_table_contains(self):
         db = self.db
         table = db['test']
@@ -968,18 +1232,13 @@ class Test_SQLTable:
         db = self.db
         table = db['test']
 
-        table.add_column('c', data=np.arange(10, 20))
+        table.add_column('c', data=_A)
         assert_equal(table.column_names, ['a', 'b', 'c'])
-        assert_equal(table.values, list(zip(np.arange(10, 20),
-                                            np.arange(20, 30),
-                                            np.arange(10, 20))))
+        assert_equal(table.values, list(zip(_A, _B, _A)))
 
-        table.add_column('d', data=np.arange(20, 30))
+        table.add_column('d', data=_B)
         assert_equal(table.column_names, ['a', 'b', 'c', 'd'])
-        assert_equal(table.values, list(zip(np.arange(10, 20),
-                                            np.arange(20, 30),
-                                            np.arange(10, 20),
-                                            np.arange(20, 30))))
+        assert_equal(table.values, list(zip(_A, _B, _A, _B)))
 
     def test_table_get_column(self):
         db = self.db
@@ -987,11 +1246,11 @@ class Test_SQLTable:
 
         a = table.get_column('a')
         assert_is_instance(a, SQLColumn)
-        assert_equal(a.values, np.arange(10, 20))
+        assert_equal(a.values, _A)
 
         a = table.get_column('b')
         assert_is_instance(a, SQLColumn)
-        assert_equal(a.values, np.arange(20, 30))
+        assert_equal(a.values, _B)
 
     def test_table_set_column(self):
         db = self.db
@@ -1000,7 +1259,7 @@ class Test_SQLTable:
         table.set_column('a', np.arange(5, 15))
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, list(zip(np.arange(5, 15),
-                                            np.arange(20, 30))))
+                                            _B)))
 
     def test_table_set_column_invalid(self):
         db = self.db
@@ -1064,7 +1323,7 @@ class Test_SQLTable:
         table = db['test']
 
         table.set_row(0, {'a': 5, 'b': 15})
-        expect = np.transpose([np.arange(10, 20), np.arange(20, 30)])
+        expect = _EXPECT_BASE.copy()
         expect[0] = [5, 15]
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, expect)
@@ -1109,8 +1368,8 @@ class Test_SQLTable:
         table = db['test']
         assert_is_instance(table, SQLTable)
 
-        assert_equal(table['a'].values, np.arange(10, 20))
-        assert_equal(table['b'].values, np.arange(20, 30))
+        assert_equal(table['a'].values, _A)
+        assert_equal(table['b'].values, _B)
 
         with pytest.raises(KeyError):
             table['c']
@@ -1120,7 +1379,7 @@ class Test_SQLTable:
         table = db['test']
         assert_is_instance(table, SQLTable)
 
-        assert_equal(table[('a',)].values, np.arange(10, 20))
+        assert_equal(table[('a',)].values, _A)
         assert_is_instance(table[('a',)], SQLColumn)
         assert_equal(table[(1,)].values, (11, 21))
         assert_is_instance(table[(1,)], SQLRow)
@@ -1175,7 +1434,7 @@ class Test_SQLTable:
         assert_is_instance(table, SQLTable)
 
         table[0] = {'a': 5, 'b': 15}
-        expect = np.transpose([np.arange(10, 20), np.arange(20, 30)])
+        expect = _EXPECT_BASE.copy()
         expect[0] = [5, 15]
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, expect)
@@ -1196,17 +1455,17 @@ class Test_SQLTable:
         assert_is_instance(table, SQLTable)
 
         table['a'] = np.arange(40, 50)
-        expect = np.transpose([np.arange(40, 50), np.arange(20, 30)])
+        expect = np.column_stack([np.arange(40, 50), _B])
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, expect)
 
-        table['b'] = np.arange(10, 20)
-        expect = np.transpose([np.arange(40, 50), np.arange(10, 20)])
+        table['b'] = _A
+        expect = np.column_stack([np.arange(40, 50), _A])
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, expect)
 
         with pytest.raises(KeyError):
-            table['c'] = np.arange(10, 20)
+            table['c'] = _A
 
     def test_table_setitem_tuple(self):
         db = self.db
@@ -1214,7 +1473,7 @@ class Test_SQLTable:
         assert_is_instance(table, SQLTable)
 
         table[('a',)] = np.arange(40, 50)
-        expect = np.transpose([np.arange(40, 50), np.arange(20, 30)])
+        expect = np.column_stack([np.arange(40, 50), _B])
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, expect)
 
@@ -1224,15 +1483,15 @@ class Test_SQLTable:
         assert_equal(table.values, expect)
 
         with pytest.raises(KeyError):
-            table[('c',)] = np.arange(10, 20)
+            table[('c',)] = _A
         with pytest.raises(IndexError):
-            table[(11,)] = np.arange(10, 20)
+            table[(11,)] = _A
 
     def test_table_setitem_tuple_multiple(self):
         db = self.db
         table = db['test']
         assert_is_instance(table, SQLTable)
-        expect = np.transpose([np.arange(10, 20), np.arange(20, 30)])
+        expect = _EXPECT_BASE.copy()
 
         table[('a', 1)] = 57
         expect[1, 0] = 57
@@ -1248,16 +1507,16 @@ class Test_SQLTable:
         expect[[2, 7], 1] = -888
         assert_equal(table.values, expect)
 
-        with pytest.raises(KeyError):
-            table[('c',)] = np.arange(10, 20)
-        with pytest.raises(IndexError):
-            table[(11,)] = np.arange(10, 20)
-        with pytest.raises(KeyError):
-            table['a', 'c'] = None
-        with pytest.raises(KeyError):
-            table[2:5] = 2
-        with pytest.raises(KeyError):
-            table[1, 2, 3] = 3
+    @pytest.mark.parametrize('key, value, error',
+                             [(('c',), _A, KeyError),
+                              ((11,), _A, IndexError),
+                              (('a', 'c'), None, KeyError),
+                              (slice(2, 5), 2, KeyError),
+                              ((1, 2, 3), 3, KeyError)])
+    def test_table_setitem_invalid(self, key, value, error):
+        table = self.db['test']
+        with pytest.raises(error):
+            table[key] = value
 
     def test_table_indexof(self):
         db = self.db
@@ -1272,12 +1531,12 @@ class Test_SQLTable:
         assert_is_instance(table, SQLTable)
 
         table.delete_row(0)
-        expect = np.transpose([np.arange(11, 20), np.arange(21, 30)])
+        expect = np.column_stack([np.arange(11, 20), np.arange(21, 30)])
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, expect)
 
         table.delete_row(-1)
-        expect = np.transpose([np.arange(11, 19), np.arange(21, 29)])
+        expect = np.column_stack([np.arange(11, 19), np.arange(21, 29)])
         assert_equal(table.column_names, ['a', 'b'])
         assert_equal(table.values, expect)
 
@@ -1302,7 +1561,7 @@ class Test_SQLTable:
         assert_is_instance(table, SQLTable)
 
         table.delete_column('a')
-        expect = np.transpose([np.arange(20, 30)])
+        expect = np.column_stack([_B])
         assert_equal(table.column_names, ['b'])
         assert_equal(table.values, expect)
 
@@ -1312,15 +1571,7 @@ class Test_SQLTable:
             table.delete_column('c')
 
 
-class Test_SQLColumn:
-    @property
-    def db(self):
-        db = SQLDatabase(':memory:')
-        db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
-        return db
-
+class Test_SQLColumn(_TemplateDBClone):
     def test_column_copy_error(self):
         db = self.db
         col = db['test']['a']
@@ -1336,7 +1587,7 @@ class Test_SQLColumn:
 
         assert_equal(column.name, 'a')
         assert_equal(column.table, 'test')
-        assert_equal(column.values, np.arange(10, 20))
+        assert_equal(column.values, _A)
 
     def test_column_len(self):
         db = self.db
@@ -1367,6 +1618,24 @@ class Test_SQLColumn:
             assert_equal(i, v)
             v += 1
 
+        # other queries inside the loop must not break the iteration
+        assert_equal([(i, column[0]) for i in column],
+                     [(i, 10) for i in range(10, 20)])
+
+    def test_column_iter_changing_db(self):
+        db = self.db
+        column = db['test']['a']
+
+        # values changed or rows added inside the loop are not iterated
+        values = []
+        for i, v in enumerate(column):
+            column[i] = -v
+            if i == 0:
+                db.add_rows('test', {'a': [100]})
+            values.append(v)
+        assert_equal(values, list(range(10, 20)))
+        assert_equal(column.values, [-i for i in range(10, 20)] + [100])
+
     def test_column_getitem_int(self):
         db = self.db
         table = db['test']
@@ -1374,11 +1643,21 @@ class Test_SQLColumn:
 
         assert_equal(column[0], 10)
         assert_equal(column[-1], 19)
+        assert_equal(column[np.int64(1)], 11)
+        assert_equal(db.get_item('test', 'a', np.int64(-2)), 18)
 
+    def test_column_getitem_int_after_delete(self):
+        db = self.db
+        db.delete_row('test', 2)
+        column = db['test']['a']
+
+        assert_equal(column[2], 13)
+        assert_equal(column[-1], 19)
+        assert_equal(db.get_item('test', 'b', 8), 29)
         with pytest.raises(IndexError):
-            column[10]
-        with pytest.raises(IndexError):
-            column[-11]
+            column[9]
+        with pytest.raises(KeyError):
+            db.get_item('test', 'c', 0)
 
     def test_column_getitem_list(self):
         db = self.db
@@ -1388,11 +1667,6 @@ class Test_SQLColumn:
         assert_equal(column[[0, 1]], [10, 11])
         assert_equal(column[[-2, -1]], [18, 19])
 
-        with pytest.raises(IndexError):
-            column[[10, 11]]
-        with pytest.raises(IndexError):
-            column[[-11, -12]]
-
     def test_column_getitem_slice(self):
         db = self.db
         table = db['test']
@@ -1403,16 +1677,12 @@ class Test_SQLColumn:
         assert_equal(column[2:5], [12, 13, 14])
         assert_equal(column[::-1], [19, 18, 17, 16, 15, 14, 13, 12, 11, 10])
 
-    def test_column_getitem_tuple(self):
-        db = self.db
-        table = db['test']
-        column = table['a']
-        with pytest.raises(IndexError):
-            column[('a',)]
+    @pytest.mark.parametrize('key', [10, -11, [10, 11], [-11, -12],
+                                     ('a',), (1,), (1, 2)])
+    def test_column_getitem_invalid(self, key):
+        column = self.db['test']['a']
         with pytest.raises(IndexError):
-            column[(1,)]
-        with pytest.raises(IndexError):
-            column[1, 2]
+            column[key]
 
     def test_column_setitem_int(self):
         db = self.db
@@ -1436,17 +1706,28 @@ class Test_SQLColumn:
         assert_equal(db.get_column('test', 'a').values, [-1, -1, 2, -1, 2,
                                                          -1, -1, -1, -1, -1])
 
-    def test_column_setitem_invalid(self):
+    def test_column_setitem_list_values(self):
         db = self.db
-        table = db['test']
-        column = table['a']
+        column = db['test']['a']
 
+        column[[1, 3]] = [100, 'x']
+        column[-2:] = None
+        column[np.arange(10) == 0] = 1.5
+        assert_equal(db.get_column('test', 'a').values,
+                     [1.5, 100, 12, 'x', 14, 15, 16, 17, None, None])
+        assert_equal(db.get_column('test', 'b').values, _B)
+
+        with pytest.raises(ValueError):
+            column[[1, 2, 3]] = [1, 2]
         with pytest.raises(IndexError):
-            column[10] = 10
-        with pytest.raises(IndexError):
-            column[-11] = 10
+            column[[1, 10]] = 0
+
+    @pytest.mark.parametrize('key, value', [(10, 10), (-11, 10),
+                                            ((2, 4), [10, 11])])
+    def test_column_setitem_invalid(self, key, value):
+        column = self.db['test']['a']
         with pytest.raises(IndexError):
-            column[2, 4] = [10, 11]
+            column[key] = value
 
 
 class Test_SQLTableMapping:
@@ -1454,8 +1735,8 @@ class Test_SQLTableMapping:
     def table(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         db.add_table('mapping')
         db.add_column('mapping', 'keywords', ['key a', 'key-b'])
@@ -1468,12 +1749,10 @@ class Test_SQLTableMapping:
         table = self.table
 
         a = table.select()
-        assert_equal(a, list(zip(np.arange(10, 20),
-                                 np.arange(20, 30))))
+        assert_equal(a, _EXPECT_ROWS)
 
         a = table.select(order='key a')
-        assert_equal(a, list(zip(np.arange(10, 20),
-                                 np.arange(20, 30))))
+        assert_equal(a, _EXPECT_ROWS)
 
         a = table.select(order='key-b', limit=2)
         assert_equal(a, [(10, 20), (11, 21)])
@@ -1491,15 +1770,15 @@ class Test_SQLTableMapping:
     def test_table_getitem_str(self):
         table = self.table
 
-        assert_equal(table['key a'].values, np.arange(10, 20))
-        assert_equal(table['key-b'].values, np.arange(20, 30))
+        assert_equal(table['key a'].values, _A)
+        assert_equal(table['key-b'].values, _B)
 
         with pytest.raises(KeyError):
             table['c']
 
     def test_table_getitem_tuple(self):
         table = self.table
-        assert_equal(table[('key a',)].values, np.arange(10, 20))
+        assert_equal(table[('key a',)].values, _A)
         assert_is_instance(table[('key a',)], SQLColumn)
         assert_equal(table[(1,)].values, (11, 21))
         assert_is_instance(table[(1,)], SQLRow)
@@ -1549,7 +1828,7 @@ class Test_SQLTableMapping:
         table = self.table
 
         table.set_row(0, {'key a': 5, 'key-b': 15})
-        expect = np.transpose([np.arange(10, 20), np.arange(20, 30)])
+        expect = _EXPECT_BASE.copy()
         expect[0] = [5, 15]
         assert_equal(table.column_names, ['key a', 'key-b'])
         assert_equal(table.values, expect)
@@ -1593,12 +1872,12 @@ class Test_SQLTableMapping:
 
         a = table.get_column('key a')
         assert_is_instance(a, SQLColumn)
-        assert_equal(a.values, np.arange(10, 20))
+        assert_equal(a.values, _A)
         assert_equal(a.name, 'a')
 
         a = table.get_column('key-b')
         assert_is_instance(a, SQLColumn)
-        assert_equal(a.values, np.arange(20, 30))
+        assert_equal(a.values, _B)
         assert_equal(a.name, 'b')
 
     def test_table_set_column(self):
@@ -1607,7 +1886,7 @@ class Test_SQLTableMapping:
         table.set_column('key a', np.arange(5, 15))
         assert_equal(table.column_names, ['key a', 'key-b'])
         assert_equal(table.values, list(zip(np.arange(5, 15),
-                                            np.arange(20, 30))))
+                                            _B)))
 
     def test_table_set_column_invalid(self):
         table = self.table
@@ -1621,18 +1900,13 @@ class Test_SQLTableMapping:
     def test_table_add_column(self):
         table = self.table
 
-        table.add_column('key!c', data=np.arange(10, 20))
+        table.add_column('key!c', data=_A)
         assert_equal(table.column_names, ['key a', 'key-b', 'key!c'])
-        assert_equal(table.values, list(zip(np.arange(10, 20),
-                                            np.arange(20, 30),
-                                            np.arange(10, 20))))
+        assert_equal(table.values, list(zip(_A, _B, _A)))
 
-        table.add_column('key_d', data=np.arange(20, 30))
+        table.add_column('key_d', data=_B)
         assert_equal(table.column_names, ['key a', 'key-b', 'key!c', 'key_d'])
-        assert_equal(table.values, list(zip(np.arange(10, 20),
-                                            np.arange(20, 30),
-                                            np.arange(10, 20),
-                                            np.arange(20, 30))))
+        assert_equal(table.values, list(zip(_A, _B, _A, _B)))
 
     def test_table_contains(self):
         table = self.table
@@ -1664,13 +1938,13 @@ class Test_SQLTableMapping:
         assert_is_instance(a, Table)
         assert_equal(a.colnames, ['key a', 'key-b'])
         assert_equal(a, Table(names=['key a', 'key-b'],
-                              data=[np.arange(10, 20), np.arange(20, 30)]))
+                              data=[_A, _B]))
 
     def test_table_setitem_int(self):
         table = self.table
 
         table[0] = {'key a': 5, 'key-b': 15}
-        expect = np.transpose([np.arange(10, 20), np.arange(20, 30)])
+        expect = _EXPECT_BASE.copy()
         expect[0] = [5, 15]
         assert_equal(table.column_names, ['key a', 'key-b'])
         assert_equal(table.values, expect)
@@ -1689,23 +1963,23 @@ class Test_SQLTableMapping:
         table = self.table
 
         table['key a'] = np.arange(40, 50)
-        expect = np.transpose([np.arange(40, 50), np.arange(20, 30)])
+        expect = np.column_stack([np.arange(40, 50), _B])
         assert_equal(table.column_names, ['key a', 'key-b'])
         assert_equal(table.values, expect)
 
-        table['key-b'] = np.arange(10, 20)
-        expect = np.transpose([np.arange(40, 50), np.arange(10, 20)])
+        table['key-b'] = _A
+        expect = np.column_stack([np.arange(40, 50), _A])
         assert_equal(table.column_names, ['key a', 'key-b'])
         assert_equal(table.values, expect)
 
         with pytest.raises(KeyError):
-            table['c'] = np.arange(10, 20)
+            table['c'] = _A
 
     def test_table_setitem_tuple(self):
         table = self.table
 
         table[('key a',)] = np.arange(40, 50)
-        expect = np.transpose([np.arange(40, 50), np.arange(20, 30)])
+        expect = np.column_stack([np.arange(40, 50), _B])
         assert_equal(table.column_names, ['key a', 'key-b'])
         assert_equal(table.values, expect)
 
@@ -1716,7 +1990,7 @@ class Test_SQLTableMapping:
 
     def test_table_setitem_tuple_multiple(self):
         table = self.table
-        expect = np.transpose([np.arange(10, 20), np.arange(20, 30)])
+        expect = _EXPECT_BASE.copy()
 
         table[('key a', 1)] = 57
         expect[1, 0] = 57
@@ -1745,8 +2019,8 @@ class Test_SQLRowMapping:
     def table(self):
         db = SQLDatabase(':memory:')
         db.add_table('test')
-        db.add_column('test', 'a', data=np.arange(10, 20))
-        db.add_column('test', 'b', data=np.arange(20, 30))
+        db.add_column('test', 'a', data=_A)
+        db.add_column('test', 'b', data=_B)
 
         db.add_table('mapping')
         db.add_column('mapping', 'keywords', ['key a', 'key-b'])
@@ -6,9 +6,8 @@ import numpy as np
 
 from astropop.photometry import (background, segfind, daofind, starfind,
                                  median_fwhm)
+from astropop.photometry.detection import _gaussian_convolve
 from astropop.math.models import MoffatEquations, GaussianEquations
-from astropop.math.array import trim_array
-from astropy.utils import NumpyRNGContext
 from astropy.stats import gaussian_fwhm_to_sigma
 
 from astropop.testing import *
@@ -16,105 +15,152 @@ from astropop.testing import *
 
 def gen_bkg(size, level, rdnoise, rng_seed=123, dtype='f8'):
     """Generate a simple background image."""
-    # create a level image
-    im = np.ones(size[::-1], dtype)*level
-
-    # reate the gaussian read noise image to sum
-    with NumpyRNGContext(rng_seed):
-        noise = np.random.normal(loc=0, scale=rdnoise, size=size[::-1])
-    im += noise
+    # gaussian read noise around the level, summed inplace. A local legacy
+    # RandomState keeps the noise realization the tests are tuned against
+    rng = np.random.RandomState(rng_seed)
+    im = rng.standard_normal(size=size[::-1])
+    im *= rdnoise
+    im += level
 
     # poisonic not needed?
-    return im
+    return im.astype(dtype, copy=False)
 
 
 def gen_position_flux(size, number, low, high, rng_seed=123, fwhm=5):
     """Generate x, y, and flux lists for stars."""
-    for i in range(number):
-        with NumpyRNGContext(rng_seed):
-            x = np.random.randint(fwhm, size[0]-fwhm, number)
-        with NumpyRNGContext(rng_seed+i):
-            y = np.random.randint(fwhm, size[1]-fwhm, number)
+    # same streams of the former reseeding loop: x from the first seed and
+    # y from the last one
+    x = np.random.RandomState(rng_seed).randint(fwhm, size[0]-fwhm, number)
+    y = np.random.RandomState(rng_seed+max(number-1, 0)).randint(
+        fwhm, size[1]-fwhm, number)
     # lets sample the flux in the range. Avoid tests flakinness
     step = float(high-low)/number
     flux = np.arange(number)*step + low
     return np.array(x), np.array(y), np.sort(flux)[::-1]
 
 
-def gen_stars_moffat(size, x, y, flux, fwhm):
-    """Generate stars image to add to background."""
-    power = 1.5
-    width = 0.5*fwhm/np.sqrt(2**(1/power)-1)
+def _render_stars(im, x, y, box_size, model, **params):
+    """Add a 2D model of all the stars to `im`, each one inside its own box.
+
+    The boxes are the same of `~astropop.math.array.trim_array`. All the
+    stars are evaluated at once in a (n_stars, box, box) stack, summed by
+    pixel with a single `~numpy.bincount` and added inplace to the touched
+    pixels only.
+    """
+    ny, nx = im.shape
+    x = np.atleast_1d(x)
+    y = np.atleast_1d(y)
+    if x.size == 0:
+        return im
+    half = np.broadcast_to(box_size, x.shape)/2
+    x_min = np.maximum((x-half).astype(int), 0)
+    x_max = np.minimum((x+half).astype(int)+1, nx)
+    y_min = np.maximum((y-half).astype(int), 0)
+    y_max = np.minimum((y+half).astype(int)+1, ny)
+
+    # one box shape that fits all stars. Pixels out of each star box are
+    # discarded
+    bh = np.max(y_max - y_min)
+    bw = np.max(x_max - x_min)
+    gx = x_min[:, None, None] + np.arange(bw)[None, None, :]
+    gy = y_min[:, None, None] + np.arange(bh)[None, :, None]
+    params = {k: np.reshape(np.broadcast_to(v, x.shape), (-1, 1, 1))
+              for k, v in params.items()}
+    stamps = model(gx, gy, x[:, None, None], y[:, None, None], **params)
+    inside = (gx < x_max[:, None, None]) & (gy < y_max[:, None, None])
+
+    pixels, index = np.unique((gy*nx + gx)[inside], return_inverse=True)
+    im.reshape(-1)[pixels] += np.bincount(index, weights=stamps[inside])
+    return im
 
-    im = np.zeros(size[::-1])
-    grid_y, grid_x = np.indices(size[::-1])
-    for xi, yi, fi in zip(x, y, flux):
-        imi, gxi, gyi = trim_array(np.zeros_like(im), box_size=5*fwhm,
-                                   position=(xi, yi),
-                                   indices=(grid_y, grid_x))
-        imi += MoffatEquations.model_2d(gxi, gyi, xi, yi, flux=fi,
-                                        width=width, power=power, sky=0)
-        im[gyi.min():gyi.max()+1, gxi.min():gxi.max()+1] += imi
 
-    return im
+def gen_stars_moffat(size, x, y, flux, fwhm, out=None):
+    """Generate stars image to add to background.
+
+    If `out` is given, the stars are added inplace to it.
+    """
+    if out is None:
+        out = np.zeros(size[::-1])
+    power = 1.5
+    width = 0.5*fwhm/np.sqrt(2**(1/power)-1)
+    return _render_stars(out, x, y, 5*fwhm, MoffatEquations.model_2d,
+                         flux=flux, width=width, power=power, sky=0)
 
 
-def gen_stars_gaussian(size, x, y, flux, sigma, theta):
-    """Generate stars image to add to background."""
-    im = np.zeros(size[::-1])
-    grid_y, grid_x = np.indices(size[::-1])
+def gen_stars_gaussian(size, x, y, flux, sigma, theta, out=None):
+    """Generate stars image to add to background.
 
+    If `out` is given, the stars are added inplace to it.
+    """
+    if out is None:
+        out = np.zeros(size[::-1])
     try:
         sigma_x, sigma_y = sigma
     except (TypeError, ValueError):
         sigma_x = sigma_y = sigma
 
-    bc = np.broadcast_arrays(x, y, flux, sigma_x, sigma_y, theta)
-
-    for xi, yi, fi, sx, sy, ti in zip(*bc):
-        imi, gxi, gyi = trim_array(np.zeros_like(im), box_size=5*max(sx, sy),
-                                   position=(xi, yi),
-                                   indices=(grid_y, grid_x))
-        imi += GaussianEquations.model_2d(gxi, gyi, xi, yi, flux=fi,
-                                          sigma_x=sx, sigma_y=sy, theta=ti,
-                                          sky=0)
-        im[gyi.min():gyi.max()+1, gxi.min():gxi.max()+1] += imi
-
-    return im
+    box_size = 5*np.maximum(sigma_x, sigma_y)
+    return _render_stars(out, x, y, box_size, GaussianEquations.model_2d,
+                         flux=flux, sigma_x=sigma_x, sigma_y=sigma_y,
+                         theta=theta, sky=0)
 
 
 def gen_image(size, x, y, flux, sky, rdnoise, model='gaussian', **kwargs):
     """Generate a full image of stars with noise."""
-    im = np.ones(size)*sky
     if rdnoise > 0:
         im = gen_bkg(size, sky, rdnoise)
+    else:
+        im = np.full(size[::-1], sky, dtype='f8')
 
     if model == 'moffat':
         fwhm = kwargs.pop('fwhm')
-        im += gen_stars_moffat(size, x, y, flux, fwhm)
+        gen_stars_moffat(size, x, y, flux, fwhm, out=im)
     if model == 'gaussian':
         sigma = kwargs.pop('sigma', 2.0)
         theta = kwargs.pop('theta', 0)
-        im += gen_stars_gaussian(size, x, y, flux, sigma, theta)
+        gen_stars_gaussian(size, x, y, flux, sigma, theta, out=im)
 
     # can pass the poisson noise
     if not kwargs.get('skip_poisson', False):
         # prevent negative number error
-        negatives = np.where(im < 0)
-        im = np.random.poisson(np.absolute(im))
+        negatives = im < 0
+        im = np.random.poisson(np.absolute(im, out=im))
         # restore the negatives
-        im[negatives] = -im[negatives]
+        np.negative(im, out=im, where=negatives)
+    return im
+
+
+@pytest.fixture(scope='module')
+def bkg_2048():
+    """2048x2048 background, level 800 and rdnoise 20. Read-only."""
+    im = gen_bkg((2048, 2048), 800, 20)
+    im.setflags(write=False)
+    return im
+
+
+@pytest.fixture(scope='module')
+def bkg_1024():
+    """1024x1024 background, level 800 and rdnoise 20. Read-only."""
+    im = gen_bkg((1024, 1024), 800, 20)
+    im.setflags(write=False)
+    return im
+
+
+@pytest.fixture(scope='module')
+def stars_1024(bkg_1024):
+    """50 moffat stars, fwhm 5, over `bkg_1024`. Read-only."""
+    size = (1024, 1024)
+    x, y, f = gen_position_flux(size, 50, 1500, 25000)
+    im = gen_stars_moffat(size, x, y, f, 5, out=bkg_1024.copy())
+    im.setflags(write=False)
     return im
 
 
 @pytest.mark.flaky(reruns=5, reruns_delay=0.1)
 class Test_Background():
-    def test_background_unkown_methods(self):
+    def test_background_unkown_methods(self, bkg_2048):
         # unkown methods should fail
-        size = (2048, 2048)
-        level = 800
-        rdnoise = 20
-        image_test = gen_bkg(size, level, rdnoise)
+        image_test = bkg_2048
 
         box_size = 64
         filter_size = 3
@@ -128,11 +174,11 @@ class Test_Background():
                 background(image_test, box_size, filter_size,
                            rms_method=i)
 
-    def test_background_simple_nocosmic(self):
+    def test_background_simple_nocosmic(self, bkg_2048):
         size = (2048, 2048)
         level = 800
         rdnoise = 20
-        image_test = gen_bkg(size, level, rdnoise)
+        image_test = bkg_2048
 
         box_size = 64
         filter_size = 3
@@ -148,8 +194,8 @@ class Test_Background():
 
         assert_equal(bkg.shape, size)
         assert_equal(rms.shape, size)
-        assert_almost_equal(bkg, np.ones(size)*level, decimal=0)
-        assert_almost_equal(rms, np.ones(size)*rdnoise, decimal=0)
+        assert_almost_equal(bkg, level, decimal=0)
+        assert_almost_equal(rms, rdnoise, decimal=0)
 
     def test_background_simple_negative_sky(self):
         size = (2048, 2048)
@@ -171,25 +217,27 @@ class Test_Background():
 
         assert_equal(bkg.shape, size)
         assert_equal(rms.shape, size)
-        assert_almost_equal(bkg, np.ones(size)*level, decimal=0)
-        assert_almost_equal(rms, np.ones(size)*rdnoise, decimal=0)
+        assert_almost_equal(bkg, level, decimal=0)
+        assert_almost_equal(rms, rdnoise, decimal=0)
 
-    def test_background_simple_cosmic(self):
+    def test_background_simple_cosmic(self, bkg_2048):
         size = (2048, 2048)
         level = 800
         rdnoise = 20
-        image_test = gen_bkg(size, level, rdnoise)
+        image_test = bkg_2048.copy()
+        rng = np.random.default_rng(123)
 
-        # add some cosmics
-        for i in range(100):  # 100 single pixel cosmics
-            x = np.random.randint(0, size[0]-1)
-            y = np.random.randint(0, size[1]-1)
-            image_test[x, y] = np.random.randint(16000, 64000)
+        # add some cosmics. 100 single pixel cosmics
+        x = rng.integers(0, size[0]-1, 100)
+        y = rng.integers(0, size[1]-1, 100)
+        image_test[x, y] = rng.integers(16000, 64000, 100)
 
-        for i in range(4):  # 4 square block cosmics
-            x = np.random.randint(0, size[0]-3)
-            y = np.random.randint(0, size[1]-3)
-            image_test[x:x+2, y:y+2] = np.random.randint(16000, 64000)
+        # 4 square block cosmics
+        x = rng.integers(0, size[0]-3, 4)
+        y = rng.integers(0, size[1]-3, 4)
+        v = rng.integers(16000, 64000, 4)
+        for xi, yi, vi in zip(x, y, v):
+            image_test[xi:xi+2, yi:yi+2] = vi
 
         box_size = 64
         filter_size = 3
@@ -205,20 +253,14 @@ class Test_Background():
 
         assert_equal(bkg.shape, size)
         assert_equal(rms.shape, size)
-        assert_almost_equal(bkg, np.ones(size)*level, decimal=0)
-        assert_almost_equal(rms, np.ones(size)*rdnoise, decimal=0)
+        assert_almost_equal(bkg, level, decimal=0)
+        assert_almost_equal(rms, rdnoise, decimal=0)
 
-    def test_background_stars(self):
+    def test_background_stars(self, stars_1024):
         size = (1024, 1024)
-        stars_n = 50
-        flux_low = 1500
-        flux_high = 25000
-        fwhm = 5
         level = 800
         rdnoise = 20
-        x, y, f = gen_position_flux(size, stars_n, flux_low, flux_high)
-        image_test = gen_bkg(size, level, rdnoise)
-        image_test += gen_stars_moffat(size, x, y, f, fwhm)
+        image_test = stars_1024
 
         box_size = 64
         filter_size = 3
@@ -235,33 +277,24 @@ class Test_Background():
         assert_equal(bkg.shape, size)
         assert_equal(rms.shape, size)
         # with stars, the dispersion increases
-        assert_almost_equal(bkg, np.ones(size)*level, decimal=-1)
-        assert_almost_equal(rms, np.ones(size)*rdnoise, decimal=-1)
+        assert_almost_equal(bkg, level, decimal=-1)
+        assert_almost_equal(rms, rdnoise, decimal=-1)
 
     @pytest.mark.parametrize('global_bkg', [True, False])
     @pytest.mark.parametrize('method', ['mean', 'median', 'mode'])
-    def test_background_no_changes_inplace(self, method, global_bkg):
+    def test_background_no_changes_inplace(self, method, global_bkg,
+                                           stars_1024):
         # check if background changes the default image inplace.
-        size = (1024, 1024)
-        stars_n = 50
-        flux_low = 1500
-        flux_high = 25000
-        fwhm = 5
-        level = 800
-        rdnoise = 20
-        x, y, f = gen_position_flux(size, stars_n, flux_low, flux_high)
-        image_test = gen_bkg(size, level, rdnoise)
-        image_test += gen_stars_moffat(size, x, y, f, fwhm)
-
+        image_test = stars_1024
         image_test_o = image_test.copy()
         background(image_test, 64, 3, bkg_method=method, global_bkg=global_bkg)
         assert_equal(image_test_o, image_test)
 
-    def test_background_touple_sclip(self):
+    def test_background_touple_sclip(self, bkg_1024):
         size = (1024, 1024)
         level = 800
         rdnoise = 20
-        image_test = gen_bkg(size, level, rdnoise)
+        image_test = bkg_1024
 
         box_size = 64
         filter_size = 3
@@ -278,8 +311,29 @@ class Test_Background():
 
         assert_equal(bkg.shape, size)
         assert_equal(rms.shape, size)
-        assert_almost_equal(bkg, np.ones(size)*level, decimal=0)
-        assert_almost_equal(rms, np.ones(size)*rdnoise, decimal=0)
+        assert_almost_equal(bkg, level, decimal=0)
+        assert_almost_equal(rms, rdnoise, decimal=0)
+
+
+@pytest.mark.parametrize('fwhm', [1, 2, 3, 5])
+def test_gaussian_convolve_separable(fwhm):
+    from astropy.convolution import convolve
+    from photutils.segmentation import make_2dgaussian_kernel
+    data = gen_bkg((64, 48), 800, 20)
+    data[20, 30] += 10000
+    ksize = int(np.max([np.ceil(2*fwhm)+1, 3]))
+    kernel = make_2dgaussian_kernel(fwhm=fwhm, size=ksize)
+    expect = convolve(data, kernel, normalize_kernel=True)
+    assert_almost_equal(_gaussian_convolve(data, fwhm), expect, decimal=10)
+
+    # masked and non-finite data use the full 2D convolution
+    mask = np.zeros(data.shape, dtype=bool)
+    mask[10, 10] = True
+    expect = convolve(data, kernel, mask=mask, normalize_kernel=True)
+    assert_equal(_gaussian_convolve(data, fwhm, mask=mask), expect)
+    data[10, 10] = np.nan
+    expect = convolve(data, kernel, normalize_kernel=True)
+    assert_equal(_gaussian_convolve(data, fwhm), expect)
 
 
 @pytest.mark.flaky(reruns=5, reruns_delay=0.1)
@@ -8,10 +8,10 @@ import pytest
 from astropy.io import fits
 
 from astropy.utils import NumpyRNGContext
-from astropop.framedata import FrameData, PixelMaskFlags
+from astropop.framedata import FrameData
 from astropop.logger import logger, log_to_list
 from astropop.image.imcombine import imcombine, _sigma_clip, \
-                                     _minmax_clip, ImCombiner
+                                     _minmax_clip, _nanmedian, ImCombiner
 from astropop.testing import *
 
 
@@ -67,6 +67,59 @@ class Test_MinMaxClip():
         mask = _minmax_clip(arr, low, high)
         assert_equal(mask, expect)
 
+    @pytest.mark.parametrize('low, high', [(1, None), (None, 3),
+                                           (-np.inf, 3), (1, np.inf)])
+    def test_invalid_one_limit(self, low, high):
+        arr = np.array([0, 1, 2, np.inf, -np.inf, np.nan, 5, 1])
+        mask = _minmax_clip(arr, low, high)
+        assert_true(np.all(mask[3:6]))
+
+    @pytest.mark.parametrize('dtype', ['f2', 'f4', 'f8'])
+    def test_invalid_dtypes(self, dtype):
+        arr = np.array([0, 1, 2, np.inf, -np.inf, np.nan, 5, 1], dtype=dtype)
+        expect = np.array([1, 0, 0, 1, 1, 1, 1, 0], dtype=bool)
+        assert_equal(_minmax_clip(arr, 1, 3), expect)
+        expect = np.array([0, 0, 0, 1, 1, 1, 0, 0], dtype=bool)
+        assert_equal(_minmax_clip(arr), expect)
+
+    @pytest.mark.parametrize('dtype', ['i2', 'i8', 'u1', 'u4'])
+    def test_integer_dtypes(self, dtype):
+        arr = np.array([0, 1, 2, 3, 5, 1], dtype=dtype)
+        assert_equal(_minmax_clip(arr, 1, 3), [1, 0, 0, 0, 1, 0])
+        assert_equal(_minmax_clip(arr, None, 2), [0, 0, 0, 1, 1, 0])
+        assert_equal(_minmax_clip(arr), np.zeros(6, dtype=bool))
+
+    def test_input_not_changed(self):
+        arr = np.array([0, 1, 2, np.inf, np.nan, 5, 1])
+        orig = arr.copy()
+        _minmax_clip(arr, 1, 3)
+        assert_equal(arr, orig)
+
+
+class Test_NanMedian():
+    @pytest.mark.filterwarnings('ignore:All-NaN slice')
+    @pytest.mark.parametrize('axis', [None, 0, 1, 2])
+    @pytest.mark.parametrize('n', [3, 4, 5, 6, 7])
+    def test_nanmedian(self, axis, n):
+        with NumpyRNGContext(123):
+            arr = np.random.normal(5, 2, (n, 4, 5))
+        arr[0, 0, 0] = np.nan
+        arr[2:5, 1, 1] = np.nan
+        arr[:, 2, 2] = np.nan
+        arr[1, 3, 3] = np.inf
+        arr[2, 3, 4] = -np.inf
+        expect = np.nanmedian(arr, axis=axis)
+        assert_almost_equal(_nanmedian(arr, axis=axis), expect)
+
+    def test_nanmedian_overwrite(self):
+        arr = np.array([[3, 1, np.nan], [2, np.nan, 0]])
+        assert_equal(_nanmedian(arr, axis=1, overwrite_input=True), [2, 1])
+
+    def test_nanmedian_scalar(self):
+        res = _nanmedian([3, 1, np.nan, 2])
+        assert_true(np.isscalar(res))
+        assert_equal(res, 2)
+
 
 class Test_SigmaClip():
     # TODO: test 3D
@@ -94,6 +147,11 @@ class Test_SigmaClip():
         _sigma_clip(arr, [1, 2])
         _sigma_clip(arr, (1, 2))
 
+        # and 1-element, like accepted by ImCombiner.set_sigma_clip
+        assert_equal(_sigma_clip(arr, [1]), _sigma_clip(arr, 1))
+        assert_equal(_sigma_clip(arr, (None, 1)),
+                     _sigma_clip(arr, np.array([None, 1])))
+
     def test_invalid(self):
         arr = np.ones((5, 5))
         exp = np.zeros((5, 5), dtype=bool)
@@ -202,6 +260,24 @@ class Test_SigmaClip():
         mask = _sigma_clip(arr, 3)
         assert_equal(mask, expect_3)
 
+    @pytest.mark.parametrize('axis', [0, 1])
+    def test_2D_axis(self, axis):
+        with NumpyRNGContext(123):
+            arr = np.random.normal(5, 0.1, (3, 50))
+        arr[0, 10] = 1000
+        arr[2, 20] = -1000
+        # second row is shifted and must not be masked along axis 1
+        arr[1] += 100
+        if axis == 0:
+            arr = arr.T
+
+        mask = _sigma_clip(arr, 3, axis=axis)
+        if axis == 0:
+            mask = mask.T
+        assert_true(mask[0, 10])
+        assert_true(mask[2, 20])
+        assert_equal(np.sum(mask), 2)
+
 
 class Test_ImCombineConformance():
     def test_class_creation(self):
@@ -672,6 +748,17 @@ class Test_ImCombiner_LoadImages():
         assert_equal(len(comb._images), 0)
         assert_is_none(comb._buffer)
 
+    def test_image_loading_order(self, tmpdir):
+        n = 10
+        li = [os.path.join(tmpdir.strpath, f'fits_test{i}') for i in range(n)]
+        for i, f in enumerate(li):
+            fits.PrimaryHDU(np.ones((10, 10))*i).writeto(f)
+
+        comb = ImCombiner()
+        comb._load_images(li)
+        for i, v in enumerate(comb._images):
+            assert_equal(v.data, np.ones((10, 10))*i)
+
     @pytest.mark.parametrize('disk_cache', [True, False])
     def test_image_loading_fitshdu(self, disk_cache):
         n = 10
@@ -781,6 +868,27 @@ class Test_ImCombiner_Rejection():
         comb._apply_rejection()
         assert_equal(np.isnan(comb._buffer), expect)
 
+    def test_apply_sigmaclip_and_minmax(self):
+        data = np.array([1, -1, 1, -1, 65000, 0.5, np.nan, np.inf],
+                        dtype=np.float32)
+        comb = ImCombiner()
+
+        # 65000 and inf by sigma clip, -1 by minmax, nan kept
+        comb._buffer = data.copy()
+        comb.set_sigma_clip(3)
+        comb.set_minmax_clip(-0.9, 2)
+        expect = [0, 1, 0, 1, 1, 0, 1, 1]
+        comb._apply_rejection()
+        assert_equal(np.isnan(comb._buffer), expect)
+
+        # only minmax, with the lower limit
+        comb._buffer = data.copy()
+        comb.set_sigma_clip(None)
+        comb.set_minmax_clip(0.8, None)
+        expect = [0, 1, 0, 1, 0, 1, 1, 1]
+        comb._apply_rejection()
+        assert_equal(np.isnan(comb._buffer), expect)
+
 
 class Test_ImCombiner_Combine():
     @pytest.mark.parametrize('method', ['sum', 'median', 'mean'])
@@ -869,6 +977,41 @@ class Test_ImCombiner_Combine():
             assert_equal(res.meta['astropop imcombine nimages'], n)
             assert_equal(res.meta['astropop imcombine method'], method)
 
+    @pytest.mark.parametrize('method', ['sum', 'mean'])
+    def test_combine_float32_accumulation(self, method):
+        n = 500
+        shape = (4, 4)
+        images = [np.full(shape, 10000.1, dtype=np.float32)]*n
+        expect = {'sum': 10000.1*n, 'mean': 10000.1}[method]
+
+        comb = ImCombiner(dtype=np.float32)
+        res = comb.combine(images, method=method)
+        assert_almost_equal(res.data, np.full(shape, expect), decimal=0)
+        assert_almost_equal(res.uncertainty, np.zeros(shape), decimal=2)
+
+    def test_combine_reuse_buffer(self):
+        shape = (10, 10)
+        images = [FrameData(np.ones(shape)*i, unit='adu') for i in range(5)]
+
+        comb = ImCombiner()
+        res = comb.combine(images, method='median')
+        assert_equal(res.data, np.ones(shape)*2)
+        assert_is_none(comb._buffer)
+        store = comb._buffer_store
+        assert_is_not_none(store)
+
+        # smaller stack must reuse the memory, without old values
+        images = [FrameData(np.ones(shape)*i, unit='adu') for i in range(3)]
+        images[0].mask_pixels((1, 1))
+        res = comb.combine(images, method='mean')
+        assert_equal(res.data[0, 0], 1)
+        assert_equal(res.data[1, 1], 1.5)
+        assert_is(comb._buffer_store, store)
+
+        comb._clear(release=True)
+        assert_is_none(comb._buffer_store)
+        assert_is_none(comb._unct_store)
+
 
 class Test_ImCombiner_HeaderMerging():
     def create_images(self):
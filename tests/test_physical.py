@@ -3,11 +3,14 @@
 
 import pytest
 import numpy as np
+from fractions import Fraction
 from astropop.framedata import FrameData
 from astropop.math._deriv import propagate_1, propagate_2, \
-                                 numerical_derivative
+                                 numerical_derivative, _quadrature, \
+                                 derivatives
 from astropop.math.physical import QFloat, qfloat, units, \
                                    same_unit, UnitsError, \
+                                   _cached_converters, \
                                    equal_within_errors, \
                                    convert_to_qfloat
 
@@ -58,6 +61,53 @@ class Test_Derivatives:
         # assert_true(np.isnan(r).all())
         assert_true(np.isinf(r).all())
 
+    def test_propagate_new_derivative(self):
+        # entries added to the public dict after import are used too
+        derivatives['test_neg'] = (lambda x: -1.0)
+        try:
+            assert_equal(propagate_1('test_neg', -1, 1, 0.1), -0.1)
+            with pytest.raises(ValueError,
+                               match='func test_neg is not a 2 variable'):
+                propagate_2('test_neg', 1, 1, 1, 1, 1)
+        finally:
+            del derivatives['test_neg']
+
+    def test_propagate_override_derivative(self):
+        # overriding existing entries of the public dict is respected
+        original = derivatives['sin']
+        derivatives['sin'] = (lambda x: 100.)
+        try:
+            assert_equal(propagate_1('sin', 0, 0., 1.), 100.)
+        finally:
+            derivatives['sin'] = original
+        assert_equal(propagate_1('sin', 0, 0., 1.), 1.)
+
+    def test_quadrature(self):
+        sx = np.array([0.3, 0.6, 0.9])
+        sy = np.array([0.4, 0.8, 1.2])
+        r = _quadrature(sx, sy)
+        assert_almost_equal(r, [0.5, 1.0, 1.5])
+        assert_almost_equal(r, propagate_2('add', None, 1, 1, sx, sy))
+        # inputs are not touched
+        assert_equal(sx, [0.3, 0.6, 0.9])
+        assert_equal(sy, [0.4, 0.8, 1.2])
+        # scalars and broadcasting
+        assert_almost_equal(_quadrature(3, 4), 5)
+        assert_almost_equal(_quadrature(0.3, sy), np.hypot(0.3, sy))
+        assert_almost_equal(_quadrature(sx, 0.4), np.hypot(sx, 0.4))
+        # temporaries can be used as work buffers
+        a = sx.copy()
+        r = _quadrature(a, sy, overwrite_input=True)
+        assert_almost_equal(r, [0.5, 1.0, 1.5])
+        assert_is(r, a)
+        # integer inputs
+        assert_almost_equal(_quadrature(np.array([3, 6]), np.array([4, 8])),
+                            [5, 10])
+        # python floats stay python floats
+        r = _quadrature(0.3, 0.4)
+        assert_is_instance(r, float)
+        assert_almost_equal(r, 0.5)
+
     def test_numerical_derivatives_not_callable_error(self):
         # test raise error for non-callabel functions
         with pytest.raises(TypeError,
@@ -129,6 +179,42 @@ class Test_QFloat_UnitsHandling:
         assert_equal(qf_4.uncertainty, 0.01)
         assert_equal(qf_4.unit, units.minute)
 
+    def test_qfloat_same_unit_cached(self):
+        qf1 = QFloat(1.0, 0.1, 'm')
+        qf2 = QFloat(200, 10, 'cm')
+        qf3 = QFloat(120, 0.3, 's')
+
+        _cached_converters.cache_clear()
+        for i in range(3):
+            qf_1, qf_2 = same_unit(qf1, qf2, np.add)
+            assert_equal(qf_2.nominal, 2.0)
+            assert_equal(qf_2.unit, units.m)
+        info = _cached_converters.cache_info()
+        assert_equal(info.misses, 1)
+        assert_equal(info.hits, 2)
+
+        # identical units never reach the cache
+        qf_1, qf_2 = same_unit(qf1, qf1)
+        assert_is(qf_1, qf1)
+        assert_is(qf_2, qf1)
+        assert_equal(_cached_converters.cache_info().currsize, 1)
+
+        # equal units built twice are not converted
+        qf5 = QFloat(1.0, 0.1, units.m/units.s)
+        qf6 = QFloat(2.0, 0.2, units.m/units.s)
+        qf_5, qf_6 = same_unit(qf5, qf6)
+        assert_is(qf_5, qf5)
+        assert_is(qf_6, qf6)
+
+        # dimensionless values
+        qf_1, qf_2 = same_unit(QFloat(1.0), 2)
+        assert_equal(qf_1.unit, units.dimensionless_unscaled)
+        assert_equal(qf_2.nominal, 2)
+
+        # errors still report the function name
+        with pytest.raises(UnitsError, match="'add'"):
+            same_unit(qf3, qf1, np.add)
+
     def test_qfloat_same_unit_array(self):
         # like for single values, everything must run as arrays
         qf1 = QFloat(1.0, 0.1, 'm')
@@ -168,6 +254,32 @@ class Test_QFloat_UnitsHandling:
 
 
 class Test_QFloat_InitAndSet:
+    def test_qfloat_is_array_flag(self):
+        qf = QFloat(1.0, 0.1, 'm')
+        assert_false(qf._is_array)
+        assert_equal(qf.uncertainty, 0.1)
+
+        # setting an array nominal resets the uncertainty to an array
+        qf.nominal = [1, 2, 3]
+        assert_true(qf._is_array)
+        assert_equal(qf.uncertainty, [0, 0, 0])
+
+        qf.nominal = 2.0
+        assert_false(qf._is_array)
+        assert_equal(qf.uncertainty, 0.0)
+
+    @pytest.mark.parametrize('value, shape, size', [(1.0, (), 1),
+                                                    (np.array(1.0), (), 1),
+                                                    ([1, 2, 3], (3,), 3),
+                                                    (np.ones((2, 3)), (2, 3),
+                                                     6)])
+    def test_qfloat_shape_size(self, value, shape, size):
+        qf = QFloat(value)
+        assert_equal(qf.shape, shape)
+        assert_equal(qf.size, size)
+        assert_equal(np.shape(qf), shape)
+        assert_equal(np.size(qf), size)
+
     @pytest.mark.parametrize('value, uncertainty, unit', [(1.0, 0.1, 'm'),
                                                           (200, None, None),
                                                           (120, 0.3, None),
@@ -345,6 +457,34 @@ class Test_QFloat_Repr:
                      '[1.0+-0.1, 1.00+-0.01, 1+-1, 1.01+-0.01, 1.00+-0.01, '
                      '1.01+-0.01]')
 
+    def test_qfloat_str_array_2d_summarized(self):
+        qf = QFloat(np.arange(10000).reshape((100, 100)),
+                    np.full((100, 100), 3), 's')
+        assert_equal(str(qf),
+                     '[[0+-3, 1+-3, 2+-3, ..., 97+-3, 98+-3, 99+-3],\n'
+                     ' [100+-3, 101+-3, 102+-3, ..., 197+-3, 198+-3, '
+                     '199+-3],\n'
+                     ' [200+-3, 201+-3, 202+-3, ..., 297+-3, 298+-3, '
+                     '299+-3],\n'
+                     ' ...,\n'
+                     ' [9700+-3, 9701+-3, 9702+-3, ..., 9797+-3, 9798+-3, '
+                     '9799+-3],\n'
+                     ' [9800+-3, 9801+-3, 9802+-3, ..., 9897+-3, 9898+-3, '
+                     '9899+-3],\n'
+                     ' [9900+-3, 9901+-3, 9902+-3, ..., 9997+-3, 9998+-3, '
+                     '9999+-3]] unit=s')
+
+    @pytest.mark.filterwarnings('error')
+    @pytest.mark.parametrize('std, rep', [(0.0, '1.0+-0.0'),
+                                          (np.inf, '1.0+-inf'),
+                                          (np.nan, '1.0+-nan')])
+    def test_qfloat_str_non_finite_error(self, std, rep):
+        assert_equal(str(QFloat(1.0, std)), rep)
+
+    def test_qfloat_str_array_0d(self):
+        qf = QFloat(np.array(1.0), np.array(0.1), 'm')
+        assert_equal(str(qf), '1.0+-0.1 unit=m')
+
 
 class Test_QFloat_Operators:
     def test_qfloat_properties_getset(self):
@@ -503,8 +643,24 @@ class Test_QFloat_Operators:
         qf4 = QFloat(np.ones(10), -np.ones(10)*0.1, 'm')
         assert_equal(qf4.uncertainty, np.ones(10)*0.1)
 
+        # the input arrays are not changed
+        n = np.ones(10)
+        s = -np.ones(10)*0.1
+        qf5 = QFloat(n, s, 'm')
+        assert_equal(qf5.uncertainty, np.ones(10)*0.1)
+        assert_equal(s, -np.ones(10)*0.1)
+        assert_false(np.shares_memory(qf5.uncertainty, s))
+        assert_false(np.shares_memory(qf5.nominal, n))
+
+        # None uncertainties are considered zero
+        qf6 = QFloat([1, 2], np.array([None, -0.2]))
+        assert_equal(qf6.uncertainty, [0, 0.2])
+
     @pytest.mark.parametrize('value,expect', [(QFloat(1.0, 0.1, 'm'), QFloat(1.0, 0.1, 'm')),
                                               (1, QFloat(1.0, 0, None)),
+                                              (np.float32(2.5), QFloat(2.5)),
+                                              (np.int16(3), QFloat(3.0)),
+                                              (Fraction(1, 2), QFloat(0.5)),
                                               (np.array([1, 2, 3]), QFloat([1, 2, 3], unit=None)),
                                               ('string', 'raise'),
                                               (None, 'raise'),
@@ -599,6 +755,14 @@ class Test_QFloat_Operators:
         assert_equal(qf2.uncertainty, [0.0001, 0.0002])
         assert_equal(qf2.unit, units.km)
 
+        # same unit conversion must not share the buffers
+        qf2 = qf1.to('m')
+        assert_equal(qf2.nominal, [1, 2])
+        assert_equal(qf2.uncertainty, [0.1, 0.2])
+        assert_equal(qf2.unit, units.m)
+        qf2.nominal[0] = 10
+        assert_equal(qf1.nominal, [1, 2])
+
     def test_qfloat_getitem(self):
         # simple array
         qf = QFloat([1, 2, 3, 4, 5], [0.1, 0.2, 0.3, 0.4, 0.5], 's')
@@ -748,6 +912,28 @@ class Test_QFloat_Comparison:
         assert_true(qf1 != qf2)
         assert_false(equal_within_errors(qf1, qf2))
 
+    def test_qfloat_comparison_equality_array(self):
+        qf1 = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], 'm')
+        qf2 = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], 'm')
+        qf3 = QFloat([1.0, 2.0, 3.1], [0.1, 0.2, 0.3], 'm')
+        assert_true(qf1 == qf2)
+        assert_false(qf1 == qf3)
+        assert_true(qf1 != qf3)
+
+        # broadcasted values
+        assert_true(QFloat([2.0, 2.0], [0.1, 0.1]) == QFloat(2.0, 0.1))
+        assert_false(QFloat([2.0, 2.0], [0.1, 0.1]) == QFloat(2.0, 0.2))
+
+        # shapes that cannot be broadcasted are different
+        assert_false(qf1 == QFloat([1.0, 2.0], [0.1, 0.2], 'm'))
+        assert_true(qf1 != QFloat([1.0, 2.0], [0.1, 0.2], 'm'))
+
+        # equal within errors is element-wise
+        res = equal_within_errors(qf1, QFloat([1.05, 2.0, 4.0], unit='m'))
+        assert_is_instance(res, np.ndarray)
+        assert_equal(res.dtype, bool)
+        assert_equal(res, [True, True, False])
+
     def test_qfloat_comparison_inequality_same_unit(self):
         qf1 = QFloat(1.0, 0.1, 'm')
         qf2 = QFloat(1.0, 0.2, 'm')
@@ -818,6 +1004,25 @@ class Test_QFloat_Comparison:
         with pytest.raises(UnitsError):
             qf1 >= qf2
 
+    @pytest.mark.parametrize('op', ['__lt__', '__le__', '__gt__', '__ge__'])
+    def test_qfloat_comparison_inequality_error_name(self, op):
+        qf1 = QFloat(1.0, 0.1, 'm')
+        qf2 = QFloat(1.0, 0.1, 's')
+        with pytest.raises(UnitsError, match=op):
+            getattr(qf1, op)(qf2)
+
+    def test_qfloat_comparison_inequality_array(self):
+        qf1 = QFloat([1.0, 2.0, 3.0], [0.1, 0.1, 0.1], 'm')
+        qf2 = QFloat(200, 0.1, 'cm')
+        assert_equal(qf1 < qf2, [True, False, False])
+        assert_equal(qf1 <= qf2, [True, True, False])
+        assert_equal(qf1 > qf2, [False, False, True])
+        assert_equal(qf1 >= qf2, [False, True, True])
+        # operands are not changed
+        assert_equal(qf1.nominal, [1.0, 2.0, 3.0])
+        assert_equal(qf2.nominal, 200)
+        assert_equal(qf2.unit, 'cm')
+
 
 class Test_QFloat_Add:
     def test_qfloat_math_add_single(self):
@@ -23,11 +23,95 @@ class TestQFloatNumpyArrayFuncs:
         with pytest.raises(TypeError):
             np.frexp(qf)
 
+    def test_qfloat_np_asarray(self):
+        qf = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], "m")
+        arr = np.asarray(qf)
+        assert_is_instance(arr, np.ndarray)
+        assert_equal(arr, [1.0, 2.0, 3.0])
+        # no copy is done
+        assert_true(np.shares_memory(arr, qf._nominal))
+
+        arr = np.asarray(qf, dtype=np.float32)
+        assert_equal(arr.dtype, np.float32)
+        assert_equal(arr, [1.0, 2.0, 3.0])
+
+        assert_equal(np.asarray(QFloat(2.0, 0.1)), 2.0)
+
+    def test_qfloat_np_asarray_readonly(self):
+        qf = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], "m")
+        arr = np.asarray(qf)
+        assert_false(arr.flags.writeable)
+        with pytest.raises(ValueError, match='read-only'):
+            arr[0] = 10
+        assert_equal(qf.nominal, [1.0, 2.0, 3.0])
+
+        # np.array copies, so the result is writable and independent
+        arr = np.array(qf)
+        arr[0] = 10
+        assert_equal(qf.nominal, [1.0, 2.0, 3.0])
+
+        # numpy 2 copy keyword
+        arr = qf.__array__(copy=True)
+        arr[0] = 10
+        assert_equal(qf.nominal, [1.0, 2.0, 3.0])
+        assert_false(qf.__array__(copy=False).flags.writeable)
+        with pytest.raises(ValueError, match='avoid copy'):
+            qf.__array__(dtype=np.float32, copy=False)
+
+    def test_qfloat_quantity_drops_uncertainty(self):
+        qf = QFloat([1.0, 2.0], [0.1, 0.2], "m")
+        q = units.Quantity(qf)
+        assert_equal(q.value, [1.0, 2.0])
+        assert_equal(q.unit, units.m)
+
+    def test_qfloat_np_array_of_qfloats(self):
+        # sequences of QFloats become float arrays of the nominal values,
+        # dropping uncertainties and units
+        arr = np.array([QFloat(1., .1, 'm'), QFloat(2., .2, 'm')])
+        assert_equal(arr.dtype, np.float64)
+        assert_equal(arr, [1.0, 2.0])
+        # use numpy stacking to keep them
+        qf = np.stack([QFloat(1., .1, 'm'), QFloat(2., .2, 'm')])
+        assert_is_instance(qf, QFloat)
+        assert_equal(qf.uncertainty, [0.1, 0.2])
+        assert_equal(qf.unit, units.m)
+
     def test_error_only_call_method(self):
         qf = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], "m")
         with pytest.raises(TypeError):
             np.sin.at(qf, 0)
 
+    def test_qfloat_np_concatenate(self):
+        qf1 = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], unit="m")
+        qf2 = QFloat([1.0], [0.1], unit="km")
+        qf3 = QFloat([1.0], [0.1], unit="s")
+
+        qf = np.concatenate([qf1, qf2, qf1])
+        assert_equal(qf.nominal, [1.0, 2.0, 3.0, 1000.0, 1.0, 2.0, 3.0])
+        assert_equal(qf.std_dev, [0.1, 0.2, 0.3, 100.0, 0.1, 0.2, 0.3])
+        assert_equal(qf.unit, units.m)
+
+        with pytest.raises(UnitsError):
+            np.concatenate([qf1, qf3])
+
+        qf1 = QFloat(np.ones((2, 3)), np.ones((2, 3))*0.1, unit="m")
+        qf = np.concatenate((qf1, qf1), axis=1)
+        assert_equal(qf.shape, (2, 6))
+        assert_equal(qf.std_dev, np.ones((2, 6))*0.1)
+
+    @pytest.mark.parametrize('func', [np.stack, np.vstack, np.hstack,
+                                      np.dstack, np.column_stack])
+    def test_qfloat_np_stacking(self, func):
+        n1 = np.arange(6).reshape((2, 3))
+        n2 = np.arange(6, 12).reshape((2, 3))
+        qf1 = QFloat(n1, n1*0.1, unit="m")
+        qf2 = QFloat(n2/100, n2*0.001, unit="hm")
+
+        qf = func([qf1, qf2])
+        assert_almost_equal(qf.nominal, func([n1, n2]))
+        assert_almost_equal(qf.std_dev, func([n1*0.1, n2*0.1]))
+        assert_equal(qf.unit, units.m)
+
     def test_qfloat_np_append(self):
         qf1 = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], unit="m")
         qf2 = QFloat([1.0], [0.1], unit="km")
@@ -124,14 +208,6 @@ class TestQFloatNumpyArrayFuncs:
         assert_almost_equal(res.std_dev, arr * 0.1)
         assert_equal(qf.unit, res.unit)
 
-    @pytest.mark.skip(reason="Not Implemented Yet")
-    def test_qfloat_np_columnstack(self):
-        raise NotImplementedError
-
-    @pytest.mark.skip(reason="Not Implemented Yet")
-    def test_qfloat_np_concatenate(self):
-        raise NotImplementedError
-
     @pytest.mark.skip(reason="Not Implemented Yet")
     def test_qfloat_np_copyto(self):
         raise NotImplementedError
@@ -196,10 +272,6 @@ class TestQFloatNumpyArrayFuncs:
     def test_qfloat_np_diff(self):
         raise NotImplementedError
 
-    @pytest.mark.skip(reason="Not Implemented Yet")
-    def test_qfloat_np_dstack(self):
-        raise NotImplementedError
-
     @pytest.mark.skip(reason="Not Implemented Yet")
     def test_qfloat_np_ediff1d(self):
         raise NotImplementedError
@@ -484,6 +556,22 @@ class TestQFloatNumpyArrayFuncs:
         with pytest.raises(TypeError):
             res = np.resize(qf, shp)
 
+    @pytest.mark.parametrize('func, args', [(np.delete, (1,)),
+                                            (np.repeat, (2,)),
+                                            (np.resize, ((2, 3),)),
+                                            (np.roll, (2,)),
+                                            (np.take, ([0, 2],)),
+                                            (np.tile, (2,))])
+    def test_qfloat_np_copying_funcs_independent(self, func, args):
+        qf = QFloat([1.0, 2.0, 3.0, 4.0], [0.1, 0.2, 0.3, 0.4], 'm')
+        res = func(qf, *args)
+        assert_equal(res.nominal, func(qf.nominal, *args))
+        assert_equal(res.std_dev, func(qf.std_dev, *args))
+        assert_equal(res.unit, units.m)
+        # the result must not share memory with the original
+        assert_false(np.shares_memory(res.nominal, qf.nominal))
+        assert_false(np.shares_memory(res.std_dev, qf.std_dev))
+
     def test_qfloat_np_roll(self):
         arr = np.arange(10)
         qf = QFloat(arr, arr * 0.01, "m")
@@ -769,6 +857,52 @@ class TestQFloatNumpyUfuncs:
             # out argument should fail
             func(qf1, out=[])
 
+    def test_qfloat_np_ufunc_not_handled(self):
+        qf1 = QFloat([1.0, 2.0], [0.1, 0.2], 'm')
+        with pytest.raises(TypeError):
+            # ufunc not registered
+            np.bitwise_and(qf1, qf1)
+        with pytest.raises(TypeError):
+            # only __call__ method is supported
+            np.add.reduce(qf1)
+
+    def test_qfloat_np_ufunc_out(self):
+        qf1 = QFloat([1.0, 2.0, 3.0], [0.1, 0.2, 0.3], 'm')
+        qf2 = QFloat([2.0, 2.0, 2.0], [0.2, 0.2, 0.2], 's')
+        out = QFloat(np.zeros(3), np.zeros(3))
+        nom, std = out.nominal, out.uncertainty
+
+        res = np.multiply(qf1, qf2, out=out)
+        assert_is(res, out)
+        assert_equal(out, qf1*qf2)
+        # buffers were reused
+        assert_is(out.nominal, nom)
+        assert_is(out.uncertainty, std)
+        assert_equal(out.unit, units.m*units.s)
+
+        # the output can be one of the inputs
+        expect = qf1*qf2
+        np.multiply(qf1, qf2, out=qf1)
+        assert_equal(qf1, expect)
+
+        # functions that return plain arrays
+        arr = np.ones(3, dtype=bool)
+        res = np.isnan(qf2, out=arr)
+        assert_is(res, arr)
+        assert_equal(arr, [False, False, False])
+
+        # multiple outputs
+        o1 = QFloat(np.zeros(3))
+        o2 = QFloat(np.zeros(3))
+        r1, r2 = np.divmod(QFloat([5, 7, 9]), QFloat(2), out=(o1, o2))
+        assert_is(r1, o1)
+        assert_is(r2, o2)
+        assert_equal(o1.nominal, [2, 3, 4])
+        assert_equal(o2.nominal, [1, 1, 1])
+
+        with pytest.raises(ValueError):
+            np.add(qf2, qf2, out=QFloat(np.zeros(2)))
+
     def test_qfloat_np_add(self):
         qf1 = QFloat(2.0, 0.2, 'm')
         qf2 = QFloat(1.0, 0.1, 'm')
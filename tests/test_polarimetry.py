@@ -6,6 +6,8 @@ import numpy as np
 from astropop.polarimetry import match_pairs, estimate_dxdy, \
                                  _compute_theta, quarterwave_model, \
                                  halfwave_model, \
+                                 _halfwave_fit_model, \
+                                 _quarterwave_fit_model, \
                                  _DualBeamPolarimetry, \
                                  SLSDualBeamPolarimetry, \
                                  StokesParameters
@@ -46,6 +48,17 @@ def test_compute_theta():
     assert_equal(_compute_theta(-0.5, -0.5), 112.5*units.degree)
 
 
+def test_compute_theta_array():
+    q = np.array([0, 1, 0, -1, 0.5, 0.5, -0.5, -0.5])
+    u = np.array([1, 0, -1, 0, 0.5, -0.5, 0.5, -0.5])
+    assert_equal(_compute_theta(q, u),
+                 [45, 0, 135, 90, 22.5, 157.5, 67.5, 112.5]*units.degree)
+
+    theta = _compute_theta(QFloat(q), QFloat(u))
+    assert_equal(theta.nominal, [45, 0, 135, 90, 22.5, 157.5, 67.5, 112.5])
+    assert_equal(theta.unit, units.degree)
+
+
 class Test_PairMatching:
     def test_estimate_dxdy(self):
         dx, dy = 30.5, -25.2
@@ -63,6 +76,20 @@ class Test_PairMatching:
         assert_almost_equal(dx, dx_e, decimal=1)
         assert_almost_equal(dy, dy_e, decimal=1)
 
+        # steps as array, and the default steps
+        dx_e, dy_e = estimate_dxdy(x, y, steps=np.array([50, 5, 1]), bins=100)
+        assert_almost_equal(dx, dx_e, decimal=1)
+        assert_almost_equal(dy, dy_e, decimal=1)
+
+        dx_e, dy_e = estimate_dxdy(x, y)
+        assert_almost_equal(dx, dx_e, decimal=0)
+        assert_almost_equal(dy, dy_e, decimal=0)
+
+    @pytest.mark.parametrize('x, y', [([], []), ([10.0], [20.0]),
+                                      ([10.0, 500.0], [20.0, 500.0])])
+    def test_estimate_dxdy_no_pairs(self, x, y):
+        assert_equal(estimate_dxdy(np.array(x), np.array(y)), (0.0, 0.0))
+
     def test_match_pairs(self):
         dx, dy = 30.5, -25.2
 
@@ -101,6 +128,24 @@ class Test_PairMatching:
         assert_equal(index['o'], np.arange(0, 10))
         assert_equal(index['e'], np.arange(10, 20))
 
+    def test_match_pairs_list(self):
+        dx, dy = 30.5, -25.2
+
+        x1 = [46.7, 68.3, 131.9, 83.5, 34.7]
+        y1 = [186.5, 29.9, 94.9, 105.2, 43.4]
+        x = x1 + [i + dx for i in x1]
+        y = y1 + [i + dy for i in y1]
+
+        index = match_pairs(x, y, dx, dy, 0.5)
+        assert_equal(len(index), 5)
+        assert_equal(index['o'], np.arange(5, 10))
+        assert_equal(index['e'], np.arange(0, 5))
+
+    def test_match_pairs_empty(self):
+        index = match_pairs(np.array([]), np.array([]), 30.5, -25.2, 0.5)
+        assert_equal(len(index), 0)
+        assert_equal(index.dtype.names, ('o', 'e'))
+
 
 class Test_ModelQuarter:
     def test_model_evaluate_plain(self):
@@ -166,6 +211,21 @@ class Test_ModelQuarter:
                              method='trf')
         assert_almost_equal(fit, [q, u, v, zero], decimal=3)
 
+    @pytest.mark.parametrize('zero', [0, 60, 137.2])
+    def test_fit_model_fixed_zero(self, zero):
+        psi = np.arange(0, 360, 22.5)
+        model = _quarterwave_fit_model(psi, zero=zero)
+        expect = quarterwave_model(psi, 0.013, -0.0021, 0.03044, zero=zero)
+        assert_almost_equal(model(psi, 0.013, -0.0021, 0.03044), expect)
+
+    @pytest.mark.parametrize('zero', [0, 60, 137.2])
+    def test_fit_model_free_zero(self, zero):
+        psi = np.arange(0, 360, 22.5)
+        model = _quarterwave_fit_model(psi)
+        expect = quarterwave_model(psi, 0.013, -0.0021, 0.03044, zero=zero)
+        assert_almost_equal(model(psi, 0.013, -0.0021, 0.03044, zero),
+                            expect)
+
 
 class Test_ModelHalf:
     def test_model_evaluate_plain(self):
@@ -213,6 +273,13 @@ class Test_ModelHalf:
                              method='trf')
         assert_almost_equal(fit, [q, u], decimal=3)
 
+    @pytest.mark.parametrize('zero', [None, 0, 60, 137.2])
+    def test_fit_model(self, zero):
+        psi = np.arange(0, 360, 22.5)
+        model = _halfwave_fit_model(psi, zero=zero)
+        expect = halfwave_model(psi, 0.013, -0.021, zero=zero)
+        assert_almost_equal(model(psi, 0.013, -0.021), expect)
+
 
 class Test_DummyPolarimetry:
     @pytest.mark.parametrize('kwargs', [{}, {'zero': 60},
@@ -65,6 +65,26 @@ class Test_RunCommand():
         with pytest.raises(subprocess.CalledProcessError):
             run_command('python -c "import sys; sys.exit(1000)"')
 
+    def test_process_timeout(self):
+        import subprocess
+        stdout = []
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_command(self.com[0], stdout=stdout, timeout=0.35)
+        # only part of the output must be read
+        assert_true(0 < len(stdout) < 10)
+
+    def test_process_timeout_closed_pipes(self):
+        import subprocess
+        import time
+        # the pipes are closed, but the process keeps running
+        com = ['exec', 'bash', '-c', 'echo 1; exec 1>&- 2>&-; sleep 30']
+        stdout = []
+        t0 = time.time()
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_command(com, stdout=stdout, timeout=0.5)
+        assert_true(time.time() - t0 < 10)
+        assert_equal(stdout, ['1'])
+
     @pytest.mark.parametrize('com', com)
     def test_run_command(self, com):
         stdout = []
@@ -34,6 +34,10 @@ class TestTestingHelpers():
         assert_equal(1, 1)
         assert_equal(np.arange(4), [0, 1, 2, 3])
         assert_equal([np.nan, np.inf, 0, 1], [np.nan, np.inf, 0, 1])
+        assert_equal([(1, 'a'), (2, None)], [(1, 'a'), (2, None)])
+        assert_equal([1, 2.0], np.array([1, 2]))
+        assert_equal([1.0, np.nan], np.array([1.0, np.nan]))
+        assert_equal([np.arange(2)], [np.arange(2)])
 
         with pytest.raises(AssertionError):
             assert_equal(1, 2)
@@ -41,6 +45,16 @@ class TestTestingHelpers():
             assert_equal(np.arange(5), [0, 1, 2, 3])
         with pytest.raises(AssertionError):
             assert_equal([np.nan, 0, 1], [0, 0, 1])
+        with pytest.raises(AssertionError):
+            assert_equal([(1, 'a')], [(1, 'b')])
+
+    def test_assert_equal_bool_arrays(self):
+        a = np.array([[True, False], [False, True]])
+        assert_equal(a, a.copy())
+        with pytest.raises(AssertionError, match='Mismatched elements: 1'):
+            assert_equal(a, np.array([[True, False], [True, True]]))
+        with pytest.raises(AssertionError):
+            assert_equal(a, np.ones(3, dtype=bool))
 
     def test_assert_not_equal(self):
         assert_not_equal(1, 2)
@@ -39,3 +39,14 @@ def test_qfloat_unit_property_none():
 def test_qfloat_unit_property_invalid(unit):
     with pytest.raises(ValueError):
         DummyClass(unit)
+
+
+def test_qfloat_unit_property_cached():
+    c = DummyClass('km')
+    d = DummyClass('km')
+    assert_is(c.unit, d.unit)
+    assert_equal(c.unit, units.km)
+
+    # dimensionless units are stored as None
+    c.unit = units.Unit('')
+    assert_is_none(c._unit)